@@ -0,0 +1,92 @@
+"""
+Compare serialising a pmdcat.Dataset with 1,000 distributions by walking each object's class hierarchy and every
+declared property, as Metadata.quads() used to, against the serialisation plans compiled for each class when it's
+defined. Also times adding the quads to an rdflib Dataset and writing them straight out as TriG.
+
+    python benchmarks/metadata-quads.py [distributions]
+"""
+
+import io
+import sys
+from datetime import datetime, timezone
+from inspect import getmro
+from timeit import timeit
+
+from rdflib import RDF, Dataset as RDFDataset
+
+from gssutils.metadata import pmdcat, dcat
+from gssutils.metadata.base import Metadata
+from gssutils.metadata.stream import write_trig
+
+
+class Scraper:
+    # just what a Distribution needs
+    session = None
+    seed = None
+    frame_cache = None
+
+
+def dataset(distributions: int) -> pmdcat.Dataset:
+    ds = pmdcat.Dataset('https://www.gov.uk/government/statistics/some-statistics')
+    ds.uri = 'http://gss-data.org.uk/data/gss_data/some-family/some-statistics-catalog-entry'
+    ds.set_containing_graph('http://gss-data.org.uk/graph/gss_data/some-family/some-statistics-metadata')
+    ds.title = 'Some statistics'
+    ds.description = 'Statistics published monthly.'
+    ds.publisher = 'https://www.gov.uk/government/organisations/some-department'
+    ds.issued = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    ds.modified = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    ds.keyword = ['statistics', 'monthly']
+    ds.family = 'some-family'
+    found = []
+    for i in range(distributions):
+        distribution = dcat.Distribution(Scraper())
+        distribution.downloadURL = f'https://assets.publishing.service.gov.uk/some-statistics-{i}.csv'
+        distribution.title = f'Some statistics, part {i}'
+        distribution.mediaType = 'text/csv'
+        distribution.issued = datetime(2020, 1, 1, tzinfo=timezone.utc)
+        found.append(distribution)
+    ds.distribution = found
+    return ds
+
+
+def mro_quads(obj: Metadata, seen=None):
+    # how quads() used to work everything out again for each object
+    if seen is None:
+        seen = set()
+    seen.add(id(obj))
+    for c in getmro(type(obj)):
+        if hasattr(c, '_type'):
+            for t in c._type if type(c._type) == tuple else [c._type]:
+                yield obj._uri, RDF.type, t, obj._containing_graph
+            break
+    referenced = []
+    for local_name, (prop, status, f) in obj._properties_metadata.items():
+        if local_name in obj.__dict__:
+            for value in obj._as_list(local_name):
+                yield obj._uri, prop, f(value), obj._containing_graph
+                if isinstance(value, Metadata) and id(value) not in seen:
+                    seen.add(id(value))
+                    referenced.append(value)
+    for value in referenced:
+        yield from mro_quads(value, seen)
+
+
+def add_to_dataset(ds: pmdcat.Dataset):
+    rdf = RDFDataset()
+    ds.add_to_dataset(rdf)
+    return rdf
+
+
+if __name__ == '__main__':
+    distributions = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    ds = dataset(distributions)
+    assert set(mro_quads(ds)) == set(ds.quads())
+    print(f'pmdcat.Dataset with {distributions} distributions, {sum(1 for _ in ds.quads())} quads')
+    for name, run in [
+        ('class hierarchy walk', lambda: sum(1 for _ in mro_quads(ds))),
+        ('compiled plans', lambda: sum(1 for _ in ds.quads())),
+        ('add_to_dataset', lambda: add_to_dataset(ds)),
+        ('write_trig', lambda: write_trig(ds.quads(), io.StringIO()))
+    ]:
+        number = 3 if name == 'add_to_dataset' else 20
+        print(f'{name:>25}: {timeit(run, number=number) / number * 1000:8.2f}ms')
@@ -0,0 +1,86 @@
+"""
+Compare collecting a paged OData response by appending each page to a growing DataFrame, as we used to, against
+Downloadable._get_odata_data, which concatenates the pages once. Pages are served by a local stub OData server,
+in the shape of the HMRC Trade UK API.
+
+    python benchmarks/odata-paging.py
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from timeit import timeit
+from urllib.parse import urlparse, parse_qs
+
+import pandas as pd
+import requests
+
+from gssutils.transform.download import Downloadable
+
+PAGE_SIZE = 1000
+
+
+class StubODataHandler(BaseHTTPRequestHandler):
+    pages = 1
+
+    def do_GET(self):
+        page = int(parse_qs(urlparse(self.path).query).get('page', ['0'])[0])
+        contents = {
+            'value': [
+                {'MonthId': 202001 + (page % 12), 'CommodityId': i, 'FlowTypeId': i % 4, 'Value': i * 1.5,
+                 'NetMass': i * 10}
+                for i in range(page * PAGE_SIZE, (page + 1) * PAGE_SIZE)
+            ]
+        }
+        if page + 1 < self.pages:
+            contents['@odata.nextLink'] = f'http://localhost:{self.server.server_port}/OTS?page={page + 1}'
+        body = json.dumps(contents).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def appending(session, url):
+    # the old approach, DataFrame.append copies the frame collected so far for every page
+    contents = session.get(url).json()
+    df = pd.DataFrame(contents['value'])
+    while '@odata.nextLink' in contents.keys():
+        contents = session.get(contents['@odata.nextLink']).json()
+        df = pd.concat([df, pd.DataFrame(contents['value'])])
+    return df
+
+
+server = ThreadingHTTPServer(('localhost', 0), StubODataHandler)
+threading.Thread(target=server.serve_forever, daemon=True).start()
+url = f'http://localhost:{server.server_port}/OTS'
+
+session = requests.Session()
+distribution = Downloadable()
+distribution._session = session
+
+
+def combine_appending(frames):
+    df = frames[0]
+    for frame in frames[1:]:
+        df = pd.concat([df, frame])
+    return df
+
+
+for pages in [10, 100, 200, 500]:
+    StubODataHandler.pages = pages
+    assert appending(session, url).equals(distribution._get_odata_data(url))
+    append = timeit(lambda: appending(session, url), number=3) / 3
+    concat = timeit(lambda: distribution._get_odata_data(url), number=3) / 3
+    # and without the HTTP requests and JSON parsing, just combining the pages
+    frames = list(distribution._iter_odata_pages(url))
+    combine_append = timeit(lambda: combine_appending(frames), number=3) / 3
+    combine_concat = timeit(lambda: pd.concat(frames), number=3) / 3
+    print(f'{pages:4d} pages of {PAGE_SIZE} rows: append {append:6.2f}s, single concat {concat:6.2f}s; '
+          f'combining pages only: append {combine_append:6.3f}s, single concat {combine_concat:6.3f}s')
+
+server.shutdown()
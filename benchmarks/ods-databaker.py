@@ -0,0 +1,126 @@
+"""
+Compare loading an ODS spreadsheet for databaker by converting it to XLS with pyexcel, as we used to, against
+gssutils.transform.ods.ODSTableSet, which reads the ODS directly. A spreadsheet of the given size, with a bold
+header row, a merged title and a date column, is generated first, as big ODS files from publishers are too large
+to keep in the repository.
+
+    python benchmarks/ods-databaker.py [rows] [columns]
+
+XLS can't hold more than 65,536 rows or 256 columns, so beyond that only ODSTableSet is timed.
+"""
+
+import resource
+import sys
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from io import BytesIO
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+import messytables
+import pyexcel
+import xypath
+import xypath.loader
+
+from gssutils.transform.ods import ODSTableSet
+
+MANIFEST = '''<?xml version="1.0" encoding="UTF-8"?>
+<manifest:manifest xmlns:manifest="urn:oasis:names:tc:opendocument:xmlns:manifest:1.0" manifest:version="1.2">
+ <manifest:file-entry manifest:full-path="/" manifest:media-type="application/vnd.oasis.opendocument.spreadsheet"/>
+ <manifest:file-entry manifest:full-path="content.xml" manifest:media-type="text/xml"/>
+</manifest:manifest>'''
+
+CONTENT_START = '''<?xml version="1.0" encoding="UTF-8"?>
+<office:document-content xmlns:office="urn:oasis:names:tc:opendocument:xmlns:office:1.0"
+ xmlns:style="urn:oasis:names:tc:opendocument:xmlns:style:1.0"
+ xmlns:text="urn:oasis:names:tc:opendocument:xmlns:text:1.0"
+ xmlns:table="urn:oasis:names:tc:opendocument:xmlns:table:1.0"
+ xmlns:fo="urn:oasis:names:tc:opendocument:xmlns:xsl-fo-compatible:1.0"
+ xmlns:number="urn:oasis:names:tc:opendocument:xmlns:datastyle:1.0" office:version="1.2">
+<office:automatic-styles>
+ <number:date-style style:name="N1"><number:year number:style="long"/><number:text>-</number:text>
+  <number:month number:style="long"/><number:text>-</number:text><number:day number:style="long"/></number:date-style>
+ <style:style style:name="bold" style:family="table-cell"><style:text-properties fo:font-weight="bold"/></style:style>
+ <style:style style:name="date" style:family="table-cell" style:data-style-name="N1"/>
+</office:automatic-styles>
+<office:body><office:spreadsheet>
+'''
+
+CONTENT_END = '</office:spreadsheet></office:body></office:document-content>'
+
+
+def write_ods(path: Path, rows: int, columns: int):
+    start = date(2000, 1, 1)
+    with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr(zipfile.ZipInfo('mimetype'), 'application/vnd.oasis.opendocument.spreadsheet')
+        archive.writestr('META-INF/manifest.xml', MANIFEST)
+        with archive.open('content.xml', 'w', force_zip64=True) as content:
+            content.write(CONTENT_START.encode('utf-8'))
+            content.write(b'<table:table table:name="Data"><table:table-column table:number-columns-repeated="1024"/>')
+            content.write(f'<table:table-row><table:table-cell office:value-type="string" table:style-name="bold" '
+                          f'table:number-columns-spanned="{columns}"><text:p>Benchmark data</text:p>'
+                          f'</table:table-cell></table:table-row>'.encode('utf-8'))
+            header = ''.join(f'<table:table-cell office:value-type="string" table:style-name="bold"><text:p>'
+                             f'{escape(name)}</text:p></table:table-cell>'
+                             for name in ['Date', 'Area'] + [f'Measure {i}' for i in range(columns - 2)])
+            content.write(f'<table:table-row>{header}</table:table-row>'.encode('utf-8'))
+            for row in range(rows):
+                day = start + timedelta(days=row % 7000)
+                cells = [f'<table:table-cell office:value-type="date" office:date-value="{day.isoformat()}" '
+                         f'table:style-name="date"><text:p>{day.isoformat()}</text:p></table:table-cell>',
+                         f'<table:table-cell office:value-type="string"><text:p>E0{row % 400:07}</text:p>'
+                         f'</table:table-cell>']
+                cells.extend(f'<table:table-cell office:value-type="float" office:value="{row * column * 0.5}">'
+                             f'<text:p>{row * column * 0.5}</text:p></table:table-cell>'
+                             for column in range(columns - 2))
+                content.write(f'<table:table-row>{"".join(cells)}</table:table-row>'.encode('utf-8'))
+            # spreadsheet applications pad sheets out to their maximum size with empty rows
+            content.write(b'<table:table-row table:number-rows-repeated="1048000">'
+                          b'<table:table-cell table:number-columns-repeated="1024"/></table:table-row>')
+            content.write(b'</table:table>')
+            content.write(CONTENT_END.encode('utf-8'))
+
+
+def via_xls(path: Path):
+    # the old approach, converting the whole workbook to XLS in memory
+    with open(path, 'rb') as ods_obj:
+        excel_obj = BytesIO()
+        book = pyexcel.get_book(file_type='ods', file_content=ods_obj, library='pyexcel-ods3')
+        book.save_to_memory(file_type='xls', stream=excel_obj)
+        tableset = messytables.excel.XLSTableSet(fileobj=excel_obj)
+        return list(xypath.loader.get_sheets(tableset, "*"))
+
+
+def native(path: Path):
+    return list(xypath.loader.get_sheets(ODSTableSet(filename=path), "*"))
+
+
+def measure(load, path: Path):
+    # in a fresh process for each loader, so that peak memory use is the loader's own
+    start = time.perf_counter()
+    tabs = load(path)
+    elapsed = time.perf_counter() - start
+    cells = sum(1 for tab in tabs for cell in tab if cell.value != '')
+    return elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024, cells
+
+
+if __name__ == '__main__':
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    columns = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'benchmark.ods'
+        write_ods(path, rows, columns)
+        with zipfile.ZipFile(path) as archive:
+            content_size = archive.getinfo('content.xml').file_size
+        print(f'{rows} rows x {columns} columns: {path.stat().st_size / 1e6:.1f}MB ODS, '
+              f'{content_size / 1e6:.1f}MB content.xml')
+        loaders = [('ODSTableSet', native)]
+        if rows + 2 <= 65536 and columns <= 256:
+            loaders.insert(0, ('pyexcel via XLS', via_xls))
+        for name, load in loaders:
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                elapsed, peak, cells = executor.submit(measure, load, path).result()
+            print(f'{name:>16}: {elapsed:6.2f}s, peak RSS {peak / 1e6:7.1f}MB, {cells} non-empty cells')
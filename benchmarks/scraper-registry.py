@@ -0,0 +1,33 @@
+"""
+Compare finding a scraper for a URI by scanning gssutils.scrapers.scraper_list in order against the
+prefix trie in gssutils.scrapers.scraper_registry, as the number of registered scrapers grows.
+
+    python benchmarks/scraper-registry.py
+"""
+
+from timeit import timeit
+
+from gssutils.scrapers import scraper_list
+from gssutils.scrapers.registry import ScraperRegistry
+
+
+def linear_lookup(scrapers, uri):
+    for start_uri, scrape in scrapers:
+        if uri.startswith(start_uri):
+            return scrape
+
+
+def local_authority_scrapers(n):
+    # stand-ins for the local authority publishers we'd like to add
+    return [(f'https://www.council-{i}.gov.uk/statistics/datasets/', lambda scraper, tree: None) for i in range(n)]
+
+
+for extra in [0, 100, 200, 500, 1000]:
+    scrapers = scraper_list + local_authority_scrapers(extra)
+    registry = ScraperRegistry(scrapers)
+    # worst case for the linear scan: a page belonging to the last publisher added
+    uri = scrapers[-1][0].rstrip('/') + '/housing/some-dataset-landing-page'
+    assert linear_lookup(scrapers, uri) is registry.lookup(uri)
+    linear = timeit(lambda: linear_lookup(scrapers, uri), number=10000)
+    trie = timeit(lambda: registry.lookup(uri), number=10000)
+    print(f'{len(scrapers):5d} scrapers: scan {linear * 100:7.2f}us/lookup, trie {trie * 100:7.2f}us/lookup')
@@ -0,0 +1,102 @@
+"""
+Compare reading a large XLSX sheet with pandas.read_excel against streaming it a chunk at a time with
+gssutils.transform.xlsx.XLSXReader, as Downloadable.as_pandas(chunksize=...) does. The workbook is generated first,
+with shared strings, dates and numbers, as publishers' large spreadsheets are too big to keep in the repository.
+
+    python benchmarks/xlsx-chunks.py [rows] [chunksize]
+"""
+
+import resource
+import sys
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from gssutils.transform.xlsx import XLSXReader
+
+MAIN = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+AREAS = [f'E0{i:07}' for i in range(400)]
+
+FILES = {
+    '[Content_Types].xml': '''<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="xml" ContentType="application/xml"/>
+<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>
+<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>
+<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>
+<Override PartName="/xl/sharedStrings.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/>
+</Types>''',
+    '_rels/.rels': '''<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>
+</Relationships>''',
+    'xl/workbook.xml': f'''<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<workbook xmlns="{MAIN}" xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">
+<sheets><sheet name="Data" sheetId="1" r:id="rId1"/></sheets></workbook>''',
+    'xl/_rels/workbook.xml.rels': '''<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>
+<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>
+<Relationship Id="rId3" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/sharedStrings" Target="sharedStrings.xml"/>
+</Relationships>''',
+    'xl/styles.xml': f'''<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<styleSheet xmlns="{MAIN}"><fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>
+<fills count="1"><fill><patternFill patternType="none"/></fill></fills><borders count="1"><border/></borders>
+<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>
+<cellXfs count="2"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>
+<xf numFmtId="14" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/></cellXfs></styleSheet>''',
+    'xl/sharedStrings.xml': f'''<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<sst xmlns="{MAIN}" count="{len(AREAS) + 4}" uniqueCount="{len(AREAS) + 4}">
+{"".join(f"<si><t>{s}</t></si>" for s in ["Date", "Area", "Value", "Count"] + AREAS)}</sst>'''
+}
+
+
+def write_xlsx(path: Path, rows: int):
+    with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, content in FILES.items():
+            archive.writestr(name, content)
+        with archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write(f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?><worksheet xmlns="{MAIN}">'
+                        f'<dimension ref="A1:D{rows + 1}"/><sheetData>'
+                        f'<row r="1"><c r="A1" t="s"><v>0</v></c><c r="B1" t="s"><v>1</v></c>'
+                        f'<c r="C1" t="s"><v>2</v></c><c r="D1" t="s"><v>3</v></c></row>'.encode('utf-8'))
+            for row in range(2, rows + 2):
+                sheet.write(f'<row r="{row}"><c r="A{row}" s="1"><v>{36526 + row % 7000}</v></c>'
+                            f'<c r="B{row}" t="s"><v>{4 + row % len(AREAS)}</v></c>'
+                            f'<c r="C{row}"><v>{row * 0.25}</v></c><c r="D{row}"><v>{row}</v></c>'
+                            f'</row>'.encode('utf-8'))
+            sheet.write(b'</sheetData></worksheet>')
+
+
+def read_excel(path: Path, chunksize: int):
+    # the old approach, the whole sheet at once
+    return len(pd.read_excel(path))
+
+
+def chunks(path: Path, chunksize: int):
+    return sum(len(frame) for frame in XLSXReader(path).iter_frames(0, chunksize))
+
+
+def measure(read, path: Path, chunksize: int):
+    # in a fresh process for each reader, so that peak memory use is the reader's own
+    start = time.perf_counter()
+    rows = read(path, chunksize)
+    return time.perf_counter() - start, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024, rows
+
+
+if __name__ == '__main__':
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    chunksize = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'benchmark.xlsx'
+        write_xlsx(path, rows)
+        print(f'{rows} rows: {path.stat().st_size / 1e6:.1f}MB XLSX')
+        for name, read in [('pandas.read_excel', read_excel), (f'XLSXReader, {chunksize} rows at a time', chunks)]:
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                elapsed, peak, count = executor.submit(measure, read, path, chunksize).result()
+            print(f'{name:>35}: {elapsed:6.2f}s, peak RSS {peak / 1e6:7.1f}MB, {count} rows')
@@ -0,0 +1,39 @@
+Feature: HTTP cache
+  As a data engineer.
+  I want the responses scrapers fetch kept in one cache file,
+  so that pages and distributions aren't downloaded again on every run.
+
+  Scenario: Scrapers without a session share one cache connection
+    Given I'm working in an empty directory
+    When two default sessions are made
+    Then they should share one SQLite cache of ".cache.sqlite"
+
+  Scenario: Shared caches are closed at exit, and not used by forked processes
+    Given I'm working in an empty directory
+    When two default sessions are made
+    Then a forked process should open its own SQLite cache of ".cache.sqlite"
+    And closing the shared caches, as at exit, should close the SQLite cache of ".cache.sqlite"
+
+  Scenario: Warn that responses cached in the old .cache directory aren't used
+    Given I'm working in an empty directory
+    And there is a directory ".cache"
+    Then making a default session should warn that the responses cached in ".cache" will be fetched again
+
+  Scenario: Evict least recently used responses without adding up the cache each time
+    Given an empty SQLite cache of at most 2500 bytes
+    When responses "a", "b", "c" and "d" of 1000 bytes each are cached
+    Then only responses "c" and "d" should be left in the cache
+    And the size of the cache should only have been added up once
+
+  Scenario: Report a missing cache rather than making one
+    Given I'm working in an empty directory
+    When I run "gssutils cache stats"
+    Then it should say ".cache.sqlite: there is no cache here."
+    And there should still be no file ".cache.sqlite"
+
+  Scenario: Count how each request was answered, revalidating stale responses by their Last-Modified date
+    Given the CSV file "dcms-trade-in-services.csv" is served last modified 30 days ago through a default session
+    When I fetch it 2 times
+    And I fetch it again 2 days later
+    Then it should have been counted as 1 hits, 1 misses and 1 revalidated
+    And it should have been requested with GET, GET
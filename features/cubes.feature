@@ -40,6 +40,36 @@ Feature: Creating cubes
     Then the datacube outputs can be created
 
 
+  Scenario: Output multiple cube entities in parallel
+    Given I want to create datacubes from the seed "seed-temp-scrape-quarterly-balance-of-payments.json"
+    And I specify a datacube named "test cube 1" with data "quarterly-balance-of-payments.csv" and a scrape using the seed "seed-temp-scrape-quarterly-balance-of-payments.json"
+    And I specify a datacube named "test cube 2" with data "quarterly-balance-of-payments.csv" and a scrape using the seed "seed-temp-scrape-quarterly-balance-of-payments.json"
+    And I specify a datacube named "test cube 3" streamed in chunks of 7 rows from data "quarterly-balance-of-payments.csv" and a scrape using the seed "seed-temp-scrape-quarterly-balance-of-payments.json"
+    Then the datacube outputs can be created in parallel
+    And the file at "out/test-cube-2.csv" should be identical to the file at "out/test-cube-1.csv"
+    And the file at "out/test-cube-3.csv" should be identical to the file at "out/test-cube-1.csv"
+    And the file at "out/test-cube-3.csv-metadata.json" should exist
+
+
+  Scenario: Output a cube streamed from chunks of observations
+    Given I want to create datacubes from the seed "seed-temp-scrape-quarterly-balance-of-payments.json"
+    And I specify a datacube named "test cube 1" with data "quarterly-balance-of-payments.csv" and a scrape using the seed "seed-temp-scrape-quarterly-balance-of-payments.json"
+    And I specify a datacube named "test cube 2" streamed in chunks of 7 rows from data "quarterly-balance-of-payments.csv" and a scrape using the seed "seed-temp-scrape-quarterly-balance-of-payments.json"
+    Then the datacube outputs can be created
+    And the file at "out/test-cube-2.csv" should be identical to the file at "out/test-cube-1.csv"
+    And the file at "out/test-cube-2.csv-metadata.json" should exist
+
+
+  Scenario: Output a cube as a compressed CSV
+    Given I want to create datacubes from the seed "seed-temp-scrape-quarterly-balance-of-payments.json"
+    And I specify a datacube named "test cube 1" with data "quarterly-balance-of-payments.csv" and a scrape using the seed "seed-temp-scrape-quarterly-balance-of-payments.json"
+    And I specify a compressed datacube named "test cube 3" streamed in chunks of 7 rows from data "quarterly-balance-of-payments.csv" and a scrape using the seed "seed-temp-scrape-quarterly-balance-of-payments.json"
+    Then the datacube outputs can be created
+    And the file at "out/test-cube-3.csv.gz" should decompress to the file at "out/test-cube-1.csv"
+    And the CSVW metadata at "out/test-cube-1.csv-metadata.json" should describe the table at "test-cube-1.csv"
+    And the CSVW metadata at "out/test-cube-3.csv.gz-metadata.json" should describe the table at "test-cube-3.csv.gz"
+
+
   Scenario: ignore JOB_NAME
     Given the 'JOB_NAME' environment variable is 'GSS_data/beta.gss-data.org.uk/family/trade/DCMS-Sectors-Economic-Estimates-Year-Trade-in-services'
     And I want to create datacubes from the seed "seed-dcms-trade-in-services-info.json"
@@ -77,3 +107,12 @@ Feature: Creating cubes
     And I specify a datacube named "trig file output test cube 2" with data "quarterly-balance-of-payments.csv" and a scrape using the seed "seed-temp-scrape-quarterly-balance-of-payments.json"
     Then the datacube outputs can be created
     And the file at "out/trig-file-output-test-cube-2.csv-metadata.trig" should not exist
+
+
+  Scenario: Output an accretive upload cube
+    Given I want to create datacubes from the seed "seed-temp-scrape-quarterly-balance-of-payments.json"
+    And I specify an accretive upload datacube named "test cube 1" with data "quarterly-balance-of-payments.csv" and a scrape using the seed "seed-temp-scrape-quarterly-balance-of-payments.json"
+    Then the datacube outputs can be created
+    And the file at "out/test-cube-1.csv" should exist
+    And the file at "out/test-cube-1.csv-metadata.json" should exist
+    And the file at "out/test-cube-1.csv-metadata.trig" should not exist
@@ -25,6 +25,21 @@ Feature: distribution downloading
     And fetch the 'SYOA Females (2001-)' tab as a pandas DataFrame
     Then the dataframe should have 73 rows
 
+  Scenario: select a distribution again after its metadata changes
+    Given I scrape the page "https://www.nrscotland.gov.uk/statistics-and-data/statistics/statistics-by-theme/migration/migration-statistics/migration-flows/migration-between-scotland-and-overseas"
+    And select the distribution given by
+      | key       | value                                                      |
+      | mediaType | application/vnd.ms-excel                                   |
+      | title     | Migration between Scotland and overseas by age             |
+    When the distribution is retitled "Migration by age"
+    Then selecting the distribution titled "Migration by age" finds the same one
+
+  Scenario: distributions can be pickled
+    Given I scrape the page "https://www.nrscotland.gov.uk/statistics-and-data/statistics/statistics-by-theme/migration/migration-statistics/migration-flows/migration-between-scotland-and-overseas"
+    When the distributions are pickled and unpickled
+    Then the unpickled distributions should match the originals
+    And the distributions should only keep their metadata in their instance dictionaries
+
   Scenario: databaker from ODS
     Given I scrape the page "https://www.gov.uk/government/statistics/national-insurance-number-allocations-to-adult-overseas-nationals-to-march-2018"
     And select the distribution given by
@@ -34,6 +49,34 @@ Feature: distribution downloading
     And fetch the distribution as a databaker object
     Then the sheet names contain [CONTENTS, 1, 2, 3, 4]
 
+  Scenario: databaker from ODS keeps bold and merged cells
+    Given the ODS file "ras51001.ods" is loaded as databaker tabs
+    Then the sheet names contain [RAS51001]
+    And cell 'A1' in the 'RAS51001' tab is bold
+    And cell 'B6' in the 'RAS51001' tab is merged across 'B6:E6'
+    And cell 'L8' in the 'RAS51001' tab has the value '31430.0'
+
+  Scenario: XLSX sheet as pandas DataFrames in chunks
+    Given the '6.1.1 Trends of Age' sheet of the XLSX file "young-people-substance-misuse.xlsx" is read in chunks of 5 rows
+    Then there should be 3 chunks with 13 rows in total
+    And the chunks together should match reading the whole sheet
+
+  Scenario Outline: every XLSX sheet in small chunks
+    Then every sheet of the XLSX file "young-people-substance-misuse.xlsx" read in chunks of <chunksize> rows should match reading it whole
+
+    Examples:
+      | chunksize |
+      | 1         |
+      | 2         |
+      | 5         |
+
+  Scenario: databaker tabs are only read when used
+    Given the ODS file "nino-registrations.ods" is loaded as databaker tabs
+    Then no tabs have been read
+    And cell 'D4' in the '2' tab has the value 'European Union'
+    And only the '2' tab has been read
+    And the sheet names contain [CONTENTS, 1, 2, 3, 4]
+
   Scenario: Select distribution by start of title
     Given I scrape the page "https://www.nisra.gov.uk/publications/2017-mid-year-population-estimates-northern-ireland-new-format-tables"
     Then select the distribution whose title starts with "Northern Ireland - Migration flows by type"
@@ -94,4 +137,50 @@ Feature: distribution downloading
       | key       | value    |
       | mediaType | text/csv |
     And fetch the distribution as a pandas dataframe with encoding "Windows-1252"
-    Then the dataframe should have 75648 rows
\ No newline at end of file
+    Then the dataframe should have 75648 rows
+  Scenario: select distributions by their metadata
+    Given a scraper with the distributions
+      | title       | mediaType       | issued                                 |
+      | Tables 2019 | text/csv        | date 2019-06-01                        |
+      | Tables 2021 | text/csv        | string 2021-06-01T09:30:00.000Z        |
+      | Tables 2020 | text/csv        | datetime 2020-06-01T09:30:00+01:00     |
+      | Notes       | application/pdf | string not a date                      |
+      | Summary     | application/pdf |                                        |
+    Then the distributions with media type "text/csv" are "Tables 2019, Tables 2021, Tables 2020"
+    And the latest distribution with media type "text/csv" is "Tables 2021"
+    And the latest distribution with media type "application/pdf" is "Notes"
+    And selecting one distribution with media type "text/csv" fails
+    And selecting one distribution with media type "text/html" fails
+
+  Scenario: changing another scraper's distributions doesn't rebuild the index
+    Given a scraper with the distributions
+      | title       | mediaType       | issued          |
+      | Tables 2019 | text/csv        | date 2019-06-01 |
+      | Notes       | application/pdf |                 |
+    When the distributions with media type "text/csv" are selected
+    And a distribution made for another scraper is retitled "Other tables"
+    Then the scraper's distribution index should not have been rebuilt
+    When the distribution "Tables 2019" is retitled "Tables"
+    Then the distributions with media type "text/csv" are "Tables"
+
+  Scenario: a distribution added after the index is built is found
+    Given a scraper with the distributions
+      | title       | mediaType       | issued          |
+      | Tables 2019 | text/csv        | date 2019-06-01 |
+      | Notes       | application/pdf |                 |
+    When the distributions with media type "text/csv" are selected
+    And a distribution "Tables 2022" with media type "text/csv" is added
+    Then the distributions with media type "text/csv" are "Tables 2019, Tables 2022"
+
+  Scenario: select distributions issued between two dates
+    Given a scraper with the distributions
+      | title       | mediaType       | issued                                 |
+      | Tables 2019 | text/csv        | date 2019-06-01                        |
+      | Tables 2021 | text/csv        | string 2021-06-01T09:30:00.000Z        |
+      | Tables 2020 | text/csv        | datetime 2020-06-01T09:30:00+01:00     |
+      | Notes       | application/pdf | string not a date                      |
+      | Summary     | application/pdf |                                        |
+    Then the distributions issued between any time and any time are "Tables 2019, Tables 2020, Tables 2021"
+    And the distributions issued between date 2019-06-01 and string 2021-06-01 are "Tables 2019, Tables 2020"
+    And the distributions issued between datetime 2020-06-01T08:30:00 and any time are "Tables 2020, Tables 2021"
+    And the distributions issued between datetime 2020-06-01T09:00:00+00:00 and date 2022-01-01 are "Tables 2021"
@@ -2,8 +2,91 @@ Feature: Download Source data
     In an automated pipeline
     I want to download data from a scraped landing page
     
-        # TODO - create a backlog item
-        # Scenario: Download a standard csv as a pandas
+        Scenario Outline: Download a <compression> CSV as pandas DataFrames in chunks
+            Given the CSV file "dcms-trade-in-services.csv" is downloaded <compression>
+            When I fetch the distribution as pandas DataFrames in chunks of 1000 rows
+            Then there should be 5 chunks with 4132 rows in total
+            And the chunks together should match the CSV file
+            And the distribution as an Arrow table should have 4132 rows
+
+            Examples:
+                | compression  |
+                | uncompressed |
+                | gzipped      |
+                | zipped       |
+
+        Scenario: Read ONS time series in CSDB format as a long pandas DataFrame
+            When I read the CSDB file "ons-time-series.csdb"
+            Then the row count is "26"
+            And observation 0 should be BOKI, 2016 and -135452
+            And observation 5 should be IKBH, 2019 Q1 and 155006
+            And observation 11 should be L87S, 2020 JAN and 13020
+            And observation 18 should be L87S, 2020 AUG and missing
+            And observation 23 should be NNRP, 2020 Q1 and -123456789
+            And observation 24 should be NNRP, 2020 Q2 and -987654321
+            And observation 25 should be NNRP, 2020 Q3 and -112233
+
+        Scenario: Stream ONS time series in CSDB format in chunks of whole series
+            When I read the CSDB file "ons-time-series.csdb" in chunks of 5 rows
+            Then there should be 3 chunks with 26 rows in total
+
+        Scenario: CSDB distributions aren't loaded into pandas until the parser is checked against a real extract
+            Given the CSDB file "ons-time-series.csdb" is downloaded uncompressed
+            Then fetching the distribution as a pandas DataFrame should fail with a FormatError
+
+        Scenario: Download the files in a zip archive as pandas DataFrames
+            Given a zip archive of the files "dcms-trade-in-services.csv", "ras51001.ods" is downloaded
+            When I fetch every file that can be loaded as pandas DataFrames
+            Then the files loaded should be "dcms-trade-in-services.csv", "ras51001.ods"
+            And the file "dcms-trade-in-services.csv" should have 4132 rows
+            When I fetch the files matching "*.csv" as pandas DataFrames
+            Then the dataframe of the one file should have 4132 rows
+            When the files are finished with
+            Then every temporary file the archive was spooled to should have been closed
+
+        Scenario: Stream the CSV files in a zip archive in chunks
+            Given a zip archive of the files "dcms-trade-in-services.csv", "ras51001.ods" is downloaded
+            When I fetch the files matching "data/dcms-*" as pandas DataFrames in chunks of 1000 rows
+            Then there should be 5 chunks with 4132 rows in total
+            And every temporary file the archive was spooled to should have been closed
+
+        Scenario: Download a spreadsheet in a zip archive as databaker
+            Given a zip archive of the files "dcms-trade-in-services.csv", "ras51001.ods" is downloaded
+            When I fetch the files matching "ras51001.ods" as databaker tabs
+            Then the databaker tabs should be [RAS51001]
+            And every temporary file the archive was spooled to should have been closed
+
+        Scenario: Keep a sheet with a two row header in the frame cache
+            Given the XLSX file "two-row-header.xlsx" is served with the ETag "W/\"5f3a\""
+            And the distribution is kept in an empty frame cache
+            When I fetch the 'Data' sheet with a two row header as a pandas DataFrame
+            Then fetching it again should come from the frame cache
+            And it should have been requested with HEAD, GET, HEAD
+
+        Scenario Outline: Keep the sheet names of a <kind> workbook in the frame cache
+            Given the <kind> file "<filename>" is served with the ETag "W/\"5f3a\""
+            And the distribution is kept in an empty frame cache
+            When I fetch every sheet as pandas DataFrames and use the sheet '<sheet>'
+            Then fetching every sheet again and using the sheet '<sheet>' should come from the frame cache
+            And it should have been requested with HEAD, GET, HEAD
+
+            Examples:
+                | kind | filename                           | sheet           |
+                | ODS  | nino-registrations.ods             | 2               |
+                | XLSX | young-people-substance-misuse.xlsx | 3.2.1 Ethnicity |
+
+        Scenario: Check the frame cache against a fresh cached response without asking the server
+            Given the CSV file "dcms-trade-in-services.csv" is served last modified 30 days ago through a caching session
+            And the distribution is kept in an empty frame cache
+            When I fetch the distribution as a pandas DataFrame twice
+            Then it should have been requested with HEAD, GET
+
+        Scenario: Don't keep a distribution in the frame cache without an ETag or Last-Modified date
+            Given the CSV file "dcms-trade-in-services.csv" is downloaded uncompressed
+            And the distribution is kept in an empty frame cache
+            When I fetch the distribution as a pandas DataFrame twice
+            Then it should have been requested with HEAD, GET, HEAD, GET
+            And nothing should have been kept in the frame cache
 
         # TODO - create a backlog item
         # Scenario: Download an xls file as databaker
@@ -52,6 +135,20 @@ Feature: Download Source data
             http://reference.data.gov.uk/id/gregorian-interval/2020-04-13T00:00:00/P1D
             """
 
+        Scenario: ApiScraper - Identify the chunks missing from PMD4
+            Given PMD chunks of
+            """
+            http://reference.data.gov.uk/id/month/2019-01, http://reference.data.gov.uk/id/month/2019-04
+            """
+            And odata API chunks of
+            """
+            201901, 201904, 201907, 201910
+            """
+            Then the chunks missing from PMD are
+            """
+            201907, 201910
+            """
+
         Scenario: ApiScraper - Establish existing dataset chunks on the API
             Given I scrape datasets using info.json "seed-for-api-scraper.json"
             And I select the latest distribution as the distro
@@ -0,0 +1,31 @@
+Feature: Distribution fingerprints
+  As a data engineer.
+  I want to know whether a dataset has changed since it was last transformed,
+  so that unchanged datasets aren't downloaded and transformed again.
+
+  Scenario: Record the fingerprint of a dataset's latest distribution
+    Given I scrape the page "https://www.gov.scot/publications/scottish-index-of-multiple-deprivation-2020v2-ranks/"
+    And I keep distribution fingerprints in an empty store
+    Then the dataset should have changed since the last run
+    When I record the fingerprint of the dataset
+    Then the dataset should not have changed since the last run
+    And the store should still know the fingerprint when reopened
+
+  Scenario: A new download URL is a change
+    Given I scrape the page "https://www.gov.scot/publications/scottish-index-of-multiple-deprivation-2020v2-ranks/"
+    And I keep distribution fingerprints in an empty store
+    When I record the fingerprint of the dataset
+    And the latest distribution is given the download URL "https://www.gov.scot/binaries/content/documents/new.xlsx"
+    Then the dataset should have changed since the last run
+
+  Scenario: Pipelines sharing a store keep each other's fingerprints
+    Given I scrape the page "https://www.gov.scot/publications/scottish-index-of-multiple-deprivation-2020v2-ranks/"
+    And I keep distribution fingerprints in an empty store
+    When two pipelines sharing the store record the dataset as "simd-ranks" and "simd-ranks-copy"
+    Then the store should know the fingerprints of "simd-ranks" and "simd-ranks-copy" when reopened
+
+  Scenario: A pipeline sees fingerprints recorded by another since it opened the store
+    Given I scrape the page "https://www.gov.scot/publications/scottish-index-of-multiple-deprivation-2020v2-ranks/"
+    And I keep distribution fingerprints in an empty store
+    When another pipeline sharing the store records the fingerprint of the dataset
+    Then the dataset should not have changed since the last run
@@ -46,6 +46,20 @@ Feature: PMD metadata
       }
       """
 
+  Scenario: stream metadata without building a graph
+    Given I scrape the page "https://www.ons.gov.uk/businessindustryandtrade/business/businessinnovation/datasets/foreigndirectinvestmentinvolvingukcompanies2013inwardtables"
+    And set the base URI to <http://gss-data.org.uk>
+    And set the dataset ID to <foreign-direct-investment-inward>
+    And set the theme to <business-industry-trade-energy>
+    And set the family to 'trade'
+    And set the license to 'OGLv3'
+    And set the modified time to '2018-09-14T10:04:33.141484+01:00'
+    And generate TriG
+    When stream the metadata as TriG
+    Then the streamed metadata should match the generated TriG
+    When stream the metadata as N-Quads
+    Then the streamed metadata should match the generated TriG
+
     Scenario: convention over configuration
       Given the 'JOB_NAME' environment variable is 'GSS_data/Trade/ONS-FDI-inward'
       And I scrape the page "https://www.ons.gov.uk/businessindustryandtrade/business/businessinnovation/datasets/foreigndirectinvestmentinvolvingukcompanies2013inwardtables"
@@ -37,6 +37,17 @@ Feature: Scrape dataset info
     And the data download URL should match "https://www.nrscotland.gov.uk/files//statistics/.*\.xlsx"
     And dct:publisher should be `gov:national-records-of-scotland`
 
+  Scenario: Scrape many nrscotland pages in one batch
+    Given I scrape the pages in one batch
+      | uri                                                                                                                                                                     |
+      | https://www.nrscotland.gov.uk/statistics-and-data/statistics/statistics-by-theme/migration/migration-statistics/migration-flows/migration-between-scotland-and-overseas |
+      | https://www.nrscotland.gov.uk/covid19stats                                                                                                                              |
+    Then every scrape in the batch should succeed
+    And the batch titles should be
+      | title                                               |
+      | Migration between Scotland and Overseas             |
+      | Deaths involving coronavirus (COVID-19) in Scotland |
+
   Scenario: nrscotland downloads
     Given I scrape the page "https://www.nrscotland.gov.uk/statistics-and-data/statistics/statistics-by-theme/migration/migration-statistics/migration-flows/migration-between-scotland-and-overseas"
     And select the distribution given by
@@ -211,6 +222,17 @@ Feature: Scrape dataset info
       | latest    | true                            |
     Then the data can be downloaded from "https://www.ons.gov.uk/file?uri=/economy/nationalaccounts/balanceofpayments/datasets/tradeingoodsmretsallbopeu2013timeseriesspreadsheet/current/mret.csdb"
 
+  Scenario Outline: Scrape the versions of an ONS dataset several at a time with <transport>
+    Given I scrape the page "https://www.ons.gov.uk/economy/nationalaccounts/balanceofpayments/datasets/tradeingoodsmretsallbopeu2013timeseriesspreadsheet" with <transport>, fetching 4 pages at a time from the cassette
+    Then the title should be "UK trade time series"
+    And 4 pages should have been fetched at once
+    And the distributions should be those scraped fetching one page at a time
+
+    Examples:
+      | transport         |
+      | a Transport       |
+      | an AsyncTransport |
+
   Scenario: NHS Digital collection select latest
     Given I scrape the page "https://digital.nhs.uk/data-and-information/publications/statistical/adult-social-care-outcomes-framework-ascof"
     And the catalog has more than one dataset
@@ -311,4 +333,59 @@ Feature: Scrape dataset info
     Given I scrape the page "https://www.gov.uk/guidance/pay-no-import-duty-and-vat-on-medical-supplies-equipment-and-protective-garments-covid-19"
     And select the distribution whose title starts with "COVID-19"
     Then the data can be downloaded from "https://assets.publishing.service.gov.uk/government/uploads/system/uploads/attachment_data/file/937658/OFF-SEN-Disaster-Relief-List-20201116_vaccine.csv"
-    And dct:publisher should be `gov:hm-revenue-customs`
\ No newline at end of file
+    And dct:publisher should be `gov:hm-revenue-customs`
+
+  Scenario: Scrape many pages in one batch with several workers, one of them failing
+    Given I scrape 6 gov.uk publications and "https://example.org/nothing-to-scrape" in one batch with 4 workers
+    Then the batch should have scraped publications 0, 1, 2, 3, 4, 5 with "https://example.org/nothing-to-scrape" failing
+    And 4 pages should have been fetched at once
+
+  Scenario: gov.uk collection documents are fetched together, keeping their order
+    Given I scrape a gov.uk collection of 6 documents, fetching 3 at a time
+    Then the catalog should list the datasets of documents 3, 4, 5, 0, 1, 2, 3
+    And each document should have been fetched once, 3 at a time
+
+  Scenario Outline: <transport> fetches a batch of pages at the same time, keeping their order
+    Given <transport> fetching 3 pages at a time
+    When it fetches 8 pages <how>
+    Then the responses should be pages 0 to 7 in order
+    And 3 pages should have been fetched at once
+
+    Examples:
+      | transport         | how            |
+      | a Transport       | together       |
+      | an AsyncTransport | together       |
+      | an AsyncTransport | asynchronously |
+
+  Scenario Outline: Find the scraper for a landing page by its longest registered prefix
+    Then the scraper registered for "<uri>" should be <scraper>
+
+    Examples:
+      | uri                                                               | scraper                  |
+      | https://www.gov.uk/government/statistics/some-statistics          | govuk.content_api        |
+      | https://www.gov.scot/publications/some-statistics/                | govscot.scrape           |
+      | https://www.nrscotland.gov.uk/covid19stats                        | nrscotland.covid_handler |
+      | https://www.nrscotland.gov.uk/covid19stats-weekly                 | nrscotland.covid_handler |
+      | https://www.communities-ni.gov.uk/publications/topics/statistics  | dcni.scrape              |
+      | https://www.communities-ni.gov.uk/publications                    | none                     |
+      | https://example.org/statistics                                    | none                     |
+
+  Scenario Outline: Only prefixes the landing page starts with match
+    Given a scraper registry with the prefixes
+      | prefix                           | scraper |
+      | https://h.example/stat           | A       |
+      | https://h.example/statistics/foo | B       |
+      | https://h.example/a/             | C       |
+      | https://h.example/q?x=1          | D       |
+    Then the registry should give <scraper> for "<uri>"
+
+    Examples:
+      | uri                                   | scraper |
+      | https://h.example/statistics/bar      | A       |
+      | https://h.example/statistics/foo/baz  | B       |
+      | https://h.example/stats               | A       |
+      | https://h.example/a/b                 | C       |
+      | https://h.example/a                   | none    |
+      | https://h.example/q?x=1&y=2           | D       |
+      | https://h.example/q?x=2               | none    |
+      | https://h.example/q                   | none    |
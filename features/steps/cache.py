@@ -0,0 +1,115 @@
+import os
+import sqlite3
+import sys
+import tempfile
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from behave import *
+from nose.tools import *
+
+from gssutils.cache import SQLiteCache
+from gssutils.main import main
+from gssutils.scrape import default_session
+
+
+@given("I'm working in an empty directory")
+def step_impl(context):
+    context.work_dir = tempfile.TemporaryDirectory()
+    cwd = os.getcwd()
+    os.chdir(context.work_dir.name)
+    context.add_cleanup(os.chdir, cwd)
+
+
+@when('two default sessions are made')
+def step_impl(context):
+    context.sessions = [default_session(), default_session()]
+
+
+@then('they should share one SQLite cache of "{filename}"')
+def step_impl(context, filename):
+    first, second = [session.get_adapter('https://').controller.cache for session in context.sessions]
+    ok_(isinstance(first, SQLiteCache))
+    assert_is(first, second)
+    eq_(first.path, os.path.abspath(filename))
+
+
+@then('a forked process should open its own SQLite cache of "{filename}"')
+def step_impl(context, filename):
+    parent = SQLiteCache.shared(filename)
+    read, write = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        child = SQLiteCache.shared(filename)
+        os.write(write, b'own' if child is not parent else b'shared')
+        os._exit(0)
+    os.close(write)
+    os.waitpid(pid, 0)
+    with os.fdopen(read, 'rb') as answer:
+        eq_(answer.read(), b'own')
+
+
+@then('closing the shared caches, as at exit, should close the SQLite cache of "{filename}"')
+def step_impl(context, filename):
+    shared = SQLiteCache.shared(filename)
+    SQLiteCache.close_shared()
+    assert_raises(sqlite3.ProgrammingError, shared._connection.execute, 'SELECT 1')
+    assert_is_not(SQLiteCache.shared(filename), shared)
+    SQLiteCache.close_shared()
+
+
+@given('there is a directory "{dirname}"')
+def step_impl(context, dirname):
+    Path(dirname).mkdir()
+
+
+@then('making a default session should warn that the responses cached in "{dirname}" will be fetched again')
+def step_impl(context, dirname):
+    with assert_logs(level='WARNING') as logs:
+        default_session()
+    ok_(any(f'cached in {dirname} will be fetched again' in message for message in logs.output))
+
+
+@given('an empty SQLite cache of at most {max_size:d} bytes')
+def step_impl(context, max_size):
+    context.cache_dir = tempfile.TemporaryDirectory()
+    context.cache = SQLiteCache(Path(context.cache_dir.name) / 'cache.sqlite', max_size=max_size)
+    context.add_cleanup(context.cache.close)
+    context.statements = []
+    context.cache._connection.set_trace_callback(context.statements.append)
+
+
+@when('responses {keys} of {size:d} bytes each are cached')
+def step_impl(context, keys, size):
+    for key in keys.replace(' and ', ', ').split(', '):
+        context.cache.set(key.strip('"'), b'x' * size)
+
+
+@then('only responses "{first}" and "{second}" should be left in the cache')
+def step_impl(context, first, second):
+    eq_([key for key in 'abcd' if context.cache.get(key) is not None], [first, second])
+
+
+@then('the size of the cache should only have been added up once')
+def step_impl(context):
+    eq_(len([statement for statement in context.statements if 'SUM(size)' in statement]), 1)
+
+
+@when('I run "gssutils {arguments}"')
+def step_impl(context, arguments):
+    output = StringIO()
+    with mock.patch.object(sys, 'argv', ['gssutils'] + arguments.split()), redirect_stdout(output):
+        main()
+    context.output = output.getvalue()
+
+
+@then('it should say "{message}"')
+def step_impl(context, message):
+    eq_(context.output.strip(), message)
+
+
+@then('there should still be no file "{filename}"')
+def step_impl(context, filename):
+    ok_(not Path(filename).exists())
@@ -1,3 +1,4 @@
+import gzip
 import json
 
 from behave import *
@@ -32,6 +33,44 @@ def step_impl(context, cube_name, csv_data, seed_name):
     context.cubes.add_cube(scraper, df, cube_name, suppress_catalog_and_dsd_output=suppress_catalog_dsd_output)
 
 
+@step('I specify a datacube named "{cube_name}" streamed in chunks of {chunk_size:d} rows from data "{csv_data}" '
+      'and a scrape using the seed "{seed_name}"')
+def step_impl(context, cube_name, csv_data, chunk_size, seed_name):
+    scraper = Scraper(seed=get_fixture(seed_name))
+    chunks = pd.read_csv(get_fixture(csv_data), chunksize=chunk_size)
+    context.cubes.add_cube(scraper, chunks, cube_name)
+
+
+@step('I specify an accretive upload datacube named "{cube_name}" with data "{csv_data}" '
+      'and a scrape using the seed "{seed_name}"')
+def step_impl(context, cube_name, csv_data, seed_name):
+    scraper = Scraper(seed=get_fixture(seed_name))
+    df = pd.read_csv(get_fixture(csv_data))
+    context.cubes.add_cube(scraper, df, cube_name, accretive_upload=True)
+
+
+@step('I specify a compressed datacube named "{cube_name}" streamed in chunks of {chunk_size:d} rows from data '
+      '"{csv_data}" and a scrape using the seed "{seed_name}"')
+def step_impl(context, cube_name, csv_data, chunk_size, seed_name):
+    scraper = Scraper(seed=get_fixture(seed_name))
+    chunks = pd.read_csv(get_fixture(csv_data), chunksize=chunk_size)
+    context.cubes.add_cube(scraper, chunks, cube_name, compress_csv=True)
+
+
+@step('the file at "{file}" should decompress to the file at "{other_file}"')
+def step_impl(context, file, other_file):
+    with gzip.open(file, 'rb') as f, open(other_file, 'rb') as other:
+        assert f.read() == other.read(), f'"{file}" doesn\'t decompress to "{other_file}".'
+
+
+@step('the CSVW metadata at "{file}" should describe the table at "{url}"')
+def step_impl(context, file, url):
+    with open(file, encoding='utf-8') as f:
+        tables = json.load(f)['tables']
+    assert_equal(tables[-1]['url'], url)
+    assert_true((Path(file).parent / url).exists())
+
+
 @step('I add a cube "{cube_name}" with data "{csv_data}" and a scrape seed "{seed_name}" with override containing graph "{override_containing_graph}"')
 def step_impl(context, cube_name, csv_data, seed_name, override_containing_graph):
     scraper = Scraper(seed=get_fixture(seed_name))
@@ -46,6 +85,17 @@ def step_impl(context):
     context.cubes.output_all()
 
 
+@step('the datacube outputs can be created in parallel')
+def step_impl(context):
+    context.cubes.output_all(parallel=True, max_workers=2)
+
+
+@step('the file at "{file}" should be identical to the file at "{other_file}"')
+def step_impl(context, file, other_file):
+    with open(file, 'rb') as f, open(other_file, 'rb') as other:
+        assert f.read() == other.read(), f'"{file}" differs from "{other_file}".'
+
+
 @step('generate RDF from the n={n} cube\'s CSV-W output')
 def step_impl(context, n):
     n = int(n)
@@ -1,8 +1,30 @@
+import gc
+import gzip
+import tempfile
+import time
+import zipfile
+from email.utils import formatdate
+from io import BytesIO
+from unittest import mock
+
 import numpy as np
+import pandas as pd
+import requests
 import vcr
 from behave import *
+from cachecontrol.adapter import CacheControlAdapter
+from cachecontrol.cache import DictCache
+from cachecontrol.heuristics import LastModified
+from nose.tools import *
+from urllib3 import HTTPResponse
 
 from gssutils import *
+from gssutils.cache import BiggerSerializer, CacheCounts, RecordingAdapter, RevalidatingController, SQLiteCache
+from gssutils.metadata import mimetype
+from gssutils.metadata.mimetype import ZIP
+from gssutils.transform.csdb import iter_csdb, read_csdb
+from gssutils.transform.download import Downloadable, FormatError, missing_chunks
+from gssutils.transform.frame_cache import FrameCache
 
 DEFAULT_RECORD_MODE = 'new_episodes'
 
@@ -14,6 +36,307 @@ def get_fixture(file_name: str) -> Path:
     return fixture_file_path
 
 
+class Body(BytesIO):
+    """A response body that closes once it's all been read, as http.client's do, which is when CacheControl caches"""
+
+    def read(self, *args):
+        data = super().read(*args)
+        if len(data) == 0:
+            self.close()
+        return data
+
+
+class FixtureAdapter(requests.adapters.HTTPAdapter):
+    """Serves the same body and headers for every request, as a streamed response, noting each request's method.
+    Requests made If-Modified-Since the Last-Modified date served are answered 304 Not Modified."""
+
+    def __init__(self, body: bytes, headers: dict = None):
+        super().__init__()
+        self.body = body
+        self.headers = headers or {}
+        self.methods = []
+
+    def send(self, request, **kwargs):
+        self.methods.append(request.method)
+        if 'Last-Modified' in self.headers and \
+                request.headers.get('If-Modified-Since') == self.headers['Last-Modified']:
+            return self.build_response(request, HTTPResponse(body=Body(b''), headers=self.headers, status=304,
+                                                             preload_content=False))
+        body = b'' if request.method == 'HEAD' else self.body
+        return self.build_response(request, HTTPResponse(body=Body(body), headers=self.headers, status=200,
+                                                         preload_content=False))
+
+
+def compress(content: bytes, compression: str, name: str) -> bytes:
+    if compression == 'gzipped':
+        return gzip.compress(content)
+    if compression == 'zipped':
+        archive = BytesIO()
+        with zipfile.ZipFile(archive, 'w', compression=zipfile.ZIP_DEFLATED) as zipped:
+            zipped.writestr('README.txt', 'The data is in the CSV file.')
+            zipped.writestr(name, content)
+        return archive.getvalue()
+    return content
+
+
+def quoted_list(text: str) -> list:
+    return [item.strip().strip('"') for item in text.split(',')]
+
+
+def _fixture_distribution(context, filename: str, media_type: str, adapter: requests.adapters.HTTPAdapter):
+    """Helper to make the distribution downloaded from http://example.org/{filename} through the given adapter"""
+    session = requests.Session()
+    session.mount('http://', adapter)
+    context.distro = Downloadable()
+    context.distro._session = session
+    context.distro.uri = f'http://example.org/{filename}'
+    context.distro._mediaType = media_type
+
+
+@given('the {kind} file "{filename}" is downloaded {compression}')
+def step_impl(context, kind, filename, compression):
+    context.csv = get_fixture(filename)
+    context.adapter = FixtureAdapter(compress(context.csv.read_bytes(), compression, filename))
+    _fixture_distribution(context, filename, mimetype.from_filename(filename), context.adapter)
+
+
+@given('the {kind} file "{filename}" is served with the ETag "{etag}"')
+def step_impl(context, kind, filename, etag):
+    context.adapter = FixtureAdapter(get_fixture(filename).read_bytes(), {'ETag': etag})
+    _fixture_distribution(context, filename, mimetype.from_filename(filename), context.adapter)
+
+
+class CachingFixtureAdapter(CacheControlAdapter, FixtureAdapter):
+    """A FixtureAdapter whose responses are cached in memory, as they would be by default_session()"""
+
+
+@given('the {kind} file "{filename}" is served last modified {days:d} days ago through a caching session')
+def step_impl(context, kind, filename, days):
+    now = time.time()
+    context.adapter = CachingFixtureAdapter(cache=DictCache(), heuristic=LastModified(),
+                                            body=get_fixture(filename).read_bytes(),
+                                            headers={'Date': formatdate(now, usegmt=True),
+                                                     'Last-Modified': formatdate(now - days * 86400, usegmt=True)})
+    _fixture_distribution(context, filename, mimetype.from_filename(filename), context.adapter)
+
+
+class CountingFixtureAdapter(RecordingAdapter, FixtureAdapter):
+    """A FixtureAdapter with the cache, revalidation and counting of default_session()"""
+
+
+@given('the {kind} file "{filename}" is served last modified {days:d} days ago through a default session')
+def step_impl(context, kind, filename, days):
+    now = time.time()
+    context.cache_dir = tempfile.TemporaryDirectory()
+    cache = SQLiteCache(Path(context.cache_dir.name) / 'cache.sqlite')
+    context.add_cleanup(cache.close)
+    context.adapter = CountingFixtureAdapter(cache=cache, heuristic=LastModified(),
+                                             controller_class=RevalidatingController,
+                                             serializer=BiggerSerializer(Path(context.cache_dir.name) / 'bodies'),
+                                             body=get_fixture(filename).read_bytes(),
+                                             headers={'Date': formatdate(now, usegmt=True),
+                                                      'Last-Modified': formatdate(now - days * 86400, usegmt=True)})
+    context.session = requests.Session()
+    context.session.mount('http://', context.adapter)
+    context.uri = f'http://example.org/{filename}'
+    context.content = get_fixture(filename).read_bytes()
+
+
+@when('I fetch it {times:d} times')
+def step_impl(context, times):
+    for _ in range(times):
+        eq_(context.session.get(context.uri).content, context.content)
+
+
+@when('I fetch it again {days:d} days later')
+def step_impl(context, days):
+    later = time.time() + days * 86400
+    with mock.patch('time.time', return_value=later):
+        eq_(context.session.get(context.uri).content, context.content)
+
+
+@then('it should have been counted as {hits:d} hits, {misses:d} misses and {revalidated:d} revalidated')
+def step_impl(context, hits, misses, revalidated):
+    eq_(context.adapter.report(), {context.uri: CacheCounts(hits=hits, misses=misses, revalidated=revalidated)})
+
+
+@given('a zip archive of the files {filenames} is downloaded')
+def step_impl(context, filenames):
+    archive = BytesIO()
+    with zipfile.ZipFile(archive, 'w', compression=zipfile.ZIP_DEFLATED) as zipped:
+        for filename in quoted_list(filenames):
+            zipped.write(get_fixture(filename), f'data/{filename}')
+    _fixture_distribution(context, 'data.zip', ZIP, FixtureAdapter(archive.getvalue()))
+    # note the temporary files the archive is spooled to, to check they're closed
+    context.spooled = []
+    temporary_file = tempfile.TemporaryFile
+
+    def spool(*args, **kwargs):
+        context.spooled.append(temporary_file(*args, **kwargs))
+        return context.spooled[-1]
+
+    patcher = mock.patch.object(tempfile, 'TemporaryFile', side_effect=spool)
+    patcher.start()
+    context.add_cleanup(patcher.stop)
+
+
+@when('I fetch the distribution as pandas DataFrames in chunks of {chunksize:d} rows')
+def step_impl(context, chunksize):
+    context.chunks = list(context.distro.iter_pandas(chunksize=chunksize))
+
+
+@when('I fetch the files matching "{member}" as pandas DataFrames in chunks of {chunksize:d} rows')
+def step_impl(context, member, chunksize):
+    context.chunks = list(context.distro.iter_pandas(chunksize=chunksize, member=member))
+
+
+@when('I fetch the distribution as a pandas DataFrame')
+def step_impl(context):
+    context.df = context.distro.as_pandas()
+
+
+@when('I read the CSDB file "{filename}"')
+def step_impl(context, filename):
+    with open(get_fixture(filename), encoding='latin-1') as csdb:
+        context.df = read_csdb(csdb)
+
+
+@when('I read the CSDB file "{filename}" in chunks of {chunksize:d} rows')
+def step_impl(context, filename, chunksize):
+    with open(get_fixture(filename), encoding='latin-1') as csdb:
+        context.chunks = list(iter_csdb(csdb, chunksize))
+
+
+@then('fetching the distribution as a pandas DataFrame should fail with a FormatError')
+def step_impl(context):
+    assert_raises(FormatError, context.distro.as_pandas)
+    assert_raises(FormatError, lambda: list(context.distro.iter_pandas()))
+
+
+@given('the distribution is kept in an empty frame cache')
+def step_impl(context):
+    context.frame_cache_dir = tempfile.TemporaryDirectory()
+    context.distro._frame_cache = FrameCache(context.frame_cache_dir.name)
+
+
+@when("I fetch the '{sheet}' sheet with a two row header as a pandas DataFrame")
+def step_impl(context, sheet):
+    context.fetch = lambda: context.distro.as_pandas(sheet_name=sheet, header=[0, 1])
+    context.df = context.fetch()
+
+
+@when("I fetch every sheet as pandas DataFrames and use the sheet '{sheet}'")
+def step_impl(context, sheet):
+    # pandas only gives every sheet of an Excel workbook when asked for them all
+    context.fetch = lambda: context.distro.as_pandas(
+        **({} if context.distro._mediaType == mimetype.ODS else {'sheet_name': None}))
+    context.sheets = context.fetch()
+    context.df = context.sheets[sheet]
+
+
+@then("fetching every sheet again and using the sheet '{sheet}' should come from the frame cache")
+def step_impl(context, sheet):
+    with mock.patch.object(Downloadable, '_get_simple_csv_pandas') as parse:
+        cached = context.fetch()
+        eq_(list(cached), list(context.sheets))
+        ok_(cached[sheet].equals(context.df))
+        parse.assert_not_called()
+
+
+@when('I fetch the distribution as a pandas DataFrame twice')
+def step_impl(context):
+    context.df = context.distro.as_pandas()
+    ok_(context.distro.as_pandas().equals(context.df))
+
+
+@then('fetching it again should come from the frame cache')
+def step_impl(context):
+    with mock.patch.object(Downloadable, '_get_simple_csv_pandas') as parse:
+        cached = context.fetch()
+        parse.assert_not_called()
+    eq_(list(cached.columns), list(context.df.columns))
+    ok_(cached.equals(context.df))
+
+
+@then('it should have been requested with {methods}')
+def step_impl(context, methods):
+    eq_(context.adapter.methods, [method.strip() for method in methods.split(',')])
+
+
+@then('nothing should have been kept in the frame cache')
+def step_impl(context):
+    eq_(list(Path(context.frame_cache_dir.name).iterdir()), [])
+
+
+@then('observation {row:d} should be {cdid}, {period} and {value}')
+def step_impl(context, row, cdid, period, value):
+    observation = context.df.iloc[row]
+    eq_((observation['CDID'], observation['Period']), (cdid, period))
+    if value == 'missing':
+        ok_(pd.isna(observation['Value']))
+    else:
+        eq_(observation['Value'], float(value))
+
+
+@when('I fetch the files matching "{member}" as pandas DataFrames')
+def step_impl(context, member):
+    context.frames = context.distro.as_pandas(member=member)
+
+
+@when('I fetch every file that can be loaded as pandas DataFrames')
+def step_impl(context):
+    context.frames = context.distro.as_pandas()
+
+
+@when('I fetch the files matching "{member}" as databaker tabs')
+def step_impl(context, member):
+    context.tabs = context.distro.as_databaker(member=member)
+
+
+@when('the files are finished with')
+def step_impl(context):
+    for name in ['frames', 'tabs', 'chunks']:
+        if hasattr(context, name):
+            delattr(context, name)
+    gc.collect()
+
+
+@then('every temporary file the archive was spooled to should have been closed')
+def step_impl(context):
+    ok_(len(context.spooled) > 0)
+    ok_(all(spooled.closed for spooled in context.spooled))
+
+
+@then('the files loaded should be {filenames}')
+def step_impl(context, filenames):
+    eq_(list(context.frames), [f'data/{filename}' for filename in quoted_list(filenames)])
+
+
+@then('the file "{filename}" should have {rows:d} rows')
+def step_impl(context, filename, rows):
+    eq_(len(context.frames[f'data/{filename}']), rows)
+
+
+@then('the dataframe of the one file should have {rows:d} rows')
+def step_impl(context, rows):
+    eq_(len(context.frames), rows)
+
+
+@then('the databaker tabs should be [{names}]')
+def step_impl(context, names):
+    eq_([tab.name for tab in context.tabs], [name.strip() for name in names.split(',')])
+
+
+@then('the chunks together should match the CSV file')
+def step_impl(context):
+    ok_(pd.concat(context.chunks).equals(pd.read_csv(context.csv)))
+
+
+@then('the distribution as an Arrow table should have {rows:d} rows')
+def step_impl(context, rows):
+    eq_(context.distro.as_arrow().num_rows, rows)
+
+
 @given('I scrape datasets using info.json "{fixture_path}"')
 def step_impl(context, fixture_path):
     with vcr.use_cassette("features/fixtures/cassettes/odata_api.yml",
@@ -36,6 +359,12 @@ def step_impl(context):
     context.odata_chunks = [x.strip() for x in context.text.split(",")]
 
 
+@then(u'the chunks missing from PMD are')
+def step_impl(context):
+    expected_chunks = [x.strip() for x in context.text.split(",")]
+    assert_equal(missing_chunks(context.odata_chunks, context.pmd_chunks), expected_chunks)
+
+
 @given(u'I specify the required chunk as')
 def step_impl(context):
     context.required_chunks = [x.strip() for x in context.text.split(",")]
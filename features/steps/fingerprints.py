@@ -0,0 +1,61 @@
+import tempfile
+from pathlib import Path
+
+from behave import *
+from nose.tools import *
+
+from gssutils.fingerprints import FingerprintStore, fingerprint
+
+
+@given('I keep distribution fingerprints in an empty store')
+def step_impl(context):
+    context.fingerprints_dir = tempfile.TemporaryDirectory()
+    context.fingerprints_path = Path(context.fingerprints_dir.name) / 'fingerprints.json'
+    context.fingerprints = FingerprintStore(context.fingerprints_path)
+
+
+@when('I record the fingerprint of the dataset')
+def step_impl(context):
+    context.fingerprints.record(context.scraper)
+
+
+@when('the latest distribution is given the download URL "{uri}"')
+def step_impl(context, uri):
+    context.scraper.distribution(latest=True).downloadURL = uri
+
+
+@then('the dataset should have changed since the last run')
+def step_impl(context):
+    ok_(context.fingerprints.has_changed(context.scraper))
+
+
+@then('the dataset should not have changed since the last run')
+def step_impl(context):
+    ok_(not context.fingerprints.has_changed(context.scraper))
+
+
+@then('the store should still know the fingerprint when reopened')
+def step_impl(context):
+    reopened = FingerprintStore(context.fingerprints_path)
+    eq_(reopened.get(context.scraper._dataset_id), fingerprint(context.scraper))
+    ok_(not reopened.has_changed(context.scraper))
+
+
+@when('two pipelines sharing the store record the dataset as "{first}" and "{second}"')
+def step_impl(context, first, second):
+    # each opened the store before the other recorded anything
+    stores = [FingerprintStore(context.fingerprints_path), FingerprintStore(context.fingerprints_path)]
+    for store, dataset_id in zip(stores, [first, second]):
+        store.record(context.scraper, dataset_id)
+
+
+@when('another pipeline sharing the store records the fingerprint of the dataset')
+def step_impl(context):
+    FingerprintStore(context.fingerprints_path).record(context.scraper)
+
+
+@then('the store should know the fingerprints of "{first}" and "{second}" when reopened')
+def step_impl(context, first, second):
+    reopened = FingerprintStore(context.fingerprints_path)
+    for dataset_id in [first, second]:
+        eq_(reopened.get(dataset_id), fingerprint(context.scraper))
@@ -1,9 +1,10 @@
+from io import StringIO
 from pathlib import Path
 
 from behave import *
 from nose.tools import *
 from rdflib.compare import to_isomorphic, graph_diff
-from rdflib import Graph
+from rdflib import Graph, ConjunctiveGraph
 from dateutil.parser import parse
 from datetime import datetime, timezone
 from gssutils.metadata import THEME
@@ -30,6 +31,30 @@ def step_impl(context):
     context.trig = context.scraper.generate_trig()
 
 
+@step("stream the metadata as {rdf_format}")
+def step_impl(context, rdf_format):
+    out = StringIO()
+    if rdf_format == 'TriG':
+        context.scraper.write_trig(out)
+    else:
+        context.scraper.write_nquads(out)
+    context.streamed = (out.getvalue(), {'TriG': 'trig', 'N-Quads': 'nquads'}[rdf_format])
+
+
+@then("the streamed metadata should match the generated TriG")
+def step_impl(context):
+    data, rdf_format = context.streamed
+    streamed = ConjunctiveGraph()
+    streamed.parse(data=data, format=rdf_format)
+    generated = ConjunctiveGraph()
+    generated.parse(data=context.trig, format='trig')
+    eq_(sorted(str(g.identifier) for g in streamed.contexts() if len(g) > 0),
+        sorted(str(g.identifier) for g in generated.contexts() if len(g) > 0))
+    for graph in generated.contexts():
+        test_graph_diff(streamed.get_context(graph.identifier), graph)
+        test_graph_diff(graph, streamed.get_context(graph.identifier))
+
+
 def test_graph_diff(g1, g2):
     in_both, only_in_first, only_in_second = graph_diff(to_isomorphic(g1), to_isomorphic(g2))
     only_in_first.namespace_manager = g1.namespace_manager
@@ -1,14 +1,36 @@
+import asyncio
+import json
 import os
+import pickle
+import threading
+import time
+from collections.abc import Mapping
+from datetime import date, datetime
+from io import BytesIO
+from pathlib import Path
 from urllib.parse import urlparse
 
+import pandas as pd
 import requests
 import vcr
+import xypath
 from behave import *
 from nose.tools import *
+from urllib3 import HTTPResponse
+from urllib3._collections import HTTPHeaderDict
+from vcr.persisters.filesystem import FilesystemPersister
+from vcr.serializers import yamlserializer
 
+import gssutils.scrapers
 from gssutils import Scraper
-from gssutils.metadata import DCTERMS, DCAT, RDFS, namespaces
+from gssutils.scrape import FilterError
+from gssutils.scrapers.registry import ScraperRegistry
+from gssutils.transport import AsyncTransport, Transport
+from gssutils.metadata import DCTERMS, DCAT, RDFS, dcat, namespaces
 from gssutils.metadata.mimetype import Excel
+from gssutils.transform.ods import ODSTableSet
+from gssutils.transform.sheets import LazyTabs
+from gssutils.transform.xlsx import XLSXReader
 
 DEFAULT_RECORD_MODE = 'new_episodes'
 
@@ -23,7 +45,232 @@ def step_impl(context, uri):
     with vcr.use_cassette(cassette(uri),
                           record_mode=context.config.userdata.get('record_mode',
                                                                   DEFAULT_RECORD_MODE)):
-        context.scraper = Scraper(uri, requests.Session())
+        # vcrpy isn't thread safe, so replay any batched requests one at a time
+        session = requests.Session()
+        context.scraper = Scraper(uri, session, transport=Transport(session, max_concurrency=1))
+
+
+class CassetteAdapter(requests.adapters.HTTPAdapter):
+    """Replays the responses recorded in a vcrpy cassette by method and URL. Unlike vcrpy, requests can be replayed
+    from several threads at once, slowly enough to see how many are made at once"""
+
+    def __init__(self, path: str):
+        super().__init__()
+        recorded, responses = FilesystemPersister.load_cassette(path, yamlserializer)
+        self.responses = {}
+        for request, response in zip(recorded, responses):
+            self.responses.setdefault((request.method, request.uri), response)
+        self.in_flight = 0
+        self.most_in_flight = 0
+        self.lock = threading.Lock()
+
+    def send(self, request, **kwargs):
+        with self.lock:
+            self.in_flight += 1
+            self.most_in_flight = max(self.most_in_flight, self.in_flight)
+        time.sleep(0.02)
+        with self.lock:
+            self.in_flight -= 1
+        recorded = self.responses.get((request.method, request.url))
+        if recorded is None:
+            raise requests.ConnectionError(f'No response to {request.method} {request.url} in the cassette.')
+        headers = HTTPHeaderDict([(name, value) for name, values in recorded['headers'].items() for value in values
+                                  if name.lower() != 'transfer-encoding'])
+        return self.build_response(request, HTTPResponse(body=BytesIO(recorded['body']['string']), headers=headers,
+                                                         status=recorded['status']['code'],
+                                                         reason=recorded['status']['message'],
+                                                         preload_content=False))
+
+
+@given('I scrape the page "{uri}" with {transport}, fetching {concurrency:d} pages at a time from the cassette')
+def step_impl(context, uri, transport, concurrency):
+    context.adapter = CassetteAdapter(cassette(uri))
+    session = requests.Session()
+    session.mount('https://', context.adapter)
+    session.mount('http://', context.adapter)
+    if transport == 'an AsyncTransport':
+        with AsyncTransport(session, max_concurrency=concurrency) as batching:
+            context.scraper = Scraper(uri, session, transport=batching)
+    else:
+        context.scraper = Scraper(uri, session, transport=Transport(session, max_concurrency=concurrency))
+    context.uri = uri
+
+
+@then('the distributions should be those scraped fetching one page at a time')
+def step_impl(context):
+    with vcr.use_cassette(cassette(context.uri), record_mode='none'):
+        session = requests.Session()
+        one_at_a_time = Scraper(context.uri, session, transport=Transport(session, max_concurrency=1))
+    ok_(len(one_at_a_time.distributions) > 1)
+    eq_([(d.title, d.downloadURL, d.mediaType, d.issued) for d in context.scraper.distributions],
+        [(d.title, d.downloadURL, d.mediaType, d.issued) for d in one_at_a_time.distributions])
+
+
+class ContentAPIAdapter(requests.adapters.HTTPAdapter):
+    """Serves gov.uk content API JSON by URL path, slowly enough to see how many requests are made at once"""
+
+    def __init__(self, pages: dict):
+        super().__init__()
+        self.pages = pages
+        self.requested = []
+        self.in_flight = 0
+        self.most_in_flight = 0
+        self.lock = threading.Lock()
+
+    def send(self, request, **kwargs):
+        with self.lock:
+            self.requested.append(request.url)
+            self.in_flight += 1
+            self.most_in_flight = max(self.most_in_flight, self.in_flight)
+        time.sleep(0.02)
+        with self.lock:
+            self.in_flight -= 1
+        # the content API path is made by putting /api/content/ in front of the page's path, so has a double slash
+        body = self.pages.get(urlparse(request.url).path.replace('//', '/'), '<html></html>')
+        return self.build_response(request, HTTPResponse(body=BytesIO(body.encode('utf-8')), status=200,
+                                                         preload_content=False))
+
+
+@given('I scrape a gov.uk collection of {documents:d} documents, fetching {concurrency:d} at a time')
+def step_impl(context, documents, concurrency):
+    collection = '/government/collections/some-statistics'
+    docs = [{'content_id': f'doc-{i}', 'title': f'Some statistics {i}', 'schema_name': 'publication',
+             'api_url': f'https://www.gov.uk/api/content/government/statistics/some-statistics-{i}'}
+            for i in range(documents)]
+    pages = {f'/api/content{collection}': json.dumps({
+        'schema_name': 'document_collection',
+        'title': 'Some statistics',
+        # the second group lists its documents first, and the first document is in both groups
+        'details': {'collection_groups': [{'documents': [doc['content_id'] for doc in docs[documents // 2:]]},
+                                          {'documents': [doc['content_id'] for doc in docs[:documents // 2 + 1]]}]},
+        'links': {'documents': docs}
+    })}
+    for doc in docs:
+        pages[urlparse(doc['api_url']).path] = json.dumps({
+            'first_published_at': '2020-01-01T09:30:00.000+00:00',
+            'details': {'attachments': [{'url': f'/media/{doc["content_id"]}.csv', 'title': doc['title'],
+                                         'content_type': 'text/csv'}]}
+        })
+    context.adapter = ContentAPIAdapter(pages)
+    session = requests.Session()
+    session.mount('https://', context.adapter)
+    context.scraper = Scraper(f'https://www.gov.uk{collection}', session,
+                              transport=Transport(session, max_concurrency=concurrency))
+
+
+@then('the catalog should list the datasets of documents {numbers}')
+def step_impl(context, numbers):
+    eq_([ds.title for ds in context.scraper.catalog.dataset],
+        [f'Some statistics {n.strip()}' for n in numbers.split(',')])
+    eq_([ds.distribution[0].downloadURL for ds in context.scraper.catalog.dataset],
+        [f'https://www.gov.uk/media/doc-{n.strip()}.csv' for n in numbers.split(',')])
+
+
+@then('each document should have been fetched once, {concurrency:d} at a time')
+def step_impl(context, concurrency):
+    fetched = [url for url in context.adapter.requested if '/government/statistics/' in url]
+    eq_(len(fetched), len(set(fetched)))
+    eq_(context.adapter.most_in_flight, concurrency)
+
+
+@given('{transport} fetching {concurrency:d} pages at a time')
+def step_impl(context, transport, concurrency):
+    context.adapter = ContentAPIAdapter({f'/page-{i}': f'page {i}' for i in range(100)})
+    session = requests.Session()
+    session.mount('https://', context.adapter)
+    context.transport = {'a Transport': Transport, 'an AsyncTransport': AsyncTransport}[transport](session,
+                                                                                             concurrency)
+    if isinstance(context.transport, AsyncTransport):
+        context.add_cleanup(context.transport.close)
+
+
+@when('it fetches {pages:d} pages {how}')
+def step_impl(context, pages, how):
+    urls = [f'https://example.org/page-{i}' for i in range(pages)]
+    if how == 'asynchronously':
+        context.responses = asyncio.run(context.transport.aget_many(urls))
+    else:
+        context.responses = context.transport.get_many(urls)
+
+
+@then('the responses should be pages 0 to {last:d} in order')
+def step_impl(context, last):
+    eq_([r.text for r in context.responses], [f'page {i}' for i in range(last + 1)])
+
+
+@then('{concurrency:d} pages should have been fetched at once')
+def step_impl(context, concurrency):
+    eq_(context.adapter.most_in_flight, concurrency)
+
+
+@then('the scraper registered for "{uri}" should be {scraper}')
+def step_impl(context, uri, scraper):
+    scrape = gssutils.scrapers.scraper_registry.lookup(uri)
+    if scraper == 'none':
+        assert_is_none(scrape)
+    else:
+        module, function = scraper.split('.')
+        assert_is(scrape, getattr(getattr(gssutils.scrapers, module), function))
+
+
+@given('a scraper registry with the prefixes')
+def step_impl(context):
+    context.registry = ScraperRegistry((row['prefix'], row['scraper']) for row in context.table)
+
+
+@then('the registry should give {scraper} for "{uri}"')
+def step_impl(context, scraper, uri):
+    # the scrapers registered above are just names, so the lookup can be compared directly
+    eq_(context.registry.lookup(uri), None if scraper == 'none' else scraper)
+
+
+@given('I scrape the pages in one batch')
+def step_impl(context):
+    uris = [row['uri'] for row in context.table]
+    with vcr.use_cassette(cassette(uris[0]),
+                          record_mode=context.config.userdata.get('record_mode',
+                                                                  DEFAULT_RECORD_MODE)):
+        # see above, one worker so that vcrpy replays the requests one at a time
+        context.scrape_results = Scraper.scrape_many(uris, workers=1, session=requests.Session())
+
+
+@given('I scrape {publications:d} gov.uk publications and "{failing}" in one batch with {workers:d} workers')
+def step_impl(context, publications, failing, workers):
+    uris = [f'https://www.gov.uk/government/statistics/some-statistics-{i}' for i in range(publications)]
+    context.adapter = ContentAPIAdapter({f'/api/content{urlparse(uri).path}': json.dumps({
+        'schema_name': 'publication', 'title': f'Some statistics {i}',
+        'first_published_at': '2020-01-01T09:30:00.000+00:00', 'details': {'attachments': []}
+    }) for i, uri in enumerate(uris)})
+    session = requests.Session()
+    session.mount('https://', context.adapter)
+    # the one that fails is in the middle, to check the results keep their order
+    uris.insert(publications // 2, failing)
+    context.scrape_results = Scraper.scrape_many(uris, workers=workers, session=session)
+
+
+@then('the batch should have scraped publications {numbers} with "{failing}" failing')
+def step_impl(context, numbers, failing):
+    titles = iter(f'Some statistics {n.strip()}' for n in numbers.split(','))
+    for result in context.scrape_results:
+        if result.uri == failing:
+            ok_(result.scraper is None)
+            ok_(isinstance(result.error, NotImplementedError), f'Scraping {failing} gave {result.error!r}')
+        else:
+            ok_(result.error is None, f'Scraping {result.uri} failed with {result.error!r}')
+            eq_(result.scraper.title, next(titles))
+    eq_(next(titles, None), None)
+
+
+@then('every scrape in the batch should succeed')
+def step_impl(context):
+    for result in context.scrape_results:
+        ok_(result.error is None, f'Scraping {result.uri} failed with {result.error!r}')
+        ok_(result.seconds >= 0)
+
+
+@then('the batch titles should be')
+def step_impl(context):
+    eq_([result.scraper.title for result in context.scrape_results], [row['title'] for row in context.table])
 
 
 @given('I use the testing seed "{file_name}"')
@@ -135,6 +382,86 @@ def step_impl(context, ref, name):
     assert_true(sheet.excel_ref(ref))
 
 
+@given('the ODS file "{filename}" is loaded as databaker tabs')
+def step_impl(context, filename):
+    context.tableset = ODSTableSet(filename=Path('features') / 'fixtures' / filename)
+    context.databaker = LazyTabs(context.tableset)
+
+
+@given('the \'{sheet}\' sheet of the XLSX file "{filename}" is read in chunks of {chunksize:d} rows')
+def step_impl(context, sheet, filename, chunksize):
+    context.xlsx = Path('features') / 'fixtures' / filename
+    context.sheet = sheet
+    context.chunks = list(XLSXReader(context.xlsx).iter_frames(sheet, chunksize))
+
+
+@then("there should be {chunks:d} chunks with {rows:d} rows in total")
+def step_impl(context, chunks, rows):
+    eq_(len(context.chunks), chunks)
+    eq_(sum(len(chunk) for chunk in context.chunks), rows)
+
+
+@then("the chunks together should match reading the whole sheet")
+def step_impl(context):
+    ok_(pd.concat(context.chunks).equals(pd.read_excel(context.xlsx, sheet_name=context.sheet)))
+
+
+@then('every sheet of the XLSX file "{filename}" read in chunks of {chunksize:d} rows should match reading it whole')
+def step_impl(context, filename, chunksize):
+    xlsx = Path('features') / 'fixtures' / filename
+    reader = XLSXReader(xlsx)
+    read = []
+    rows = reader.rows
+
+    def counted_rows(sheet):
+        read.append(sheet)
+        return rows(sheet)
+
+    reader.rows = counted_rows
+    for sheet in reader.sheet_names():
+        whole = pd.read_excel(xlsx, sheet_name=sheet)
+        chunks = list(reader.iter_frames(sheet, chunksize))
+        eq_(read.count(sheet), 1, f'times {sheet} was read')
+        for chunk in chunks:
+            # a row wider than the header adds columns from its chunk on
+            eq_(list(chunk.columns), list(whole.columns)[:len(chunk.columns)], f'columns of a chunk of {sheet}')
+        eq_(list(chunks[-1].columns), list(whole.columns), f'columns of the last chunk of {sheet}')
+        # each chunk's types are worked out from its own rows, as read_csv's are, so compare the values
+        ok_(pd.concat(chunks).astype(object).equals(whole.astype(object)), f'values of {sheet}')
+
+
+@then("no tabs have been read")
+def step_impl(context):
+    eq_(context.tableset.load([]), {})
+
+
+@then("only the '{name}' tab has been read")
+def step_impl(context, name):
+    eq_(list(context.tableset.load([]).keys()), [context.databaker.names.index(name)])
+
+
+def excel_cell(context, ref, name):
+    return context.databaker[name].excel_ref(ref)._cell
+
+
+@then("cell '{ref}' in the '{name}' tab is bold")
+def step_impl(context, ref, name):
+    ok_(excel_cell(context, ref, name).properties['bold'])
+
+
+@then("cell '{ref}' in the '{name}' tab is merged across '{merged}'")
+def step_impl(context, ref, name, merged):
+    top_left, bottom_right = merged.split(':')
+    top, left = xypath.contrib.excel.excel_address_coordinate(top_left)[::-1]
+    bottom, right = xypath.contrib.excel.excel_address_coordinate(bottom_right)[::-1]
+    eq_(excel_cell(context, ref, name).properties.raw_span(), (top, bottom, left, right))
+
+
+@then("cell '{ref}' in the '{name}' tab has the value '{value}'")
+def step_impl(context, ref, name, value):
+    eq_(str(excel_cell(context, ref, name).value), value)
+
+
 @step("the '{env}' environment variable is '{value}'")
 def step_impl(context, env, value):
     os.environ[env] = value
@@ -148,6 +475,98 @@ def step_impl(context):
     context.distribution = context.scraper.distribution(**args)
 
 
+def issued_value(value):
+    # "date 2020-01-01", "datetime 2020-01-01T09:30:00+01:00" or "string ..." as scrapers would set it
+    kind, _, text = value.partition(' ')
+    return {'date': date.fromisoformat, 'datetime': datetime.fromisoformat, 'string': str}[kind](text)
+
+
+@given("a scraper with the distributions")
+def step_impl(context):
+    page = '/government/statistics/some-statistics'
+    session = requests.Session()
+    session.mount('https://', ContentAPIAdapter({f'/api/content{page}': json.dumps({
+        'schema_name': 'publication', 'title': 'Some statistics',
+        'first_published_at': '2020-01-01T09:30:00.000+00:00', 'details': {'attachments': []}
+    })}))
+    context.scraper = Scraper(f'https://www.gov.uk{page}', session)
+    for row in context.table:
+        distribution = dcat.Distribution(context.scraper)
+        distribution.downloadURL = f'https://www.gov.uk/media/{row["title"].replace(" ", "-")}.csv'
+        distribution.title = row['title']
+        distribution.mediaType = row['mediaType']
+        if row['issued']:
+            distribution.issued = issued_value(row['issued'])
+        context.scraper.distributions.append(distribution)
+
+
+def titles(distributions):
+    return ', '.join(d.title for d in distributions)
+
+
+@then('the distributions with media type "{media_type}" are "{expected}"')
+def step_impl(context, media_type, expected):
+    eq_(titles(context.scraper.distribution_index.filter_many(mediaType=media_type)), expected)
+
+
+@then('the latest distribution with media type "{media_type}" is "{title}"')
+def step_impl(context, media_type, title):
+    eq_(context.scraper.distribution(mediaType=media_type, latest=True).title, title)
+    eq_(context.scraper.distribution_index.latest(mediaType=media_type).title, title)
+
+
+@then('selecting one distribution with media type "{media_type}" fails')
+def step_impl(context, media_type):
+    assert_raises(FilterError, context.scraper.distribution, mediaType=media_type)
+
+
+@then('the distributions issued between {start} and {end} are "{expected}"')
+def step_impl(context, start, end, expected):
+    start, end = [None if bound == 'any time' else issued_value(bound) for bound in (start, end)]
+    eq_(titles(context.scraper.distributions_issued_between(start, end)), expected)
+
+
+@when('the distributions with media type "{media_type}" are selected')
+def step_impl(context, media_type):
+    context.scraper.distribution_index.filter_many(mediaType=media_type)
+    context.index = context.scraper.distribution_index
+
+
+@when('a distribution made for another scraper is retitled "{title}"')
+def step_impl(context, title):
+    other = Scraper(context.scraper.uri, context.scraper.session)
+    dcat.Distribution(other).title = title
+
+
+@when('a distribution "{title}" with media type "{media_type}" is added')
+def step_impl(context, title, media_type):
+    # made for another scraper, so that the only change this scraper's index can notice is the list growing
+    distribution = dcat.Distribution(Scraper(context.scraper.uri, context.scraper.session))
+    distribution.title = title
+    distribution.mediaType = media_type
+    context.scraper.distributions.append(distribution)
+
+
+@then("the scraper's distribution index should not have been rebuilt")
+def step_impl(context):
+    assert_is(context.scraper.distribution_index, context.index)
+
+
+@when('the distribution "{title}" is retitled "{new_title}"')
+def step_impl(context, title, new_title):
+    context.scraper.distribution(title=title).title = new_title
+
+
+@when('the distribution is retitled "{title}"')
+def step_impl(context, title):
+    context.distribution.title = title
+
+
+@then('selecting the distribution titled "{title}" finds the same one')
+def step_impl(context, title):
+    assert_is(context.scraper.distribution(title=title), context.distribution)
+
+
 @step("fetch the '{tabname}' tab as a pandas DataFrame")
 def step_impl(context, tabname):
     with vcr.use_cassette(cassette(context.scraper.uri),
@@ -175,13 +594,36 @@ def step_impl(context, title_start):
     assert_is_not_none(context.distribution)
 
 
+@when("the distributions are pickled and unpickled")
+def step_impl(context):
+    context.unpickled = pickle.loads(pickle.dumps(context.scraper.distributions))
+
+
+@then("the unpickled distributions should match the originals")
+def step_impl(context):
+    ok_(len(context.scraper.distributions) > 0)
+    eq_(len(context.unpickled), len(context.scraper.distributions))
+    for original, unpickled in zip(context.scraper.distributions, context.unpickled):
+        eq_(unpickled.uri, original.uri)
+        eq_(unpickled._mediaType, original._mediaType)
+        eq_(unpickled.__dict__, original.__dict__)
+        eq_(set(unpickled.quads()), set(original.quads()))
+
+
+@then('the distributions should only keep their metadata in their instance dictionaries')
+def step_impl(context):
+    for distribution in context.scraper.distributions:
+        ok_(set(distribution.__dict__) <= set(dcat.Distribution._properties_metadata))
+        eq_(distribution.uri, distribution.downloadURL)
+
+
 @then("fetch the tabs as a dict of pandas DataFrames")
 def step_impl(context):
     with vcr.use_cassette(cassette(context.scraper.uri),
                           record_mode=context.config.userdata.get('record_mode',
                                                                   DEFAULT_RECORD_MODE)):
         context.pandas = context.distribution.as_pandas()
-        eq_(type(context.pandas), dict)
+        ok_(isinstance(context.pandas, Mapping))
 
 
 @step("all mandatory fields are set")
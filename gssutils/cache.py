@@ -0,0 +1,474 @@
+import atexit
+import calendar
+import hashlib
+import io
+import mmap
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from email.utils import parsedate_tz
+from pathlib import Path
+from collections import defaultdict, Counter
+from typing import Optional, Union, Dict, Set, NamedTuple
+
+import msgpack
+import requests
+from cachecontrol import serialize
+from cachecontrol.adapter import CacheControlAdapter
+from cachecontrol.cache import BaseCache
+from cachecontrol.controller import CacheController
+from requests.structures import CaseInsensitiveDict
+
+# Response bodies at least this big are kept in their own file when the serializer has a body_dir
+BODY_FILE_THRESHOLD = 1000 * 1000  # 1MB
+
+
+class MappedBody(io.RawIOBase):
+    """
+    A read-only, seekable stream over a cached response body, memory-mapped from its file so that reading it
+    doesn't need the whole body in memory. name is the path of the file, for readers that would rather open it
+    themselves.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        super().__init__()
+        self.name = str(path)
+        self._position = 0
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            # an empty file can't be mapped
+            self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size > 0 else b''
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, b):
+        view = memoryview(self._buffer)[self._position:self._position + len(b)]
+        n = len(view)
+        b[:n] = view
+        self._position += n
+        return n
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            self._position = offset
+        elif whence == io.SEEK_CUR:
+            self._position += offset
+        elif whence == io.SEEK_END:
+            self._position = len(self._buffer) + offset
+        return self._position
+
+    def tell(self):
+        return self._position
+
+    def getbuffer(self) -> memoryview:
+        return memoryview(self._buffer)
+
+    def close(self):
+        if not self.closed and isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+        super().close()
+
+
+class BiggerSerializer(serialize.Serializer):
+    """
+    CacheControl's msgpack serializer, allowing for cached bodies of up to 100MB.
+
+    If body_dir is given, bodies of BODY_FILE_THRESHOLD bytes or more are written to files in that directory,
+    named by the SHA-256 of their content, and only the file name is kept with the rest of the cached response.
+    Cache hits for these are then read from a memory-mapped MappedBody rather than being decoded into memory.
+    """
+
+    def __init__(self, body_dir: Optional[Union[str, Path]] = None):
+        self.body_dir = Path(body_dir) if body_dir is not None else None
+
+    def dumps(self, request, response, body=None):
+        if self.body_dir is None:
+            return super().dumps(request, response, body)
+        if body is None:
+            body = response.read(decode_content=False)
+            response._fp = io.BytesIO(body)
+        if len(body) < BODY_FILE_THRESHOLD:
+            return super().dumps(request, response, body)
+        name = hashlib.sha256(body).hexdigest()
+        path = self.body_dir / name
+        if not path.exists():
+            self.body_dir.mkdir(parents=True, exist_ok=True)
+            # write then rename, so a concurrent reader never sees a partial body
+            partial = self.body_dir / f'{name}.{os.getpid()}.{threading.get_ident()}.part'
+            with open(partial, 'wb') as f:
+                f.write(body)
+            os.replace(partial, path)
+        version, data = super().dumps(request, response, b'').split(b',', 1)
+        cached = msgpack.loads(data, raw=False)
+        cached['response']['body_file'] = name
+        return b','.join([version, msgpack.dumps(cached, use_bin_type=True)])
+
+    def _loads_v4(self, request, data):
+        try:
+            cached = msgpack.loads(
+                data, raw=False, max_bin_len=100 * 1000 * 1000)  # 100MB
+        except ValueError:
+            return
+
+        body_file = cached['response'].pop('body_file', None)
+        if body_file is None:
+            return self.prepare_response(request, cached)
+        if self.body_dir is None or not (self.body_dir / body_file).exists():
+            # treat as a miss, so the response is fetched and cached again
+            return
+        response = self.prepare_response(request, cached)
+        if response is not None:
+            response._fp = MappedBody(self.body_dir / body_file)
+        return response
+
+
+def body_files(value: bytes) -> Set[str]:
+    """
+    The names of any body files referred to by a cached response, as stored by BiggerSerializer.
+    """
+    version, _, data = value.partition(b',')
+    if version != b'cc=4':
+        return set()
+    try:
+        cached = msgpack.loads(data, raw=False, max_bin_len=100 * 1000 * 1000)
+    except ValueError:
+        return set()
+    body_file = cached.get('response', {}).get('body_file')
+    return {body_file} if body_file is not None else set()
+
+
+def cached_headers(value: bytes) -> Optional[CaseInsensitiveDict]:
+    """
+    The headers of a response as cached by CacheControl's serializer (or BiggerSerializer), read without decoding
+    its body, or None if they can't be read.
+    """
+    version, _, data = value.partition(b',')
+    if version != b'cc=4':
+        return None
+    unpacker = msgpack.Unpacker(raw=False, max_bin_len=100 * 1000 * 1000)
+    unpacker.feed(data)
+    try:
+        for _ in range(unpacker.read_map_header()):
+            if unpacker.unpack() != 'response':
+                unpacker.skip()
+                continue
+            for _ in range(unpacker.read_map_header()):
+                if unpacker.unpack() == 'headers':
+                    return CaseInsensitiveDict(unpacker.unpack())
+                unpacker.skip()
+    except (ValueError, msgpack.UnpackException):
+        pass
+    return None
+
+
+def fresh_cached_headers(session: requests.Session, url: str) -> Optional[CaseInsensitiveDict]:
+    """
+    The headers of the response the session would give for a GET of url straight from its cache, without asking
+    the server, or None if it would have to ask, e.g. it's not a CacheControl session or its cached response is
+    stale. Freshness is worked out as CacheControl does, from the Date and Cache-Control max-age or Expires
+    headers, which include any heuristic's.
+    """
+    adapter = session.get_adapter(url)
+    if not isinstance(adapter, CacheControlAdapter):
+        return None
+    controller = adapter.controller
+    value = controller.cache.get(controller.cache_url(url))
+    headers = cached_headers(value) if value is not None else None
+    if headers is None or 'date' not in headers:
+        return None
+    date = parsedate_tz(headers['date'])
+    if date is None:
+        return None
+    date = calendar.timegm(date)
+    cache_control = controller.parse_cache_control(headers)
+    if 'max-age' in cache_control:
+        lifetime = cache_control['max-age']
+    elif 'expires' in headers and parsedate_tz(headers['expires']) is not None:
+        lifetime = calendar.timegm(parsedate_tz(headers['expires'])) - date
+    else:
+        lifetime = 0
+    return headers if lifetime > max(0, time.time() - date) else None
+
+
+class SQLiteCache(BaseCache):
+    """
+    A CacheControl cache backend keeping every response in a single SQLite file, rather than FileCache's
+    one file per response.
+
+    If max_size (bytes) is given, the least recently used responses are evicted once the cache grows past it,
+    and if ttl (seconds) is given, responses older than that are treated as missing and removed. The total size
+    is counted up as responses are added and removed, so responses added by other processes sharing the file are
+    only counted once the cache is pruned.
+
+    Use SQLiteCache.shared() for a cache that lasts as long as the process, rather than opening a connection for
+    each session. Shared caches are closed when the process exits, and a child process forked from this one, e.g.
+    by a ProcessPoolExecutor, opens its own rather than using this process's connections.
+    """
+
+    _shared: Dict[str, 'SQLiteCache'] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, path: Union[str, Path] = '.cache.sqlite', max_size: Optional[int] = None,
+                 ttl: Optional[float] = None):
+        self.path = str(path)
+        self.max_size = max_size
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self._size: Optional[int] = None
+        self._connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('''CREATE TABLE IF NOT EXISTS responses (
+                                      key TEXT PRIMARY KEY,
+                                      value BLOB NOT NULL,
+                                      size INTEGER NOT NULL,
+                                      created REAL NOT NULL,
+                                      accessed REAL NOT NULL,
+                                      expires REAL
+                                    )''')
+        self._connection.execute('CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)')
+
+    @classmethod
+    def shared(cls, path: Union[str, Path] = '.cache.sqlite') -> 'SQLiteCache':
+        """
+        The one cache of the file at path shared by everything in this process, opened the first time it's asked
+        for and closed when the process exits.
+        """
+        key = os.path.abspath(path)
+        with cls._shared_lock:
+            if key not in cls._shared:
+                cls._shared[key] = cls(key)
+            return cls._shared[key]
+
+    @classmethod
+    def close_shared(cls):
+        with cls._shared_lock:
+            shared, cls._shared = cls._shared, {}
+        for cache in shared.values():
+            cache.close()
+
+    @classmethod
+    def _forget_shared(cls):
+        # SQLite connections can't be used across a fork, so a child leaves its parent's alone and opens its own
+        cls._shared = {}
+        cls._shared_lock = threading.Lock()
+
+    def get(self, key):
+        now = time.time()
+        with self.lock:
+            row = self._connection.execute('SELECT value, created, expires FROM responses WHERE key = ?',
+                                           (key,)).fetchone()
+            if row is None:
+                return None
+            value, created, expires = row
+            if (expires is not None and expires < now) or (self.ttl is not None and created + self.ttl < now):
+                self._delete(key)
+                return None
+            self._connection.execute('UPDATE responses SET accessed = ? WHERE key = ?', (now, key))
+            return value
+
+    def set(self, key, value, expires=None):
+        now = time.time()
+        if isinstance(expires, datetime):
+            expires = expires.timestamp()
+        elif expires is not None:
+            expires = now + expires
+        with self.lock:
+            total = self._total() - self._delete(key)
+            self._connection.execute('INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)',
+                                     (key, value, len(value), now, now, expires))
+            self._size = total + len(value)
+            if self.max_size is not None:
+                self._evict(self.max_size)
+
+    def delete(self, key):
+        with self.lock:
+            self._delete(key)
+
+    def close(self):
+        with self.lock:
+            self._connection.close()
+
+    def _total(self) -> int:
+        if self._size is None:
+            self._size = self._connection.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+        return self._size
+
+    def _delete(self, key) -> int:
+        """
+        Remove the response cached for key, if there is one, returning its size.
+        """
+        row = self._connection.execute('SELECT size FROM responses WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return 0
+        self._connection.execute('DELETE FROM responses WHERE key = ?', (key,))
+        if self._size is not None:
+            self._size -= row[0]
+        return row[0]
+
+    def _evict(self, max_size: int):
+        """
+        Remove least recently used responses until the total size is no more than max_size.
+        """
+        if self._total() <= max_size:
+            return
+        for key, size in self._connection.execute('SELECT key, size FROM responses ORDER BY accessed').fetchall():
+            self._connection.execute('DELETE FROM responses WHERE key = ?', (key,))
+            self._size -= size
+            if self._size <= max_size:
+                break
+
+    def prune(self, max_size: Optional[int] = None, max_age: Optional[float] = None) -> int:
+        """
+        Remove expired responses, those older than max_age (or the ttl) seconds, then least recently used
+        responses until the cache is no bigger than max_size (or the configured max_size) bytes.
+        Returns the number of responses removed.
+        """
+        now = time.time()
+        max_size = max_size if max_size is not None else self.max_size
+        max_age = max_age if max_age is not None else self.ttl
+        with self.lock:
+            before = self._connection.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+            self._connection.execute('DELETE FROM responses WHERE expires IS NOT NULL AND expires < ?', (now,))
+            if max_age is not None:
+                self._connection.execute('DELETE FROM responses WHERE created < ?', (now - max_age,))
+            self._size = None
+            if max_size is not None:
+                self._evict(max_size)
+            after = self._connection.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+            self._connection.execute('VACUUM')
+        return before - after
+
+    def prune_bodies(self, body_dir: Union[str, Path]) -> int:
+        """
+        Remove body files in body_dir that are no longer referred to by any cached response, returning the
+        number of files removed.
+        """
+        body_dir = Path(body_dir)
+        if not body_dir.is_dir():
+            return 0
+        with self.lock:
+            referenced = set()
+            for value, in self._connection.execute('SELECT value FROM responses'):
+                referenced.update(body_files(value))
+            removed = 0
+            for path in body_dir.iterdir():
+                if path.is_file() and path.name not in referenced and not path.name.endswith('.part'):
+                    path.unlink()
+                    removed += 1
+        return removed
+
+    def stats(self) -> Dict[str, Optional[Union[int, datetime]]]:
+        with self.lock:
+            count, size, oldest, newest = self._connection.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0), MIN(created), MAX(created) FROM responses').fetchone()
+        return {
+            'responses': count,
+            'size': size,
+            'file_size': Path(self.path).stat().st_size,
+            'oldest': datetime.fromtimestamp(oldest) if oldest is not None else None,
+            'newest': datetime.fromtimestamp(newest) if newest is not None else None
+        }
+
+
+class CacheCounts(NamedTuple):
+    """
+    How requests for one URL were answered: straight from the cache, from the server, or from the cache after
+    the server confirmed (304 Not Modified) that the cached response was still current.
+    """
+    hits: int = 0
+    misses: int = 0
+    revalidated: int = 0
+
+
+class _KeepingRevalidatable(BaseCache):
+    """
+    The cache as CacheController.cached_request() sees it from a RevalidatingController: deleting the response it
+    has just got is skipped if that response has a Last-Modified header.
+    """
+
+    def __init__(self, cache: BaseCache):
+        self.cache = cache
+        self.got = None
+
+    def get(self, key):
+        value = self.cache.get(key)
+        self.got = (key, value)
+        return value
+
+    def set(self, key, value, *args, **kwargs):
+        self.cache.set(key, value, *args, **kwargs)
+
+    def delete(self, key):
+        if self.got is not None and self.got[0] == key and self.got[1] is not None:
+            headers = cached_headers(self.got[1])
+            if headers is not None and 'last-modified' in headers:
+                return
+        self.cache.delete(key)
+
+
+class RevalidatingController(CacheController):
+    """
+    CacheControl purges stale responses that have no ETag, so they're never revalidated. This keeps stale
+    responses that have a Last-Modified header, so that the next request is sent with If-Modified-Since, as
+    responses with an ETag are sent with If-None-Match.
+    """
+
+    def __init__(self, cache=None, *args, **kwargs):
+        self._looking_up = threading.local()
+        super().__init__(cache, *args, **kwargs)
+
+    @property
+    def cache(self):
+        return getattr(self._looking_up, 'cache', None) or self._cache
+
+    @cache.setter
+    def cache(self, cache):
+        self._cache = cache
+
+    def cached_request(self, request):
+        # the controller is shared by the session's threads, so only this thread's lookup sees the wrapped cache
+        self._looking_up.cache = _KeepingRevalidatable(self._cache)
+        try:
+            return super().cached_request(request)
+        finally:
+            del self._looking_up.cache
+
+
+class RecordingAdapter(CacheControlAdapter):
+    """
+    A CacheControl adapter that counts, per URL, how each cacheable request was answered.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._lock = threading.Lock()
+        self._counts: Dict[str, Counter] = defaultdict(Counter)
+
+    def build_response(self, request, response, from_cache=False, cacheable_methods=None):
+        not_modified = response.status == 304
+        resp = super().build_response(request, response, from_cache, cacheable_methods)
+        if request.method in (cacheable_methods or self.cacheable_methods):
+            if from_cache:
+                outcome = 'hits'
+            elif not_modified and resp.from_cache:
+                outcome = 'revalidated'
+            else:
+                outcome = 'misses'
+            with self._lock:
+                self._counts[request.url][outcome] += 1
+        return resp
+
+    def report(self) -> Dict[str, CacheCounts]:
+        with self._lock:
+            return {url: CacheCounts(**counts) for url, counts in self._counts.items()}
+
+
+atexit.register(SQLiteCache.close_shared)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=SQLiteCache._forget_shared)
@@ -77,15 +77,21 @@ class CSVWMapping:
         else:
             return URI(urljoin(root_uri + '/', relative, allow_fragments=True))
 
-    def set_csv(self, csv_filename: URI):
+    def set_csv(self, csv_filename: URI, compressed_url: bool = False):
+        """
+        Read the columns from a .csv or .csv.gz file. The table's url is the CSV a .csv.gz file decompresses to,
+        unless compressed_url is True, when it's the .csv.gz file itself.
+        """
 
         # csv and csv.gz need to be read in slightly different ways
         if str(csv_filename).endswith("csv"):
             with open(csv_filename, newline='', encoding='utf-8') as f:
                 self.set_input(csv_filename, f)
         elif str(csv_filename).endswith("csv.gz"):
-            with gzip.open(csv_filename, encoding='utf-8') as f:
+            with gzip.open(csv_filename, 'rt', newline='', encoding='utf-8') as f:
                 self.set_input(csv_filename, f)
+            if compressed_url:
+                self._csv_filename = csv_filename
         else:
             raise ValueError("Only csv types of .csv and /csv.gz are supported."
                     " Not {}".format(csv_filename))
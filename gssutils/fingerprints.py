@@ -0,0 +1,148 @@
+import json
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, IO, NamedTuple, Optional, Union
+
+from gssutils.scrape import Scraper, FilterError
+
+try:
+    import fcntl
+except ImportError:
+    # Windows
+    fcntl = None
+    import msvcrt
+
+
+class Fingerprint(NamedTuple):
+    """
+    What identifies the latest version of a dataset's data: when it was issued, where it's downloaded from and how
+    big it is, as far as the publisher tells us.
+    """
+    issued: Optional[str] = None
+    downloadURL: Optional[str] = None
+    byteSize: Optional[int] = None
+
+
+def fingerprint(scraper: Scraper) -> Optional[Fingerprint]:
+    """
+    The fingerprint of the scraper's latest distribution, or None if there are no distributions.
+    """
+    try:
+        distribution = scraper.distribution(latest=True)
+    except FilterError:
+        return None
+    issued = getattr(distribution, 'issued', None)
+    return Fingerprint(
+        issued=issued.isoformat() if hasattr(issued, 'isoformat') else issued,
+        downloadURL=getattr(distribution, 'downloadURL', None),
+        byteSize=getattr(distribution, 'byteSize', None)
+    )
+
+
+class FingerprintStore:
+    """
+    Keeps the fingerprint of each dataset's latest distribution, as of its last successful run, in a JSON file,
+    so that a pipeline can check whether anything has changed before downloading or transforming anything:
+
+        store = FingerprintStore()
+        if store.has_changed(scraper):
+            ...
+            store.record(scraper)
+
+    Datasets are keyed by the scraper's dataset id unless another id is given. Pipelines running at the same time
+    can share a store: fingerprints are read, and changes made, from the store as it is on disk, under a lock.
+    """
+
+    def __init__(self, path: Union[str, Path] = '.fingerprints.json'):
+        self.path = Path(path)
+        self.lock = threading.Lock()
+        self._fingerprints: Dict[str, dict] = {}
+
+    def _load(self) -> Dict[str, dict]:
+        if self.path.exists():
+            with open(self.path, encoding='utf-8') as f:
+                return json.load(f)
+        return {}
+
+    @contextmanager
+    def _locked(self):
+        """
+        Hold the store's lock, in this process and between processes, while the fingerprints are read again from
+        the file, and used or changed and saved. The lock is on a file of its own, as saving replaces the store's
+        file.
+        """
+        with self.lock, open(self.path.with_name(f'{self.path.name}.lock'), 'a+') as lock_file:
+            _lock(lock_file)
+            try:
+                self._fingerprints = self._load()
+                yield self._fingerprints
+            finally:
+                _unlock(lock_file)
+
+    def get(self, dataset_id: str) -> Optional[Fingerprint]:
+        with self._locked() as fingerprints:
+            recorded = fingerprints.get(dataset_id)
+        if recorded is None:
+            return None
+        return Fingerprint(recorded.get('issued'), recorded.get('downloadURL'), recorded.get('byteSize'))
+
+    def has_changed(self, scraper: Scraper, dataset_id: Optional[str] = None) -> bool:
+        """
+        Whether the scraper's latest distribution differs from the one recorded for the dataset. Datasets that have
+        never been recorded, or that have no distributions to compare, count as changed.
+        """
+        current = fingerprint(scraper)
+        if current is None:
+            return True
+        return current != self.get(dataset_id if dataset_id is not None else scraper._dataset_id)
+
+    def record(self, scraper: Scraper, dataset_id: Optional[str] = None):
+        """
+        Record the fingerprint of the scraper's latest distribution, after a successful run.
+        """
+        current = fingerprint(scraper)
+        if current is None:
+            raise ValueError('Aborting. The scraper has no distributions to fingerprint.')
+        with self._locked() as fingerprints:
+            fingerprints[dataset_id if dataset_id is not None else scraper._dataset_id] = {
+                **current._asdict(),
+                'recorded': datetime.now(timezone.utc).isoformat()
+            }
+            self._save()
+
+    def forget(self, dataset_id: str):
+        with self._locked() as fingerprints:
+            if fingerprints.pop(dataset_id, None) is not None:
+                self._save()
+
+    def _save(self):
+        # write then rename, so an interrupted run never leaves a truncated store
+        partial = self.path.with_name(f'{self.path.name}.{os.getpid()}.part')
+        with open(partial, 'w', encoding='utf-8') as f:
+            json.dump(self._fingerprints, f, indent=2, sort_keys=True)
+        os.replace(partial, self.path)
+
+
+def _lock(lock_file: IO):
+    if fcntl is not None:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        return
+    # msvcrt locks bytes from the current position, and gives up after ten seconds, so keep trying
+    lock_file.seek(0)
+    while True:
+        try:
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+            return
+        except OSError:
+            continue
+
+
+def _unlock(lock_file: IO):
+    if fcntl is not None:
+        fcntl.flock(lock_file, fcntl.LOCK_UN)
+        return
+    lock_file.seek(0)
+    msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
@@ -0,0 +1,82 @@
+"""
+Command line utilities for gssutils.
+
+Call with `--help` arg for further instructions.
+"""
+
+import argparse
+from pathlib import Path
+
+from gssutils.cache import SQLiteCache
+from gssutils.transform.frame_cache import FrameCache
+
+
+def cache_command(args):
+    if not Path(args.path).is_file():
+        print(f'{args.path}: there is no cache here.')
+        return
+    cache = SQLiteCache(args.path)
+    if args.action == 'prune':
+        max_size = args.max_size * 1000 * 1000 if args.max_size is not None else None
+        max_age = args.max_age * 24 * 60 * 60 if args.max_age is not None else None
+        removed = cache.prune(max_size=max_size, max_age=max_age)
+        print(f'Removed {removed} cached responses.')
+        removed = cache.prune_bodies(args.bodies)
+        print(f'Removed {removed} unused response bodies from {args.bodies}.')
+    stats = cache.stats()
+    print(f"{args.path}: {stats['responses']} cached responses, {stats['size'] / 1000 / 1000:.1f}MB of responses "
+          f"in a {stats['file_size'] / 1000 / 1000:.1f}MB file.")
+    if stats['oldest'] is not None:
+        print(f"Oldest response cached {stats['oldest']:%Y-%m-%d %H:%M}, newest {stats['newest']:%Y-%m-%d %H:%M}.")
+    cache.close()
+
+
+def frames_command(args):
+    frame_cache = FrameCache(args.path)
+    if args.action == 'clear':
+        frame_cache.clear()
+        print(f'Removed all cached dataframes from {args.path}.')
+    else:
+        max_size = args.max_size * 1000 * 1000 if args.max_size is not None else None
+        max_age = args.max_age * 24 * 60 * 60 if args.max_age is not None else None
+        removed = frame_cache.prune(max_size=max_size, max_age=max_age)
+        print(f'Removed {removed} cached distributions from {args.path}.')
+
+
+def main():
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(prog='gssutils')
+    subparsers = parser.add_subparsers(dest='command')
+
+    cache_parser = subparsers.add_parser('cache', help='Inspect or prune the scrapers\' HTTP cache.')
+    cache_parser.add_argument('action', choices=['stats', 'prune'])
+    cache_parser.add_argument('-p', '--path', help='The SQLite cache file.', type=str, default='.cache.sqlite')
+    cache_parser.add_argument('-b', '--bodies', help='The directory holding large cached response bodies.',
+                              type=str, default='.cache.bodies')
+    cache_parser.add_argument('-s', '--max-size', help='When pruning, evict least recently used responses until '
+                                                       'the cache is no bigger than this many MB.',
+                              type=int, default=None)
+    cache_parser.add_argument('-a', '--max-age', help='When pruning, remove responses cached more than this many '
+                                                      'days ago.',
+                              type=float, default=None)
+    cache_parser.set_defaults(func=cache_command)
+
+    frames_parser = subparsers.add_parser('frames', help='Prune or clear the cache of parsed distributions.')
+    frames_parser.add_argument('action', choices=['prune', 'clear'])
+    frames_parser.add_argument('-p', '--path', help='The cache directory.', type=str, default='.cache.frames')
+    frames_parser.add_argument('-s', '--max-size', help='When pruning, remove least recently used distributions '
+                                                        'until the cache is no bigger than this many MB.',
+                               type=int, default=None)
+    frames_parser.add_argument('-a', '--max-age', help='When pruning, remove distributions not used for this many '
+                                                       'days.',
+                               type=float, default=None)
+    frames_parser.set_defaults(func=frames_command)
+
+    args = parser.parse_args()
+    if args.command is None:
+        parser.print_help()
+        exit()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,10 @@
 import collections
 import html
 from enum import Enum
-from inspect import getmro
 
 from rdflib import RDFS, Literal, BNode, URIRef, RDF
 from rdflib.term import Identifier
-from typing import List, Optional
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
 
 from gssutils.metadata import namespaces
 
@@ -17,9 +16,18 @@ class Status(Enum):
 
 
 class Resource:
-
-    def __init__(self):
-        self._uri: Identifier = BNode()
+    # Metadata properties are kept in the instance dictionary, see Metadata, and everything else in slots where a
+    # subclass, such as dcat.Distribution, declares them.
+    __slots__ = ('_uri', '__dict__', '__weakref__')
+
+    def __getattr__(self, name):
+        # Only called when the attribute isn't set. The blank node standing in for the URI is nearly always replaced,
+        # so is only made when it's first needed.
+        if name == '_uri':
+            node = BNode()
+            object.__setattr__(self, name, node)
+            return node
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
 
     @property
     def uri(self) -> str:
@@ -31,6 +39,7 @@ class Resource:
 
 
 class Metadata(Resource):
+    __slots__ = ()
 
     _core_properties = ['uri', '_uri', '_containing_graph', '_seed']
     _properties_metadata = {
@@ -38,11 +47,40 @@ class Metadata(Resource):
         'comment': (RDFS.comment, Status.mandatory, lambda s: Literal(s, 'en'))
     }
 
+    # Built from _type and _properties_metadata for each class as it's defined, see _compile_plan()
+    _rdf_types: Tuple[URIRef, ...] = ()
+    _serialisation_plan: Dict[str, Tuple[URIRef, Callable]] = {}
+
     def __init__(self):
         super().__init__()
-        self._containing_graph: Identifier = BNode()
         self._seed: Optional[dict] = None
 
+    def __getattr__(self, name):
+        # As for the URI, the blank node standing in for the graph is only made when it's first needed
+        if name == '_containing_graph':
+            node = BNode()
+            object.__setattr__(self, name, node)
+            return node
+        return super().__getattr__(name)
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._compile_plan()
+
+    @classmethod
+    def _compile_plan(cls):
+        """
+        Work out once for the class what quads() would otherwise work out for every object: its most specific
+        declared type(s), and the predicate and converter for each property, keyed by attribute name.
+        """
+        rdf_type = getattr(cls, '_type', None)
+        if rdf_type is None:
+            cls._rdf_types = ()
+        else:
+            cls._rdf_types = rdf_type if type(rdf_type) == tuple else (rdf_type,)
+        cls._serialisation_plan = {local_name: (prop, f)
+                                   for local_name, (prop, status, f) in cls._properties_metadata.items()}
+
     def get_containing_graph(self):
         """
         The graph URI which this object's triples are to be stored in.
@@ -85,24 +123,40 @@ class Metadata(Resource):
     def _as_list(self, local_name: str) -> List[str]:
         return (lambda x: x if type(x) == list else [x])(self.__dict__[local_name])
 
+    def quads(self, seen: Optional[Set[int]] = None) -> Iterator[Tuple[Identifier, Identifier, Identifier, Identifier]]:
+        """
+        The (subject, predicate, object, graph) quads describing this object, followed by those of each Metadata
+        object it refers to, and so on, each object only once. seen holds the ids of the objects already done.
+        """
+        if seen is None:
+            seen = set()
+        seen.add(id(self))
+        subject, graph = self._uri, self._containing_graph
+        for rdf_type in self._rdf_types:
+            yield subject, RDF.type, rdf_type, graph
+        plan = self._serialisation_plan
+        referenced = []
+        # only the properties that are set, in the order they were set
+        for local_name, value in self.__dict__.items():
+            step = plan.get(local_name)
+            if step is None:
+                continue
+            prop, f = step
+            for obj in value if type(value) == list else (value,):
+                yield subject, prop, f(obj), graph
+                if isinstance(obj, Metadata) and id(obj) not in seen:
+                    seen.add(id(obj))
+                    referenced.append(obj)
+        # after this object's own quads, so that they can be written out together
+        for obj in referenced:
+            yield from obj.quads(seen)
+
     def add_to_dataset(self, dataset):
-        graph = dataset.graph(self._containing_graph)
-        for c in getmro(type(self)):
-            if hasattr(c, '_type'):
-                if type(c._type) == tuple:
-                    for t in c._type:
-                        graph.add((self._uri, RDF.type, t))
-                else:
-                    graph.add((self._uri, RDF.type, c._type))
-                break  # Only add the most specific declared type(s).
-        for local_name, profile in self._properties_metadata.items():
-            if local_name in self.__dict__:
-                prop, status, f = profile
-                v = self.__dict__[local_name]
-                for obj in self._as_list(local_name):
-                    graph.add((self._uri, prop, f(obj)))
-                    if isinstance(obj, Metadata):
-                        obj.add_to_dataset(dataset)
+        graphs = {}
+        for s, p, o, g in self.quads():
+            if g not in graphs:
+                graphs[g] = dataset.graph(g)
+            graphs[g].add((s, p, o))
 
     def _repr_html_(self):
         s = f'<h3>{type(self).__name__}</h3>\n<dl>'
@@ -117,4 +171,7 @@ class Metadata(Resource):
                     else:
                         s = s + f'<dd>{html.escape(term.n3())}</dd>\n'
         s = s + '</dl>'
-        return s
\ No newline at end of file
+        return s
+
+
+Metadata._compile_plan()
\ No newline at end of file
@@ -1,7 +1,6 @@
 
 from rdflib import URIRef, Literal, XSD
 from rdflib.namespace import DCTERMS, FOAF
-from typing import Optional
 
 from gssutils.metadata import DCAT, PROV, ODRL
 from gssutils.metadata.base import Metadata, Status
@@ -86,8 +85,22 @@ class CatalogRecord(Metadata):
     })
 
 
+class ChangeCounter:
+    """
+    Counts the changes made to the metadata of a scraper's distributions, so that the scraper's DistributionIndex
+    knows when to rebuild.
+    """
+    __slots__ = ('count',)
+
+    def __init__(self):
+        self.count = 0
+
+
 class Distribution(Metadata, Downloadable):
-    _core_properties = Metadata._core_properties + ['_session', '_seed', '_mediaType']
+    # Scrapers can make thousands of these, so everything but the metadata itself is kept in slots rather than in
+    # the instance dictionary, with the URI, see Resource.
+    __slots__ = ('_containing_graph', '_seed', '_session', '_mediaType', '_frame_cache', '_changes')
+    _core_properties = Metadata._core_properties + ['_session', '_seed', '_mediaType', '_frame_cache', '_changes']
     _type = DCAT.Distribution
     _properties_metadata = dict(Metadata._properties_metadata)
     _properties_metadata.update({
@@ -116,11 +129,16 @@ class Distribution(Metadata, Downloadable):
         super().__init__()
         self._session = scraper.session
         self._seed = scraper.seed
-        self._mediaType: Optional[str] = None
+        self._frame_cache = scraper.frame_cache
+        self._changes = getattr(scraper, '_distribution_changes', None) or ChangeCounter()
 
     def __setattr__(self, key, value):
-        if key == 'downloadURL':
-            self.uri = value
-        elif key == 'mediaType':
-            self._mediaType = value
-        super().__setattr__(key, value)
\ No newline at end of file
+        if key in self._properties_metadata:
+            if key == 'downloadURL':
+                object.__setattr__(self, '_uri', URIRef(value))
+            elif key == 'mediaType':
+                object.__setattr__(self, '_mediaType', value)
+            self.__dict__[key] = value
+            self._changes.count += 1
+        else:
+            super().__setattr__(key, value)
\ No newline at end of file
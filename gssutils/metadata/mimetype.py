@@ -1,3 +1,5 @@
+from typing import Optional
+
 ODS = 'application/vnd.oasis.opendocument.spreadsheet'
 Excel = 'application/vnd.ms-excel'
 ExcelOpenXML = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
@@ -5,4 +7,23 @@ ExcelTypes = (Excel, ExcelOpenXML)
 ZIP = 'application/zip'
 PDF = 'application/pdf'
 CSV = 'text/csv'
-CSDB = 'text/prs.ons+csdb'
\ No newline at end of file
+CSDB = 'text/prs.ons+csdb'
+# The media types of the files we know how to read, by their extension
+EXTENSIONS = {
+    '.xls': Excel,
+    '.xlsx': ExcelOpenXML,
+    '.ods': ODS,
+    '.csv': CSV,
+    '.csdb': CSDB,
+    '.zip': ZIP
+}
+
+
+def from_filename(name: str) -> Optional[str]:
+    """
+    The media type of a file or URL going by its extension, or None if it's not one of ours.
+    """
+    for extension, media_type in EXTENSIONS.items():
+        if name.lower().endswith(extension):
+            return media_type
+    return None
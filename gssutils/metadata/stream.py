@@ -0,0 +1,57 @@
+"""
+Write metadata out as N-Quads or TriG as it's walked, straight to a file, rather than first adding every triple to
+an rdflib Dataset and serialising that, which is slow and takes a lot of memory for catalogs with thousands of
+distributions.
+"""
+
+from typing import Iterable, TextIO, Tuple
+
+from rdflib import RDF, Literal
+from rdflib.term import Identifier
+
+Quad = Tuple[Identifier, Identifier, Identifier, Identifier]
+
+# N-Quads literals are on one line, unlike the long strings Turtle and TriG allow
+_ESCAPES = str.maketrans({'\\': '\\\\', '"': '\\"', '\n': '\\n', '\r': '\\r'})
+
+
+def _nquads_term(term: Identifier) -> str:
+    if isinstance(term, Literal):
+        quoted = f'"{str(term).translate(_ESCAPES)}"'
+        if term.language is not None:
+            return f'{quoted}@{term.language}'
+        if term.datatype is not None:
+            return f'{quoted}^^{term.datatype.n3()}'
+        return quoted
+    return term.n3()
+
+
+def write_nquads(quads: Iterable[Quad], out: TextIO):
+    for s, p, o, g in quads:
+        out.write(f'{s.n3()} {p.n3()} {_nquads_term(o)} {g.n3()} .\n')
+
+
+def write_trig(quads: Iterable[Quad], out: TextIO):
+    """
+    Each run of quads in the same graph is written as a graph block, with the predicates of each run of triples
+    about the same subject listed together. Only full IRIs are used, so that there are no prefixes to work out
+    before writing. The same graph may have more than one block, which TriG allows.
+    """
+    graph = None
+    subject = None
+    for s, p, o, g in quads:
+        if g != graph:
+            if graph is not None:
+                out.write(' .\n}\n\n')
+            out.write(f'{g.n3()} {{\n')
+            graph, subject = g, None
+        if s != subject:
+            if subject is not None:
+                out.write(' .\n')
+            out.write(f'    {s.n3()} ')
+            subject = s
+        else:
+            out.write(' ;\n        ')
+        out.write(f'{"a" if p == RDF.type else p.n3()} {o.n3()}')
+    if graph is not None:
+        out.write(' .\n}\n')
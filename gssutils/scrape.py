@@ -1,14 +1,18 @@
 import json
 import logging
 import os
-from datetime import datetime, timezone
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timezone
+from pathlib import Path
+from time import perf_counter
+from typing import Dict, List, NamedTuple, Optional, Union, Iterable, TextIO
 from urllib.parse import urljoin, urlparse
 
 import html2text
-import msgpack
 import requests
-from cachecontrol import CacheControl, serialize
-from cachecontrol.caches.file_cache import FileCache
+from cachecontrol import CacheControl
+from cachecontrol.cache import BaseCache
 from cachecontrol.heuristics import LastModified
 from dateutil.parser import parse
 from lxml import html
@@ -16,20 +20,33 @@ from rdflib import BNode, URIRef
 from rdflib.graph import Dataset as RDFDataset
 
 import gssutils.scrapers
+from gssutils.cache import SQLiteCache, BiggerSerializer, CacheCounts, RecordingAdapter, RevalidatingController
 from gssutils.metadata import namespaces, dcat, pmdcat, mimetype, GOV, GDP
+from gssutils.metadata.stream import write_nquads, write_trig
+from gssutils.transform.frame_cache import FrameCache
+from gssutils.transport import Transport
 from gssutils.utils import pathify, ensure_list
 
 
-class BiggerSerializer(serialize.Serializer):
-
-    def _loads_v4(self, request, data):
-        try:
-            cached = msgpack.loads(
-                data, raw=False, max_bin_len=100 * 1000 * 1000)  # 100MB
-        except ValueError:
-            return
+def default_session(cache: BaseCache = None) -> requests.Session:
+    """
+    The cached session used by scrapers when one isn't given, by default storing responses in .cache.sqlite,
+    through the one connection shared by every default session in the process, with large response bodies
+    alongside in .cache.bodies. Stale responses are revalidated with If-None-Match or If-Modified-Since requests,
+    and the outcome of each request is counted, see Scraper.cache_report().
 
-        return self.prepare_response(request, cached)
+    Responses used to be kept one file each in the .cache directory, which is no longer read. To keep using it,
+    pass cache=FileCache('.cache'); otherwise it can be deleted.
+    """
+    if cache is None and os.path.isdir('.cache') and not os.path.exists('.cache.sqlite'):
+        logging.warning('Responses are now cached in .cache.sqlite, so those cached in .cache will be fetched again. '
+                        "Pass default_session(FileCache('.cache')) to keep using it, otherwise it can be deleted.")
+    return CacheControl(requests.Session(),
+                        cache=cache if cache is not None else SQLiteCache.shared('.cache.sqlite'),
+                        serializer=BiggerSerializer(body_dir='.cache.bodies'),
+                        heuristic=LastModified(),
+                        controller_class=RevalidatingController,
+                        adapter_class=RecordingAdapter)
 
 
 class FilterError(Exception):
@@ -40,6 +57,135 @@ class FilterError(Exception):
         self.message = message
 
 
+# Stands in for a property that isn't set, which could otherwise be None
+_UNSET = object()
+
+
+class DistributionIndex:
+    """ Finds distributions, or anything else with metadata such as datasets, by their metadata.
+
+    Each property filtered on is indexed the first time it's used, as a hash from value to the positions of the
+    things with that value, and distributions are sorted by issued date for issued_between(). Filters on the same
+    list are then answered without scanning every distribution again. Filters that are functions are only called
+    on the things matching all the other filters.
+    """
+
+    def __init__(self, things: List, changes: Optional[dcat.ChangeCounter] = None):
+        self.things = things
+        self._snapshot = list(things)
+        self._changes = changes
+        self._count = changes.count if changes is not None else None
+        self._by_value: Dict[str, Optional[Dict]] = {}
+        self._by_issued: Optional[List] = None
+
+    def is_current(self, things: List) -> bool:
+        """ Whether the index still describes the list of things given: the same list, with as many things in it,
+        and none of their metadata changed since it was built, as counted by the ChangeCounter the index was given.
+        Without one, the index is never current. Things rearranged within the list aren't noticed.
+        """
+        return things is self.things and len(things) == len(self._snapshot) and \
+            self._changes is not None and self._changes.count == self._count
+
+    def _positions(self, key, value) -> Iterable[int]:
+        if key not in self._by_value:
+            index = {}
+            try:
+                for i, thing in enumerate(self._snapshot):
+                    thing_value = getattr(thing, key, _UNSET)
+                    if thing_value is not _UNSET:
+                        index.setdefault(thing_value, []).append(i)
+            except TypeError:
+                index = None  # some values can't be hashed, e.g. lists, so compare each in turn
+            self._by_value[key] = index
+        index = self._by_value[key]
+        if index is not None:
+            try:
+                return index.get(value, [])
+            except TypeError:
+                pass
+        return [i for i, thing in enumerate(self._snapshot) if getattr(thing, key, _UNSET) == value]
+
+    def filter_many(self, **kwargs) -> List:
+        """ All the things matching every filter, in the order they were listed. Each keyword argument is a
+        property and either the value it should have, or a function of its value returning whether it matches.
+        """
+        candidates = None
+        for key, value in kwargs.items():
+            if not callable(value):
+                positions = set(self._positions(key, value))
+                candidates = positions if candidates is None else candidates & positions
+        matches = [self._snapshot[i] for i in (range(len(self._snapshot)) if candidates is None
+                                               else sorted(candidates))]
+        for key, value in kwargs.items():
+            if callable(value):
+                matches = [thing for thing in matches if value(getattr(thing, key))]
+        return matches
+
+    def filter_one(self, latest: bool = False, **kwargs):
+        """ The one thing matching the filters, see filter_many(). If there's more than one and latest is True,
+        the one most recently issued, raising FilterError otherwise, or if there's none.
+        """
+        matches = self.filter_many(**kwargs)
+        if len(matches) > 1:
+            if latest:
+                issued = [self._as_datetime(d.issued) if hasattr(d, 'issued') else None for d in matches]
+                if None in issued:
+                    return matches[0]  # assume the publisher lists distributions in order of most to least recent.
+                else:
+                    return matches[issued.index(max(issued))]
+            else:
+                raise FilterError('more than one match for given filter(s)')
+        elif len(matches) == 0:
+            raise FilterError('nothing matches given filter(s)')
+        else:
+            return matches[0]
+
+    def latest(self, **kwargs):
+        return self.filter_one(latest=True, **kwargs)
+
+    @staticmethod
+    def _as_datetime(issued) -> Optional[datetime]:
+        """ issued as a timezone aware UTC date time, or None if it can't be read as one. Scrapers give dates,
+        naive and timezone aware date times, and strings, which can't be compared with each other as they are.
+        Dates and naive date times are taken to be in UTC.
+        """
+        if isinstance(issued, str):
+            try:
+                issued = parse(issued)
+            except (ValueError, OverflowError):
+                return None
+        if isinstance(issued, datetime):
+            return issued.replace(tzinfo=timezone.utc) if issued.tzinfo is None else issued.astimezone(timezone.utc)
+        if isinstance(issued, date):
+            return datetime.combine(issued, datetime.min.time(), tzinfo=timezone.utc)
+        return None
+
+    def _bound(self, when) -> datetime:
+        bound = self._as_datetime(when)
+        if bound is None:
+            raise ValueError(f'Unable to compare issued dates with {when!r}.')
+        return bound
+
+    def issued_between(self, start=None, end=None) -> List:
+        """ The things issued from start up to but not including end, either of which can be left out, in the
+        order they were issued. Things without an issued date, or with one that can't be read, are left out.
+        """
+        if self._by_issued is None:
+            self._by_issued = []
+            for i, thing in enumerate(self._snapshot):
+                if hasattr(thing, 'issued'):
+                    issued = self._as_datetime(thing.issued)
+                    if issued is None:
+                        logging.warning(f'Leaving out {getattr(thing, "title", thing)!r}, as its issued date '
+                                        f'{thing.issued!r} can\'t be read.')
+                    else:
+                        self._by_issued.append((issued, i))
+            self._by_issued.sort()
+        low = 0 if start is None else bisect_left(self._by_issued, (self._bound(start), -1))
+        high = len(self._by_issued) if end is None else bisect_left(self._by_issued, (self._bound(end), -1))
+        return [self._snapshot[i] for _, i in self._by_issued[low:high]]
+
+
 class MetadataError(Exception):
     """ Raised when there is an issue with a provided metadata seed
     """
@@ -48,9 +194,19 @@ class MetadataError(Exception):
         self.message = message
 
 
+class ScrapeResult(NamedTuple):
+    """ The outcome of one scrape from Scraper.scrape_many()
+    """
+    uri: str
+    scraper: Optional['Scraper'] = None
+    error: Optional[Exception] = None
+    seconds: float = 0.0
+
+
 class Scraper:
 
-    def __init__(self, uri: str = None, session: requests.Session = None, seed: str = None):
+    def __init__(self, uri: str = None, session: requests.Session = None, seed: str = None,
+                 transport: Transport = None, frame_cache: FrameCache = None):
 
         # Airtable and gssutils are using slightly different field names....
         self.meta_field_mapping = {
@@ -79,14 +235,21 @@ class Scraper:
         self.catalog = dcat.Catalog()
         self.dataset.modified = datetime.now(timezone.utc).astimezone()
         self.distributions = []
+        self._distribution_changes = dcat.ChangeCounter()
+        self._distribution_index: Optional[DistributionIndex] = None
 
         if session:
             self.session = session
+        elif transport is not None:
+            self.session = transport.session
         else:
-            self.session = CacheControl(requests.Session(),
-                                        cache=FileCache('.cache'),
-                                        serializer=BiggerSerializer(),
-                                        heuristic=LastModified())
+            self.session = default_session()
+
+        # Scrapers use the transport to batch up sub-requests, e.g. an AsyncTransport
+        self.transport = transport if transport is not None else Transport(self.session)
+
+        # If given, the distributions' as_pandas() results are kept here between runs
+        self.frame_cache = frame_cache
 
         if 'JOB_NAME' in os.environ:
             self._base_uri = URIRef('http://gss-data.org.uk')
@@ -98,6 +261,36 @@ class Scraper:
         self.update_dataset_uris()
         self._run()
 
+    @classmethod
+    def scrape_many(cls, uris_or_seeds: Iterable[Union[str, Path]], workers: int = 8,
+                    session: requests.Session = None) -> List[ScrapeResult]:
+        """
+        Scrape many landing pages at the same time, sharing one cached session between them.
+        Strings starting http:// or https:// are treated as landing page URIs, anything else as the path to a seed.
+        Returns a ScrapeResult for each, in the order given, holding either the scraper or the exception raised
+        and how long the scrape took.
+        """
+        if session is None:
+            session = default_session()
+        transport = Transport(session)
+
+        def scrape_one(uri_or_seed):
+            start = perf_counter()
+            try:
+                if str(uri_or_seed).startswith(('http://', 'https://')):
+                    scraper = cls(str(uri_or_seed), session=session, transport=transport)
+                else:
+                    scraper = cls(seed=str(uri_or_seed), session=session, transport=transport)
+                result = ScrapeResult(str(uri_or_seed), scraper=scraper, seconds=perf_counter() - start)
+            except Exception as err:
+                result = ScrapeResult(str(uri_or_seed), error=err, seconds=perf_counter() - start)
+                logging.warning(f'Failed to scrape {uri_or_seed}: {err!r}')
+            logging.info(f'Scraping {uri_or_seed} took {result.seconds:.2f}s')
+            return result
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(scrape_one, uris_or_seeds))
+
     def _repr_markdown_(self):
         md = ""
         if hasattr(self.catalog, 'dataset') and len(self.catalog.dataset) > 1 and len(self.distributions) == 0:
@@ -153,17 +346,16 @@ class Scraper:
             tree = html.fromstring(page.text)
             
             # Look for a scraper based on the uri
-            for start_uri, scrape in gssutils.scrapers.scraper_list:
-                if self.uri.startswith(start_uri):
+            scrape = gssutils.scrapers.scraper_registry.lookup(self.uri)
+            if scrape is not None:
 
-                    # Scrape
-                    scrape(self, tree)
-                    scraped = True
+                # Scrape
+                scrape(self, tree)
+                scraped = True
 
-                    # If we have a seed..
-                    if self.seed is not None:
-                        self._populate_missing_metadata()  # Plug any metadata gaps
-                    break
+                # If we have a seed..
+                if self.seed is not None:
+                    self._populate_missing_metadata()  # Plug any metadata gaps
 
         if not scraped:
             raise NotImplementedError(f'No scraper for {self.uri} and insufficient seed metadata passed.')
@@ -205,16 +397,9 @@ class Scraper:
             # NOTE - Don't EVER add a fallback for downloadURL or issued here!! this is a specific safety
             # to stop us "temporary scraping" and publishing new data with old metadata
             if hasattr(distribution, 'downloadURL') and not hasattr(distribution, 'mediaType'):
-                if distribution.downloadURL.lower().endswith(".xls"):
-                    distribution.mediaType = mimetype.Excel
-                elif distribution.downloadURL.lower().endswith(".xlsx"):
-                    distribution.mediaType = mimetype.ExcelOpenXML
-                elif distribution.downloadURL.lower().endswith(".ods"):
-                    distribution.mediaType = mimetype.ODS
-                elif distribution.downloadURL.lower().endswith(".csv"):
-                    distribution.mediaType = mimetype.CSV
-                elif distribution.downloadURL.lower().endswith(".zip"):
-                    distribution.mediaType = mimetype.ZIP
+                media_type = mimetype.from_filename(distribution.downloadURL)
+                if media_type is not None:
+                    distribution.mediaType = media_type
                 else:
                     logging.warning("Unable to find mediaType for distribution")
                 
@@ -307,24 +492,7 @@ class Scraper:
 
     @staticmethod
     def _filter_one(things, **kwargs):
-        latest = kwargs.pop('latest', False)
-        matches = [
-            d for d in things if all(
-                [v(d.__dict__[k]) if callable(v) else (hasattr(d, k) and d.__dict__[k] == v)
-                 for k, v in kwargs.items()]
-            )]
-        if len(matches) > 1:
-            if latest:
-                if len([d for d in matches if not hasattr(d, 'issued')]) > 0:
-                    return matches[0]  # assume the publisher lists distributions in order of most to least recent.
-                else:
-                    return max(matches, key=lambda d: d.issued)
-            else:
-                raise FilterError('more than one match for given filter(s)')
-        elif len(matches) == 0:
-            raise FilterError('nothing matches given filter(s)')
-        else:
-            return matches[0]
+        return DistributionIndex(things).filter_one(**kwargs)
 
     def select_dataset(self, **kwargs):
         dataset = self._filter_one(self.catalog.dataset, **kwargs)
@@ -336,8 +504,34 @@ class Scraper:
         self.update_dataset_uris()
         self.distributions = dataset.distribution
 
+    @property
+    def distribution_index(self) -> DistributionIndex:
+        """ The index of this scraper's distributions, rebuilt if they've changed since it was last used.
+        """
+        if self._distribution_index is None or not self._distribution_index.is_current(self.distributions):
+            self._distribution_index = DistributionIndex(self.distributions, self._distribution_changes)
+        return self._distribution_index
+
     def distribution(self, **kwargs):
-        return self._filter_one(self.distributions, **kwargs)
+        return self.distribution_index.filter_one(**kwargs)
+
+    def distributions_issued_between(self, start=None, end=None) -> List[dcat.Distribution]:
+        return self.distribution_index.issued_between(start, end)
+
+    def cache_report(self) -> Dict[str, CacheCounts]:
+        """
+        For each URL requested through this scraper's session, how many times the response came straight from the
+        cache (hits), from the server (misses) or from the cache once the server had said it was unchanged with a
+        304 (revalidated). A distribution that has been downloaded with only revalidated or hit responses hasn't
+        changed since it was last cached.
+        Sessions that don't count requests, i.e. not made by default_session(), give an empty report.
+        The counts are kept by the session, not the scraper, so scrapers sharing a session, such as those from
+        scrape_many(), each report every request made through it.
+        """
+        adapter = self.session.get_adapter('https://')
+        if isinstance(adapter, RecordingAdapter):
+            return adapter.report()
+        return {}
 
     def set_base_uri(self, uri):
         self._base_uri = uri
@@ -361,7 +555,7 @@ class Scraper:
     def set_description(self, description):
         self.dataset.description = description
 
-    def as_quads(self, catalog_id=None):
+    def _catalog(self, catalog_id=None) -> dcat.Catalog:
         catalog = dcat.Catalog()
         if catalog_id is not None:
             catalog.uri = urljoin(self._base_uri, catalog_id)
@@ -386,14 +580,30 @@ class Scraper:
         self.dataset.datasetContents.set_containing_graph(metadata_graph)
         self.dataset.datasetContents.uri = urljoin(self._base_uri, f'data/{self._dataset_id}#dataset')
         self.dataset.sparqlEndpoint = urljoin(self._base_uri, '/sparql')
+        return catalog
+
+    def as_quads(self, catalog_id=None):
         quads = RDFDataset()
         quads.namespace_manager = namespaces
-        catalog.add_to_dataset(quads)
+        self._catalog(catalog_id).add_to_dataset(quads)
         return quads
 
     def generate_trig(self, catalog_id=None):
         return self.as_quads(catalog_id).serialize(format='trig')
 
+    def write_trig(self, out: TextIO, catalog_id=None):
+        """
+        Write the catalog metadata to out as TriG as it's gathered, without building an rdflib Dataset first as
+        generate_trig() does. The triples are the same, but written out in full, without prefixes.
+        """
+        write_trig(self._catalog(catalog_id).quads(), out)
+
+    def write_nquads(self, out: TextIO, catalog_id=None):
+        """
+        Write the catalog metadata to out as N-Quads as it's gathered, like write_trig().
+        """
+        write_nquads(self._catalog(catalog_id).quads(), out)
+
     @property
     def title(self):
         return self.dataset.title
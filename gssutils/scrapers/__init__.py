@@ -1,5 +1,6 @@
 from gssutils.scrapers import ons, onscmd, govuk, nrscotland, nisra, hmrc, ni_govuk, isd_scotland, nhs_digital, statswales,\
     govscot, dcni, govwales, lcc
+from gssutils.scrapers.registry import ENTRY_POINT_GROUP, ScraperRegistry
 
 scraper_list = [
     ('https://api.beta.ons.gov.uk', onscmd.scrape),
@@ -25,3 +26,6 @@ scraper_list = [
     ('https://www.lowcarboncontracts.uk/data-portal/dataset', lcc.scrape),
     ('https://www.gov.uk/guidance', govuk.content_api)
 ]
+
+# Scraper._run looks up scrapers for a URI here, by longest matching prefix, including any registered by plugins
+scraper_registry = ScraperRegistry(scraper_list, entry_point_group=ENTRY_POINT_GROUP)
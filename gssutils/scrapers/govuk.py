@@ -60,34 +60,36 @@ def content_api_collection(scraper, metadata):
             if len(orgs) > 1:
                 logging.warning('More than one organisation listed, taking the first.')
             scraper.catalog.publisher = orgs[0]["web_url"]
-    scraper.catalog.dataset = []
+    docs = []
     if 'details' in metadata and 'collection_groups' in metadata['details'] and \
             'links' in metadata and 'documents' in metadata['links']:
         for group in metadata['details']['collection_groups']:
             if 'documents' in group:
-                group_docs = [
+                docs.extend(
                     doc for doc in metadata['links']['documents']
                     if 'content_id' in doc and doc['content_id'] in group['documents']
-                ]
-                for doc in group_docs:
-                    ds = content_api_publication(scraper, doc)
-                    scraper.catalog.dataset.append(ds)
+                )
     elif 'links' in metadata and 'documents' in metadata['links']:
-        for doc in metadata['links']['documents']:
-            if 'schema_name' in doc and doc['schema_name'] == 'publication':
-                ds = content_api_publication(scraper, doc)
-                scraper.catalog.dataset.append(ds)
+        docs = [doc for doc in metadata['links']['documents']
+                if 'schema_name' in doc and doc['schema_name'] == 'publication']
+    # Get each document's details up front, all at once and each only once, then work through them in order
+    api_urls = list(dict.fromkeys(doc['api_url'] for doc in docs if 'api_url' in doc))
+    doc_infos = dict(zip(api_urls, (r.json() for r in scraper.transport.get_many(api_urls))))
+    scraper.catalog.dataset = [
+        content_api_publication(scraper, doc, doc_infos.get(doc.get('api_url'))) for doc in docs
+    ]
 
 
-def content_api_publication(scraper, metadata):
+def content_api_publication(scraper, metadata, doc_info=None):
     ds = Dataset(scraper.uri)
     if 'title' in metadata:
         ds.title = metadata['title']
     if 'description' in metadata:
         ds.description = metadata['description']
-    if 'api_url' in metadata:
+    # doc_info is given when it's already been fetched, along with the rest of a collection
+    if doc_info is None and 'api_url' in metadata:
         doc_info = scraper.session.get(metadata['api_url']).json()
-    else:
+    elif doc_info is None:
         doc_info = metadata
     if 'first_published_at' in doc_info:
         ds.issued = datetime.fromisoformat(doc_info['first_published_at'])
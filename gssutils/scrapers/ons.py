@@ -167,11 +167,16 @@ def handler_dataset_landing_page(scraper, landing_page, tree):
     # A dataset landing page has uri's to one or more datasets via it's "datasets" field.
     # We need to look at each in turn, this is an example one as json:
     # https://www.ons.gov.uk//businessindustryandtrade/internationaltrade/datasets/uktradeingoodsbyclassificationofproductbyactivity/current/data
-    for dataset_page_url in landing_page["datasets"]:
 
-        # Get the page as json. Throw an information error if we fail for whatever reason
-        dataset_page_json_url = ONS_PREFIX + dataset_page_url["uri"] + "/data"
-        r = scraper.session.get(dataset_page_json_url)
+    # Get the dataset pages up front, all at once, then work through them in order
+    dataset_page_json_urls = [ONS_PREFIX + dataset_page_url["uri"] + "/data"
+                              for dataset_page_url in landing_page["datasets"]]
+    dataset_page_responses = scraper.transport.get_many(dataset_page_json_urls)
+
+    for dataset_page_url, dataset_page_json_url, r in zip(landing_page["datasets"], dataset_page_json_urls,
+                                                          dataset_page_responses):
+
+        # Throw an information error if we failed to get the page for whatever reason
         if r.status_code != 200:
             raise ValueError("Scrape of url '{}' failed with status code {}." \
                              .format(dataset_page_json_url, r.status_code))
@@ -229,15 +234,17 @@ def handler_dataset_landing_page(scraper, landing_page, tree):
         # page (the page we're getting the distributions from) so we're taking the details for it from
         # the landing page to use as a fallback in that scenario.
 
+        # get every version page at once, the responses come back in the same order as versions_dict_list
+        version_responses = scraper.transport.get_many([version_dict["url"] for version_dict in versions_dict_list])
+
         # iterate through the lot, we're aiming to create at least one distribution object for each
-        for i, version_dict in enumerate(versions_dict_list):
+        for i, (version_dict, r) in enumerate(zip(versions_dict_list, version_responses)):
 
             version_url = version_dict["url"]
             issued = version_dict["issued"]
 
             logging.debug("Identified distribution url, building distribution object for: " + version_url)
 
-            r = scraper.session.get(version_url)
             if r.status_code != 200:
 
                 # If we've got a 404 on the latest, fallback on using the details from the
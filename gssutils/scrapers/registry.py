@@ -0,0 +1,105 @@
+import logging
+import threading
+from importlib.metadata import entry_points
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+
+ENTRY_POINT_GROUP = 'gssutils.scrapers'
+
+
+def _uri_key(uri: str) -> List[str]:
+    """
+    Split a URI into the keys we walk the trie with: scheme, host then each non-empty path segment.
+    """
+    parsed = urlparse(uri)
+    return [parsed.scheme.lower(), parsed.netloc.lower()] + [segment for segment in parsed.path.split('/') if segment]
+
+
+class _Node:
+    __slots__ = ['children', 'prefixes']
+
+    def __init__(self):
+        self.children: Dict[str, _Node] = {}
+        # the prefixes, as registered, that end at this node, e.g. both 'https://h/a' and 'https://h/a/'
+        self.prefixes: Dict[str, Callable] = {}
+
+
+class ScraperRegistry:
+    """
+    Maps landing page URI prefixes to scraper functions.
+
+    Prefixes are held in a trie keyed on scheme, host and path segments, so finding the scraper for a URI
+    costs one step per path segment rather than a scan of every registered prefix. The trie only narrows down
+    the candidates: a prefix matches when the URI starts with it, as with str.startswith(), so the last segment
+    of a prefix only has to start the URI's segment ('https://www.gov.scot' matches
+    'https://www.gov.scotland.example/') and a trailing slash or query string has to match too. Unlike scanning
+    a list of prefixes, the longest match wins wherever it was registered.
+
+    Third party packages can add scrapers by declaring a 'gssutils.scrapers' entry point that refers to a list
+    of (uri_prefix, scrape) pairs, in the same form as gssutils.scrapers.scraper_list. If an entry point group
+    is given, its scrapers are loaded the first time the registry is used, after those given here.
+    """
+
+    def __init__(self, scrapers: Iterable[Tuple[str, Callable]] = (), entry_point_group: Optional[str] = None):
+        self._root = _Node()
+        self._prefixes: List[Tuple[str, Callable]] = []
+        self._entry_point_group = entry_point_group
+        self._lock = threading.Lock()
+        for uri_prefix, scrape in scrapers:
+            self.register(uri_prefix, scrape)
+
+    def _load_pending(self):
+        if self._entry_point_group is not None:
+            with self._lock:
+                if self._entry_point_group is not None:
+                    self.load_entry_points(self._entry_point_group)
+                    self._entry_point_group = None
+
+    def register(self, uri_prefix: str, scrape: Callable):
+        node = self._root
+        for key in _uri_key(uri_prefix):
+            node = node.children.setdefault(key, _Node())
+        if uri_prefix in node.prefixes:
+            logging.warning(f'Replacing the scraper registered for {uri_prefix}')
+            self._prefixes = [(p, s) for p, s in self._prefixes if p != uri_prefix]
+        node.prefixes[uri_prefix] = scrape
+        self._prefixes.append((uri_prefix, scrape))
+
+    def lookup(self, uri: str) -> Optional[Callable]:
+        """
+        Return the scraper registered against the longest prefix of the given URI, or None.
+        """
+        self._load_pending()
+        candidates: Dict[str, Callable] = {}
+        node = self._root
+        for key in _uri_key(uri):
+            # prefixes ending part way through this segment, whether or not the whole segment carries on
+            for child_key, child in node.children.items():
+                if child_key != key and key.startswith(child_key):
+                    candidates.update(child.prefixes)
+            node = node.children.get(key)
+            if node is None:
+                break
+            candidates.update(node.prefixes)
+        matching = [prefix for prefix in candidates if uri.startswith(prefix)]
+        if len(matching) == 0:
+            return None
+        return candidates[max(matching, key=len)]
+
+    def load_entry_points(self, group: str = ENTRY_POINT_GROUP):
+        eps = entry_points()
+        eps = eps.select(group=group) if hasattr(eps, 'select') else eps.get(group, [])
+        for ep in eps:
+            try:
+                for uri_prefix, scrape in ep.load():
+                    self.register(uri_prefix, scrape)
+            except Exception as e:
+                logging.warning(f"Unable to load scrapers from entry point '{ep.name}': {e!r}")
+
+    def __iter__(self) -> Iterator[Tuple[str, Callable]]:
+        self._load_pending()
+        return iter(self._prefixes)
+
+    def __len__(self):
+        self._load_pending()
+        return len(self._prefixes)
@@ -0,0 +1,119 @@
+"""
+Read ONS time series in CSDB format, as published alongside the spreadsheets of many ONS time series datasets.
+
+A CSDB file is a sequence of fixed-width records, each a line starting with its two digit record type. Each
+series starts with its identifier record, and the records we need are:
+
+    92  the series identifier (CDID), e.g. '92BOKI'
+    93  the series title, which may carry on over more than one record
+    96  the frequency, A (or Y) for annual, Q for quarterly or M for monthly, then the year and period (quarter or
+        month, left out for annual series) of the first observation, e.g. '96Q 1997 1'
+    97  observations, in fixed-width fields of VALUE_WIDTH characters, as many records as the series needs
+
+Values filling their whole field, such as large negative numbers, run straight on from the one before, so
+observations are sliced out by field rather than split on whitespace. Other records are skipped.
+
+The series come out as a long DataFrame with a row for each observation, giving the CDID, Title, Period and
+Value, with periods labelled as ONS labels them: '2019', '2019 Q1' or '2019 JAN'. Values that aren't numbers,
+such as markers for missing observations, are NaN.
+
+Whole blocks of records are parsed at once with pandas' string methods, rather than a line at a time.
+
+The layout above, in particular the 96 dates record and the field width, hasn't yet been checked against a real
+ONS extract, so Downloadable.as_pandas() doesn't load CSDB distributions with it. Once downloaded, a file can be
+read explicitly with read_csdb(open(path, encoding='latin-1')).
+"""
+
+from typing import Iterable, Iterator, List
+
+import numpy as np
+import pandas as pd
+
+SERIES = '92'
+TITLE = '93'
+DATES = '96'
+VALUES = '97'
+
+VALUE_WIDTH = 10
+
+COLUMNS = ['CDID', 'Title', 'Period', 'Value']
+
+_PERIODS_PER_YEAR = {'A': 1, 'Y': 1, 'Q': 4, 'M': 12}
+_MONTHS = np.array(['JAN', 'FEB', 'MAR', 'APR', 'MAY', 'JUN', 'JUL', 'AUG', 'SEP', 'OCT', 'NOV', 'DEC'])
+_FIELDS = f'.{{1,{VALUE_WIDTH}}}'
+_DATES = r'^\s*(?P<frequency>[AYQM])\s*(?P<year>\d{4})\s*(?P<period>\d{1,2})?\s*$'
+
+
+def parse_csdb(lines: List[str]) -> pd.DataFrame:
+    """
+    The series in the CSDB records given, as a long DataFrame. Records before the first series are ignored.
+    """
+    records = pd.Series(lines, dtype=object).str.rstrip('\r\n')
+    kind = records.str[:2]
+    body = records.str[2:]
+    # each record belongs to the series most recently started
+    series = (kind == SERIES).cumsum()
+    in_series = series > 0
+    kind, body, series = kind[in_series], body[in_series], series[in_series]
+
+    cdids = pd.Series(body[kind == SERIES].str.strip().values, index=series[kind == SERIES].values)
+    titles = body[kind == TITLE].str.strip().groupby(series[kind == TITLE]).agg(' '.join)
+    dates = body[kind == DATES].str.upper().str.extract(_DATES)
+    dates.index = series[kind == DATES].values
+    dates = dates[~dates.index.duplicated()]
+    unrecognised = dates['frequency'].isna()
+    if unrecognised.any():
+        raise ValueError(f'Unrecognised CSDB dates record for {cdids[dates.index[unrecognised][0]]}.')
+
+    values = body[kind == VALUES].str.rstrip().str.findall(_FIELDS).explode().dropna().str.strip()
+    observations = pd.DataFrame({'series': series[values.index].values, 'value': values.values})
+    missing_dates = ~observations['series'].isin(dates.index)
+    if missing_dates.any():
+        raise ValueError(f'No CSDB dates record for {cdids[observations["series"][missing_dates].iloc[0]]}.')
+
+    # the position of each observation counted in periods from the start of year 0
+    per_year = dates['frequency'].map(_PERIODS_PER_YEAR)
+    first = dates['year'].astype(int) * per_year + dates['period'].fillna('1').astype(int).clip(lower=1) - 1
+    frequency = observations['series'].map(dates['frequency']).values
+    per_year = observations['series'].map(per_year).values.astype(np.int64)
+    position = observations['series'].map(first).values.astype(np.int64) + \
+        observations.groupby('series').cumcount().values
+    year = pd.Series((position // per_year).astype(str), dtype=object)
+    period = position % per_year
+    label = np.where(frequency == 'Q', year + ' Q' + (period + 1).astype(str),
+                     np.where(frequency == 'M', year + ' ' + _MONTHS[period], year))
+
+    return pd.DataFrame({
+        'CDID': observations['series'].map(cdids).values,
+        'Title': observations['series'].map(titles).fillna('').values,
+        'Period': label,
+        'Value': pd.to_numeric(observations['value'], errors='coerce').values.astype(float)
+    }, columns=COLUMNS)
+
+
+def iter_csdb(lines: Iterable[str], chunksize: int) -> Iterator[pd.DataFrame]:
+    """
+    Stream the series in CSDB records as DataFrames of whole series, each of about chunksize rows, only starting
+    a new chunk where a series starts. A series longer than chunksize is a chunk on its own.
+    """
+    block: List[str] = []
+    observations = 0
+    chunks = 0
+    for line in lines:
+        if line.startswith(SERIES) and observations >= chunksize:
+            yield parse_csdb(block)
+            chunks += 1
+            block = []
+            observations = 0
+        block.append(line)
+        if line.startswith(VALUES):
+            observations += -(-len(line[2:].rstrip()) // VALUE_WIDTH)
+    if len(block) > 0 or chunks == 0:
+        yield parse_csdb(block)
+
+
+def read_csdb(lines: Iterable[str]) -> pd.DataFrame:
+    """
+    All the series in CSDB records as one long DataFrame.
+    """
+    return parse_csdb(list(lines))
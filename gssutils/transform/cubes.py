@@ -2,10 +2,14 @@ import json
 import logging
 import os
 import copy
+import gzip
 
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from urllib.parse import urljoin
-from typing import Optional
+from typing import Optional, Iterable, Union
+
+import pandas as pd
 
 from gssutils.csvw.mapping import CSVWMapping
 from gssutils.csvw.namespaces import URI
@@ -43,17 +47,32 @@ class Cubes:
                             "remove this keyword argument")
 
     def add_cube(self, scraper, dataframe, title, graph=None, info_json_dict=None, override_containing_graph=None,
-                 suppress_catalog_and_dsd_output: bool = False):
+                 suppress_catalog_and_dsd_output: bool = False, compress_csv: bool = False,
+                 accretive_upload: bool = False, stream_trig: bool = False):
         """
         Add a single datacube to the cubes class.
+
+        The dataframe can either be a pandas DataFrame or an iterable of DataFrame chunks sharing the
+        same columns, e.g. from pd.read_csv(..., chunksize=n), in which case the observations are
+        streamed to disk one chunk at a time rather than being held in memory.
+
+        accretive_upload marks the observations as an addition to the existing dataset, as the info.json's
+        load.accretiveUpload does, e.g. for chunks fetched with as_pandas(incremental=True).
+
+        stream_trig writes the catalog metadata with scraper.write_trig() as it's gathered, rather than
+        generate_trig(). The graphs are the same, but the TriG is written with full IRIs rather than prefixes.
         """
         self.cubes.append(Cube(self.base_uri, scraper, dataframe, title, graph, info_json_dict,
                                override_containing_graph, suppress_catalog_and_dsd_output,
-                               self.local_codelists))
+                               self.local_codelists, compress_csv, accretive_upload, stream_trig))
 
-    def output_all(self):
+    def output_all(self, parallel: bool = False, max_workers: Optional[int] = None):
         """
         Output every cube object we've added to the cubes() class.
+
+        With parallel=True, cubes are written at the same time across a pool of max_workers processes
+        (defaults to the number of processors). Cubes whose data is an iterable of chunks can't be
+        sent to another process, so they're still written here as the pool runs.
         """
 
         if len(self.cubes) == 0:
@@ -79,14 +98,57 @@ class Cubes:
                 if len(set(to_graph_statements)) == 1:
                     is_many_to_one = True
 
-        for cube in self.cubes:
-            try:
-                cube.output(self.destination_folder, is_multi_cube, is_many_to_one, self.info)
-            except Exception as err:
-                raise Exception("Exception encountered while processing datacube '{}'." \
-                                .format(cube.title)) from err
+        if parallel:
+            self._output_all_parallel(is_multi_cube, is_many_to_one, max_workers)
+        else:
+            for cube in self.cubes:
+                try:
+                    cube.output(self.destination_folder, is_multi_cube, is_many_to_one, self.info)
+                except Exception as err:
+                    raise Exception("Exception encountered while processing datacube '{}'." \
+                                    .format(cube.title)) from err
         self.has_ran = True
 
+    def _output_all_parallel(self, is_multi_cube, is_many_to_one, max_workers):
+        """
+        Output the cubes across a process pool, then report any failures in the order the cubes were added.
+        """
+        errors = {}
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = {}
+            for i, cube in enumerate(self.cubes):
+                if isinstance(cube.dataframe, pd.DataFrame):
+                    futures[i] = executor.submit(_output_cube, cube, self.destination_folder,
+                                                 is_multi_cube, is_many_to_one, self.info)
+            for i, cube in enumerate(self.cubes):
+                if i not in futures:
+                    try:
+                        cube.output(self.destination_folder, is_multi_cube, is_many_to_one, self.info)
+                    except Exception as err:
+                        errors[i] = err
+            for i, future in futures.items():
+                try:
+                    # The worker had its own copy of the scraper, so bring the dataset id it settled on back here
+                    self.cubes[i].scraper.set_dataset_id(future.result())
+                except Exception as err:
+                    errors[i] = err
+
+        for i in sorted(errors):
+            logging.error("Exception encountered while processing datacube '{}': {!r}"
+                          .format(self.cubes[i].title, errors[i]))
+        if len(errors) > 0:
+            first = min(errors)
+            raise Exception("Exception encountered while processing datacube '{}'." \
+                            .format(self.cubes[first].title)) from errors[first]
+
+
+def _output_cube(cube, destination_folder, is_multi_cube, is_many_to_one, info_json):
+    """
+    Process pool entry point for outputting a single cube, returning the dataset id used for it.
+    """
+    cube.output(destination_folder, is_multi_cube, is_many_to_one, info_json)
+    return cube.scraper._dataset_id
+
 
 class Cube:
     """
@@ -94,9 +156,10 @@ class Cube:
     """
     override_containing_graph_uri: Optional[str]
 
-    def __init__(self, base_uri, scraper, dataframe, title, graph, info_json_dict,
-                 override_containing_graph_uri: Optional[str], suppress_catalog_and_dsd_output: bool,
-                 local_codelists: Optional[str] = None):
+    def __init__(self, base_uri, scraper, dataframe: Union[pd.DataFrame, Iterable[pd.DataFrame]], title, graph,
+                 info_json_dict, override_containing_graph_uri: Optional[str], suppress_catalog_and_dsd_output: bool,
+                 local_codelists: Optional[str] = None, compress_csv: bool = False, accretive_upload: bool = False,
+                 stream_trig: bool = False):
 
         self.scraper = scraper  # note - the metadata of a scrape, not the actual data source
         self.dataframe = dataframe
@@ -107,6 +170,40 @@ class Cube:
         self.override_containing_graph_uri: Optional[URI] = URI(override_containing_graph_uri)
         self.suppress_catalog_and_dsd_output = suppress_catalog_and_dsd_output
         self.local_codelists = local_codelists
+        self.compress_csv = compress_csv
+        self.accretive_upload = accretive_upload
+        self.stream_trig = stream_trig
+
+    @property
+    def csv_filename(self) -> str:
+        return f'{pathify(self.title)}.csv.gz' if self.compress_csv else f'{pathify(self.title)}.csv'
+
+    def _write_csv(self, csv_path: Path):
+        """
+        Write the tidy data, chunk by chunk where we've been given an iterable of dataframes.
+        We open the file ourselves the same way pandas does, so the output is byte-for-byte what
+        dataframe.to_csv(csv_path, index=False) would have written for the whole frame.
+        """
+        if self.compress_csv:
+            stream = gzip.open(csv_path, 'wt', encoding='utf-8', newline='')
+        else:
+            stream = open(csv_path, 'w', encoding='utf-8', newline='')
+        with stream:
+            if isinstance(self.dataframe, pd.DataFrame):
+                self.dataframe.to_csv(stream, index=False)
+            else:
+                columns = None
+                for chunk in self.dataframe:
+                    if columns is None:
+                        columns = list(chunk.columns)
+                        chunk.to_csv(stream, index=False)
+                    elif list(chunk.columns) != columns:
+                        raise ValueError(f'Aborting. Chunk columns {list(chunk.columns)} do not match the '
+                                         f'columns of the first chunk {columns}.')
+                    else:
+                        chunk.to_csv(stream, index=False, header=False)
+                if columns is None:
+                    raise ValueError(f"Aborting. No data chunks were provided for the cube '{self.title}'.")
 
     def _instantiate_map(self, destination_folder, pathified_title, info_json):
         """
@@ -119,10 +216,12 @@ class Cube:
         info_json = info_json if self.info_json_dict is None else self.info_json_dict
 
         map_obj.set_accretive_upload(info_json)
+        if self.accretive_upload:
+            map_obj.set_accretive_upload({"load": {"accretiveUpload": True}})
         map_obj.set_mapping(info_json)
         map_obj.set_suppress_catalog_and_dsd_output(self.suppress_catalog_and_dsd_output)
 
-        map_obj.set_csv(destination_folder / f'{pathified_title}.csv')
+        map_obj.set_csv(destination_folder / self.csv_filename, compressed_url=self.compress_csv)
         map_obj.set_dataset_uri(urljoin(self.scraper._base_uri, f'data/{self.scraper._dataset_id}'))
 
         if self.local_codelists is not None:
@@ -177,19 +276,25 @@ class Cube:
         self.scraper.set_dataset_id(dataset_path)
 
         # output the tidy data
-        self.dataframe.to_csv(destination_folder / f'{pathify(self.title)}.csv', index=False)
+        self._write_csv(destination_folder / self.csv_filename)
 
-        is_accretive_upload = info_json is not None and "load" in info_json and "accretiveUpload" in info_json["load"] \
-                              and info_json["load"]["accretiveUpload"]
+        is_accretive_upload = self.accretive_upload or (
+            info_json is not None and "load" in info_json and "accretiveUpload" in info_json["load"]
+            and info_json["load"]["accretiveUpload"])
 
         # Don't output trig file if we're performing an accretive upload (or we have been asked to suppress it).
         # We don't want to duplicate information we already have.
         if not is_accretive_upload and not self.suppress_catalog_and_dsd_output:
             # Output the trig
-            trig_to_use = self.scraper.generate_trig()
-            with open(destination_folder / f'{pathify(self.title)}.csv-metadata.trig', 'wb') as metadata:
-                metadata.write(trig_to_use)
+            if self.stream_trig:
+                with open(destination_folder / f'{self.csv_filename}-metadata.trig', 'w',
+                          encoding='utf-8') as metadata:
+                    self.scraper.write_trig(metadata)
+            else:
+                trig_to_use = self.scraper.generate_trig()
+                with open(destination_folder / f'{self.csv_filename}-metadata.trig', 'wb') as metadata:
+                    metadata.write(trig_to_use)
 
         # Output csv and csvw
         populated_map_obj = self._populate_csvw_mapping(destination_folder, pathify(self.title), info_json)
-        populated_map_obj.write(destination_folder / f'{pathify(self.title)}.csv-metadata.json')
+        populated_map_obj.write(destination_folder / f'{self.csv_filename}-metadata.json')
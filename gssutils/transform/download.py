@@ -1,18 +1,42 @@
+import gzip
 import json
 import logging
-from io import BytesIO
+import posixpath
+import shutil
+import tempfile
+import weakref
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from fnmatch import fnmatchcase
+from io import BufferedReader, BytesIO
 
 import backoff
 import messytables
 import pandas as pd
 import pyexcel
 import requests
-import xypath
+from pyexcel_io.reader import Reader
 from os import environ
-from typing import Union, Dict, Optional
+from urllib.parse import quote
+from typing import Callable, Union, Dict, Iterator, List, Optional, Sequence
 
+from gssutils.cache import MappedBody, fresh_cached_headers
 from gssutils.metadata.base import Resource
-from gssutils.metadata.mimetype import ExcelTypes, ODS
+from gssutils.metadata import mimetype
+from gssutils.metadata.mimetype import ExcelTypes, ExcelOpenXML, ODS, CSV, ZIP
+from gssutils.transform.frame_cache import FrameCache
+from gssutils.transform.ods import ODSTableSet
+from gssutils.transform.sheets import LazySheets, LazyTabs
+from gssutils.transform.xlsx import XLSXReader
+
+
+GZIP_MAGIC = b'\x1f\x8b'
+ZIP_MAGIC = b'PK\x03\x04'
+
+# What can be read from a zip archive distribution's files when they're not chosen by name
+PANDAS_TYPES = (*ExcelTypes, ODS, CSV)
+DATABAKER_TYPES = (*ExcelTypes, ODS)
 
 
 class FormatError(Exception):
@@ -23,6 +47,71 @@ class FormatError(Exception):
         self.message = message
 
 
+def _map_in_order(fn: Callable, items: list, max_workers: int) -> list:
+    """
+    Call fn on each item, up to max_workers at a time, returning the results in the same order as the items.
+    """
+    if max_workers <= 1 or len(items) <= 1:
+        return [fn(item) for item in items]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+        return list(executor.map(fn, items))
+
+
+def _lazy_ods_sheets(source: Union[str, BytesIO], **kwargs) -> LazySheets:
+    """
+    Each sheet of an ODS file as a DataFrame, as pyexcel reads it, with the workbook only opened when a sheet is
+    first used and each sheet only read when it's used.
+    """
+    names = ODSTableSet(filename=source) if isinstance(source, str) else ODSTableSet(fileobj=source)
+    reader = None
+
+    def load(name: str) -> pd.DataFrame:
+        nonlocal reader
+        if reader is None:
+            reader = Reader('ods', library='pyexcel-ods3')
+            if isinstance(source, str):
+                reader.open(source)
+            else:
+                source.seek(0)
+                reader.open_stream(source)
+        rows = [list(row) for row in reader.read_sheet_by_name(name)[name]]
+        # pyexcel.Sheet pads the rows out to the same length, as pyexcel.get_book does
+        return pd.DataFrame(pyexcel.Sheet(rows, name=name).get_array(**kwargs))
+
+    return LazySheets(names.sheet_names(), load)
+
+
+def _choose_members(names: List[str], member: Optional[str], media_types: Sequence[str]) -> List[str]:
+    """
+    The files in a zip archive given by member, either the name of one of them or a glob matching their names or
+    paths, or where member isn't given, all those that are one of the media types going by their names.
+    """
+    # the resource forks macOS adds to zip archives aren't files anyone meant to include
+    names = [name for name in names if not name.startswith('__MACOSX/')]
+    if member is None:
+        return [name for name in names if mimetype.from_filename(name) in media_types]
+    if member in names:
+        return [member]
+    return [name for name in names if fnmatchcase(name, member) or fnmatchcase(posixpath.basename(name), member)]
+
+
+def month_id_to_pmd_chunk(month_id) -> str:
+    """
+    An HMRC MonthId, e.g. 201901, as the reference.data.gov.uk month PMD uses for the period.
+    """
+    month_id = str(month_id)
+    return f'http://reference.data.gov.uk/id/month/{month_id[:4]}-{month_id[4:]}'
+
+
+def missing_chunks(api_chunks: list, pmd_chunks: list, to_pmd_chunk: Callable = month_id_to_pmd_chunk) -> list:
+    """
+    The chunks available from the API that aren't in PMD yet, in the API's order. to_pmd_chunk turns an API chunk
+    into the value PMD would have for it.
+    """
+    in_pmd = set(pmd_chunks)
+    return [chunk for chunk in api_chunks if to_pmd_chunk(chunk) not in in_pmd]
+
+
 class Downloadable(Resource):
     """
     Mixin for downloadable resources, adding as_pandas() and as_databaker() methods.
@@ -30,30 +119,246 @@ class Downloadable(Resource):
     Expects self._mediaType to be set to determine the file type of the downloadable resource.
     Expects self._session to be a re-usable requests session object.
     Expects self._seed to be a dictionary for configuration.
+    If self._frame_cache is a FrameCache, as_pandas() results are kept in it.
     """
+    __slots__ = ()
 
     def __init__(self):
         super().__init__()
         self._session = None
         self._seed = None
         self._mediaType = None
+        self._frame_cache: Optional[FrameCache] = None
 
     def open(self):
         stream = self._session.get(self.uri, stream=True).raw
         stream.decode_content = True
         return stream
 
-    def as_databaker(self, **kwargs):
+    @staticmethod
+    def _mapped_path(stream) -> Optional[str]:
+        """
+        If the opened stream is a cache hit whose body is kept in its own file (see gssutils.cache.BiggerSerializer),
+        and doesn't need decompressing, return the path to that file so readers can map it themselves instead of
+        us buffering the whole download in memory.
+        """
+        body = getattr(stream, '_fp', None)
+        if isinstance(body, MappedBody) and stream.headers.get('content-encoding', 'identity') == 'identity':
+            return body.name
+        return None
+
+    @contextmanager
+    def _open_uncompressed(self):
+        """
+        Open the download, decompressing it if it's gzipped, or opening its only member (or only CSV) if it's a zip
+        archive, whatever the media type says. Yields the file and, where it's a cache hit kept in its own file and
+        needs no decompressing, the path to that file.
+        """
+        with self.open() as stream:
+            path = self._mapped_path(stream)
+            # otherwise the response closes itself once it's all read, and the buffer can't then read what's left
+            stream.auto_close = False
+            buffered = BufferedReader(stream)
+            magic = buffered.peek(4)[:4]
+            if magic[:2] == GZIP_MAGIC:
+                with gzip.GzipFile(fileobj=buffered) as uncompressed:
+                    yield uncompressed, None
+            elif magic == ZIP_MAGIC:
+                # reading a zip archive needs a seekable file, so keep the download on disk rather than in memory
+                with tempfile.TemporaryFile() as spooled:
+                    shutil.copyfileobj(buffered, spooled)
+                    with zipfile.ZipFile(spooled) as archive:
+                        members = [info.filename for info in archive.infolist() if not info.is_dir()]
+                        csvs = _choose_members(members, None, [CSV])
+                        if len(members) != 1 and len(csvs) != 1:
+                            raise FormatError(f'Unable to choose a file from the zip archive {self.uri}, '
+                                              f'which has {", ".join(members)}.')
+                        with archive.open(members[0] if len(members) == 1 else csvs[0]) as member:
+                            yield member, None
+            else:
+                yield buffered, path
+
+    def _zip_source(self):
+        """
+        The download of a zip archive, as the path to its cached body file where there is one, otherwise spooled to
+        a temporary file, as reading a zip archive needs a seekable file. Its files are read from it as they're
+        needed, never extracted. A temporary file is closed, so removed, by _close_archive() once its files have
+        been read.
+        """
+        with self.open() as stream:
+            path = self._mapped_path(stream)
+            if path is not None:
+                return path
+            spooled = tempfile.TemporaryFile()
+            shutil.copyfileobj(stream, spooled)
+            return spooled
+
+    def _zip_members(self, member: Optional[str], media_types: Sequence[str]) -> List['ZipMember']:
+        """
+        The files of a zip archive distribution given by member, a name or glob, or where member isn't given, those
+        that are one of the media types.
+        """
+        source = self._zip_source()
+        with zipfile.ZipFile(source) as archive:
+            names = [info.filename for info in archive.infolist() if not info.is_dir()]
+        chosen = _choose_members(names, member, media_types)
+        if len(chosen) == 0:
+            wanted = f'matching {member}' if member is not None else 'that can be loaded'
+            raise FormatError(f'There are no files {wanted} in the zip archive {self.uri}, '
+                              f'which has {", ".join(names)}.')
+        return [ZipMember(self, source, name) for name in chosen]
+
+    def _from_zip(self, member: Optional[str], media_types: Sequence[str], load: Callable[['ZipMember'], object]):
+        """
+        Load the files of a zip archive distribution given by member. Where there's only one, it's returned as it
+        is, otherwise they're returned by name, each loaded when it's first used.
+        """
+        members = self._zip_members(member, media_types)
+        if len(members) == 1:
+            loaded = load(members[0])
+            if isinstance(loaded, Iterator):
+                return self._close_after(loaded, _closing_archive(members))
+            _close_archive(members)
+            return loaded
+        by_name = {zip_member.name: zip_member for zip_member in members}
+        sheets = LazySheets(list(by_name), lambda name: load(by_name[name]))
+        # the files are read from the archive as they're used, so it's kept until the sheets are finished with
+        weakref.finalize(sheets, _close_archive, members)
+        return sheets
+
+    def _check_member(self, member: Optional[str]):
+        if member is not None and self._mediaType != ZIP:
+            raise ValueError(f'Only files in zip archives can be chosen by member, not in {self._mediaType}.')
+
+    def iter_pandas(self, chunksize: int = 100000, dtype=None, usecols=None, member: Optional[str] = None,
+                    **kwargs) -> Iterator[pd.DataFrame]:
+        """
+        Stream a CSV distribution as DataFrames of up to chunksize rows, so that a large download never has to be
+        in memory all at once. Gzipped and zipped CSV files are decompressed as they're read. Other arguments are
+        passed to pandas.read_csv.
+
+        For a zip archive distribution, the CSV files given by member, a name or glob, or all of them if member
+        isn't given, are streamed one after another.
+        """
+        self._check_member(member)
+        if self._mediaType == ZIP:
+            members = self._zip_members(member, [CSV])
+            with _closing_archive(members):
+                for csv_member in members:
+                    yield from csv_member.iter_pandas(chunksize, dtype, usecols, **kwargs)
+            return
+        if self._mediaType != CSV:
+            raise FormatError(f'Unable to load {self._mediaType} into Pandas DataFrames in chunks.')
+        with self._open_uncompressed() as (csv_obj, _):
+            yield from pd.read_csv(csv_obj, chunksize=chunksize, dtype=dtype, usecols=usecols, **kwargs)
+
+    def as_arrow(self, use_threads: bool = True, **kwargs):
+        """
+        Read a CSV distribution into a pyarrow Table with pyarrow's multithreaded CSV reader, memory-mapping the
+        download where it's already in the cache in its own file, rather than copying it. Gzipped and zipped CSV
+        files are decompressed as they're read. Other arguments are passed to pyarrow.csv.read_csv. Needs pyarrow.
+        """
+        from pyarrow import csv as arrow_csv, memory_map
+
+        if self._mediaType != CSV:
+            raise FormatError(f'Unable to load {self._mediaType} into an Arrow Table.')
+        read_options = kwargs.pop('read_options', None) or arrow_csv.ReadOptions()
+        read_options.use_threads = use_threads
+        with self._open_uncompressed() as (csv_obj, path):
+            if path is not None:
+                with memory_map(path) as mapped:
+                    return arrow_csv.read_csv(mapped, read_options=read_options, **kwargs)
+            return arrow_csv.read_csv(csv_obj, read_options=read_options, **kwargs)
+
+    def as_databaker(self, member: Optional[str] = None, **kwargs):
+        """
+        The tabs of a spreadsheet distribution for databaker. For a zip archive distribution, the spreadsheets
+        given by member, a name or glob, or all of them if member isn't given, as for as_pandas().
+        """
+        self._check_member(member)
+        if self._mediaType == ZIP:
+            return self._from_zip(member, DATABAKER_TYPES, lambda spreadsheet: spreadsheet.as_databaker(**kwargs))
         return self._get_simple_databaker_tabs(**kwargs)
 
-    def as_pandas(self, **kwargs):
+    def as_pandas(self, member: Optional[str] = None, **kwargs):
+        """
+        The distribution as a pandas DataFrame, or a DataFrame for each sheet of a spreadsheet. For a zip archive
+        distribution, the files given by member, a name or glob, or all those that can be loaded if member isn't
+        given. A single file is returned as it would be on its own, otherwise they're returned by name, each
+        loaded as it's used.
+        """
+        self._check_member(member)
 
         if self._seed is not None:
             if "odataConversion" in self._seed.keys():
                 return self._construct_odata_dataframe(**kwargs)
 
+        if self._mediaType == ZIP:
+            return self._from_zip(member, PANDAS_TYPES, lambda data: data.as_pandas(**kwargs))
+
+        # chunks are read as they're used, so there's nothing to keep in the frame cache
+        if self._frame_cache is not None and 'chunksize' not in kwargs and \
+                (self._mediaType in ExcelTypes or self._mediaType in [ODS, 'text/csv']):
+            return self._get_cached_pandas(**kwargs)
+
         return self._get_simple_csv_pandas(**kwargs)
 
+    def _validator(self) -> Optional[str]:
+        """
+        Something that changes whenever the downloaded content does, without downloading it: the ETag or
+        Last-Modified header of the session's cached response where it's still fresh, otherwise of a HEAD request.
+        None if the server gives neither, as then telling whether the content has changed means downloading it.
+        """
+        headers = fresh_cached_headers(self._session, self.uri)
+        if headers is None:
+            response = self._session.head(self.uri, allow_redirects=True)
+            response.close()
+            headers = response.headers if response.ok else {}
+        if 'ETag' in headers:
+            return f"etag:{headers['ETag']}"
+        if 'Last-Modified' in headers:
+            return f"last-modified:{headers['Last-Modified']}"
+        return None
+
+    def _get_cached_pandas(self, **kwargs):
+        validator = self._validator()
+        if validator is None:
+            return self._get_simple_csv_pandas(**kwargs)
+        key = FrameCache.key(self.uri, validator, {'mediaType': self._mediaType, **kwargs})
+        if key is None:
+            return self._get_simple_csv_pandas(**kwargs)
+        frames = self._frame_cache.get(key)
+        if frames is not None:
+            return frames
+        names = self._frame_cache.get_names(key)
+        if names is not None:
+            # the workbook is only downloaded and opened if a sheet that's used hasn't been kept
+            return self._cached_sheets(names, None, validator, kwargs)
+        frames = self._get_simple_csv_pandas(**kwargs)
+        if isinstance(frames, LazySheets):
+            # keep each sheet as it's used, rather than parsing the whole workbook to keep it
+            self._frame_cache.set_names(key, self.uri, list(frames))
+            return self._cached_sheets(list(frames), frames, validator, kwargs)
+        self._frame_cache.set(key, self.uri, frames)
+        return frames
+
+    def _cached_sheets(self, names: List[str], sheets: Optional[LazySheets], validator: str,
+                       kwargs: dict) -> LazySheets:
+        workbook = [sheets]
+
+        def load(name: str) -> pd.DataFrame:
+            key = FrameCache.key(self.uri, validator, {'mediaType': self._mediaType, **kwargs, 'sheet': name})
+            frame = self._frame_cache.get(key)
+            if frame is None:
+                # LazySheets loads one sheet at a time, so the workbook is only opened once
+                if workbook[0] is None:
+                    workbook[0] = self._get_simple_csv_pandas(**kwargs)
+                frame = workbook[0][name]
+                self._frame_cache.set(key, self.uri, frame)
+            return frame
+
+        return LazySheets(names, load)
+
     def _get_simple_databaker_tabs(self, **kwargs):
         """
         Given a distribution object representing a spreadsheet, attempts to return a list
@@ -61,17 +366,21 @@ class Downloadable(Resource):
         """
         if self._mediaType in ExcelTypes:
             with self.open() as fobj:
-                tableset = messytables.excel.XLSTableSet(fileobj=fobj)
-                tabs = list(xypath.loader.get_sheets(tableset, "*"))
-                return tabs
+                path = self._mapped_path(fobj)
+                if path is not None:
+                    tableset = messytables.excel.XLSTableSet(filename=path)
+                else:
+                    tableset = messytables.excel.XLSTableSet(fileobj=fobj)
+                return LazyTabs(tableset)
         elif self._mediaType == ODS:
             with self.open() as ods_obj:
-                excel_obj = BytesIO()
-                book = pyexcel.get_book(file_type='ods', file_content=ods_obj, library='pyexcel-ods3')
-                book.save_to_memory(file_type='xls', stream=excel_obj)
-                tableset = messytables.excel.XLSTableSet(fileobj=excel_obj)
-                tabs = list(xypath.loader.get_sheets(tableset, "*"))
-                return tabs
+                path = self._mapped_path(ods_obj)
+                if path is not None:
+                    tableset = ODSTableSet(filename=path)
+                else:
+                    # reading a zip archive needs a seekable file
+                    tableset = ODSTableSet(fileobj=BytesIO(ods_obj.read()))
+                return LazyTabs(tableset)
         raise FormatError(f'Unable to load {self._mediaType} into Databaker.')
 
     def _get_simple_csv_pandas(self, **kwargs) -> Union[Dict[str, pd.DataFrame], pd.DataFrame]:
@@ -80,10 +389,18 @@ class Downloadable(Resource):
         or dictionary of dataframes (in the case of a spreadsheet source)
         """
         if self._mediaType in ExcelTypes:
+            if 'chunksize' in kwargs:
+                return self._get_xlsx_chunks(**kwargs)
             with self.open() as fobj:
+                path = self._mapped_path(fobj)
                 # pandas 0.25 now tries to seek(0), so we need to read and buffer the stream
-                buffered_fobj = BytesIO(fobj.read())
-                return pd.read_excel(buffered_fobj, **kwargs)
+                source = path if path is not None else BytesIO(fobj.read())
+                if 'sheet_name' in kwargs and kwargs['sheet_name'] is None:
+                    # every sheet, each parsed when it's first used
+                    workbook = pd.ExcelFile(source, engine=kwargs.get('engine'))
+                    options = {k: v for k, v in kwargs.items() if k not in ('sheet_name', 'engine')}
+                    return LazySheets(workbook.sheet_names, lambda name: workbook.parse(name, **options))
+                return pd.read_excel(source, **kwargs)
         elif self._mediaType == ODS:
             with self.open() as ods_obj:
                 if 'sheet_name' in kwargs:
@@ -92,82 +409,98 @@ class Downloadable(Resource):
                                                           library='pyexcel-ods3',
                                                           **kwargs))
                 else:
-                    book = pyexcel.get_book(file_content=ods_obj,
-                                            file_type='ods',
-                                            library='pyexcel-ods3')
-                    return {sheet.name: pd.DataFrame(sheet.get_array(**kwargs)) for sheet in book}
+                    path = self._mapped_path(ods_obj)
+                    return _lazy_ods_sheets(path if path is not None else BytesIO(ods_obj.read()), **kwargs)
         elif self._mediaType == 'text/csv':
             with self.open() as csv_obj:
-                return pd.read_csv(csv_obj, **kwargs)
+                path = self._mapped_path(csv_obj)
+                return pd.read_csv(path if path is not None else csv_obj, **kwargs)
         elif self._mediaType == 'application/json':
             # Assume odata
 
             return self._get_principle_dataframe()
         raise FormatError(f'Unable to load {self._mediaType} into Pandas DataFrame.')
 
-    def _get_principle_dataframe(self, chunks_wanted: Optional[list] = None):
+    def _get_xlsx_chunks(self, chunksize: int, sheet_name: Union[str, int] = 0, header: Optional[int] = 0,
+                         **kwargs) -> Iterator[pd.DataFrame]:
+        """
+        Stream a sheet of an XLSX spreadsheet as DataFrames of up to chunksize rows, in constant memory, rather
+        than pandas reading the whole workbook.
+        """
+        if self._mediaType != ExcelOpenXML:
+            raise FormatError(f'Unable to load {self._mediaType} into Pandas DataFrames in chunks.')
+        if len(kwargs) > 0:
+            raise ValueError(f'Only sheet_name and header can be given with chunksize, not {", ".join(kwargs)}.')
+        with self.open() as fobj:
+            path = self._mapped_path(fobj)
+            if path is not None:
+                return XLSXReader(path).iter_frames(sheet_name, chunksize, header)
+            # reading a zip archive needs a seekable file, so keep the download on disk rather than in memory
+            spooled = tempfile.TemporaryFile()
+            shutil.copyfileobj(fobj, spooled)
+        return self._close_after(XLSXReader(spooled).iter_frames(sheet_name, chunksize, header), spooled)
+
+    @staticmethod
+    def _close_after(frames: Iterator[pd.DataFrame], f) -> Iterator[pd.DataFrame]:
+        with f:
+            yield from frames
+
+    def _get_principle_dataframe(self, chunks_wanted: Optional[list] = None, max_workers: int = 4):
         """
         Given a distribution object and a list of chunks of data we want
-        return a dataframe
+        return a dataframe. Up to max_workers chunks are fetched at the same time, each retried on its own
+        if the request times out or the connection fails.
         """
-        
-        principle_df = pd.DataFrame()
 
         if chunks_wanted is not None:
             key = self._seed['odataConversion']['chunkColumn']
 
-            if type(chunks_wanted) is list:
-                for chunk in chunks_wanted:
-                    principle_df = principle_df.append(self._get_odata_data(self.uri, params={
-                        '$filter': f'{key} eq {chunk}'
-                    }))
-            else:
-                chunk = str(chunks_wanted)
-                principle_df = principle_df.append(self._get_odata_data(self.uri, params={
-                    '$filter': f'{key} eq {chunk}'
-                }))
+            if type(chunks_wanted) is not list:
+                chunks_wanted = [str(chunks_wanted)]
+            frames = _map_in_order(
+                lambda chunk: self._get_odata_data(self.uri, params={'$filter': f'{key} eq {chunk}'}),
+                chunks_wanted, max_workers)
+            principle_df = pd.concat(frames) if len(frames) > 0 else pd.DataFrame()
         else:
             principle_df = self._get_odata_data(self.uri)
 
         return principle_df
 
-    def _get_supplementary_dataframes(self) -> dict:
+    def _get_supplementary_dataframes(self, max_workers: int = 4) -> dict:
         """
         Supplement the base dataframe with expand and foreign principle_df calls etc
         """
 
         sup = self._seed['odataConversion']['supplementalEndpoints']
 
-        sup_dfs = {}
+        sup_dfs = _map_in_order(lambda sup_dict: self._get_odata_data(sup_dict["endpoint"]),
+                                list(sup.values()), max_workers)
 
-        for name, sup_dict in sup.items():
-            sup_dfs[name] = self._get_odata_data(sup_dict["endpoint"])
+        return dict(zip(sup.keys(), sup_dfs))
 
-        return sup_dfs
-
-    @backoff.on_exception(backoff.expo, (requests.exceptions.Timeout, requests.exceptions.ConnectionError))
-    def _get_odata_data(self, url: str, params: Optional[dict] = None) -> pd.DataFrame():
+    def _iter_odata_pages(self, url: str, params: Optional[dict] = None) -> Iterator[pd.DataFrame]:
+        """
+        Yield a dataframe for each page of an OData response, following the next links.
+        """
         r = self._session.get(url, params=params)
         logging.info(f"Trying {url} with params {params}")
         if r.status_code != 200:
             raise Exception(f'Failed to get data from {url} with status code {r.status_code}')
 
         contents = r.json()
-        df = pd.DataFrame(contents['value'])
-
-        # This one supports OData (Stat Wales)
-        while 'odata.nextLink' in contents.keys():
-            page = self._session.get(contents['odata.nextLink'])
-            contents = page.json()
-            df = df.append(pd.DataFrame(contents['value']))
-
-        # This one supports OData (HMRC Trade UK API)
-        while '@odata.nextLink' in contents.keys():
-            page = self._session.get(contents['@odata.nextLink'])
-            contents = page.json()
-            df = df.append(pd.DataFrame(contents['value']))
-            
-        return df
+        yield pd.DataFrame(contents['value'])
+
+        # 'odata.nextLink' is used by OData v3 (Stat Wales), '@odata.nextLink' by v4 (HMRC Trade UK API)
+        next_link = contents.get('odata.nextLink', contents.get('@odata.nextLink'))
+        while next_link is not None:
+            contents = self._session.get(next_link).json()
+            yield pd.DataFrame(contents['value'])
+            next_link = contents.get('odata.nextLink', contents.get('@odata.nextLink'))
+
+    @backoff.on_exception(backoff.expo, (requests.exceptions.Timeout, requests.exceptions.ConnectionError))
+    def _get_odata_data(self, url: str, params: Optional[dict] = None) -> pd.DataFrame():
+        # collect the pages and concatenate once, rather than copying the growing frame for every page
+        return pd.concat(list(self._iter_odata_pages(url, params)))
 
     def _merge_principle_supplementary_dataframes(self, principle_df, supplementary_df_dict):
         """
@@ -186,21 +519,35 @@ class Downloadable(Resource):
 
         return principle_df
 
-    def _construct_odata_dataframe(self, chunks_wanted: Optional[list] = None):
+    def _construct_odata_dataframe(self, chunks_wanted: Optional[list] = None, max_workers: int = 4,
+                                   incremental: bool = False, to_pmd_chunk: Callable = month_id_to_pmd_chunk):
         """
-        Construct a dataframe via a series of api calls.
+        Construct a dataframe via a series of api calls, making up to max_workers of them at the same time.
+
+        With incremental=True, rather than being given the chunks wanted, only the chunks from the API that aren't
+        already in PMD are fetched, see get_missing_chunks(). The result is empty if there's nothing new, otherwise
+        it should be added as a cube with accretive_upload=True.
         """
 
+        if incremental:
+            if chunks_wanted is not None:
+                raise Exception('Aborting. Pass either "chunks_wanted" or "incremental", not both.')
+            chunks_wanted = self.get_missing_chunks(to_pmd_chunk)
+            if len(chunks_wanted) == 0:
+                logging.info(f'No chunks from {self.uri} are missing from PMD.')
+                return pd.DataFrame()
+            logging.info(f'Fetching {len(chunks_wanted)} chunks missing from PMD: {chunks_wanted}')
+
         # Confirm we've been given the required chunks
         if chunks_wanted is None:
             raise Exception(
                 'When constructing an odata dataset, you need to pass in a "chunks_wanted" keyword argument')
 
         # use those chunks to construct the principle dataframe
-        principle_df = self._get_principle_dataframe(chunks_wanted)
+        principle_df = self._get_principle_dataframe(chunks_wanted, max_workers)
 
         # expand this dataframe with supplementary data
-        supplementary_df_dict = self._get_supplementary_dataframes()
+        supplementary_df_dict = self._get_supplementary_dataframes(max_workers)
 
         # merge the principle and supplementary datasets
         df = self._merge_principle_supplementary_dataframes(principle_df, supplementary_df_dict)
@@ -232,6 +579,12 @@ SELECT DISTINCT ?chunk WHERE {{
 
         return [x['chunk']['value'] for x in result['results']['bindings']]
 
+    def get_missing_chunks(self, to_pmd_chunk: Callable = month_id_to_pmd_chunk) -> list:
+        """
+        The chunks available from the odata api that aren't yet in pmd4
+        """
+        return missing_chunks(self.get_odata_api_chunks(), self.get_pmd_chunks(), to_pmd_chunk)
+
     @backoff.on_exception(backoff.expo, requests.exceptions.RequestException)
     def get_odata_api_chunks(self) -> list:
         """
@@ -248,3 +601,38 @@ SELECT DISTINCT ?chunk WHERE {{
         chunks = [x["MonthId"] for x in chunk_dict["value"]]
 
         return chunks
+
+
+def _close_archive(members: List['ZipMember']):
+    """
+    Close the temporary file the members' zip archive was spooled to, if it was.
+    """
+    if len(members) > 0 and hasattr(members[0]._source, 'close'):
+        members[0]._source.close()
+
+
+@contextmanager
+def _closing_archive(members: List['ZipMember']):
+    try:
+        yield members
+    finally:
+        _close_archive(members)
+
+
+class ZipMember(Downloadable):
+    """
+    A file in a zip archive distribution, read straight out of the archive. Its media type goes by its name.
+    """
+
+    def __init__(self, archive: Downloadable, source, name: str):
+        super().__init__()
+        self._session = archive._session
+        self._mediaType = mimetype.from_filename(name)
+        self._source = source
+        self.uri = f'{archive.uri}#{quote(name)}'
+        self.name = name
+
+    def open(self):
+        # the member stays readable after the archive is closed, and keeps its own hold on the file
+        with zipfile.ZipFile(self._source) as archive:
+            return archive.open(self.name)
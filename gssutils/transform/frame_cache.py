@@ -0,0 +1,199 @@
+import hashlib
+import json
+import logging
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Callable, List, Mapping, Optional, Union
+
+import pandas as pd
+
+Frames = Union[pd.DataFrame, Mapping[Union[str, int], pd.DataFrame]]
+
+
+class FrameCache:
+    """
+    A local cache of parsed distributions, so that as_pandas() doesn't have to parse the same spreadsheet or CSV
+    again on every run.
+
+    Entries are keyed by the download URL, the arguments given to as_pandas() and the response's ETag or
+    Last-Modified header, so a new version of a distribution is never served from an old entry. Distributions
+    served without either aren't kept, as checking whether they've changed would mean downloading them anyway.
+    Each sheet is stored as a Parquet file, or pickled where the sheet can't be stored as Parquet (pyarrow isn't
+    installed, or a column mixes types). For a whole workbook, whose sheets are kept one at a time as they're
+    used, an entry just lists the sheet names. If max_size (bytes) is given, the least recently used entries are
+    removed once the cache grows past it.
+    """
+
+    def __init__(self, path: Union[str, Path] = '.cache.frames', max_size: Optional[int] = None):
+        self.path = Path(path)
+        self.max_size = max_size
+        self.lock = threading.Lock()
+        self.path.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def key(url: str, validator: str, kwargs: dict) -> Optional[str]:
+        """
+        The key for an entry, or None if the arguments can't be represented in one, e.g. a converter function.
+        """
+        try:
+            arguments = json.dumps(kwargs, sort_keys=True)
+        except TypeError:
+            return None
+        return hashlib.sha256('\n'.join([url, validator, arguments]).encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Frames]:
+        entry = self.path / key
+        try:
+            with open(entry / 'manifest.json', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest['sheets'] is None:
+                # just the names of a workbook's sheets
+                return None
+            frames = [self._read(entry, i, sheet) for i, sheet in enumerate(manifest['sheets'])]
+        except (OSError, ValueError, KeyError) as e:
+            if entry.exists():
+                logging.warning(f'Ignoring unreadable cached frames in {entry}: {e!r}')
+            return None
+        # keep track of use for evicting the least recently used
+        (entry / 'manifest.json').touch()
+        if manifest['names'] is None:
+            return frames[0]
+        return dict(zip(manifest['names'], frames))
+
+    def get_names(self, key: str) -> Optional[List[Union[str, int]]]:
+        """
+        The sheet names kept by set_names(), or None.
+        """
+        entry = self.path / key
+        try:
+            with open(entry / 'manifest.json', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest['sheets'] is not None:
+                return None
+            names = manifest['names']
+        except (OSError, ValueError, KeyError) as e:
+            if entry.exists():
+                logging.warning(f'Ignoring unreadable cached sheet names in {entry}: {e!r}')
+            return None
+        (entry / 'manifest.json').touch()
+        return names
+
+    def set_names(self, key: str, url: str, names: List[Union[str, int]]):
+        """
+        Keep just the names of a workbook's sheets, for a workbook whose sheets are each kept as they're used.
+        """
+        self._put(key, url, lambda partial: {'names': list(names), 'sheets': None})
+
+    def set(self, key: str, url: str, frames: Frames):
+        def write(partial: Path) -> dict:
+            names = list(frames.keys()) if isinstance(frames, Mapping) else None
+            sheets = [self._write(partial, i, df)
+                      for i, df in enumerate(frames.values() if isinstance(frames, Mapping) else [frames])]
+            return {'names': names, 'sheets': sheets}
+
+        self._put(key, url, write)
+
+    def _put(self, key: str, url: str, write: Callable[[Path], dict]):
+        entry = self.path / key
+        partial = self.path / f'{key}.{threading.get_ident()}.part'
+        partial.mkdir(parents=True, exist_ok=True)
+        try:
+            manifest = write(partial)
+            with open(partial / 'manifest.json', 'w', encoding='utf-8') as f:
+                json.dump({'url': url, **manifest}, f)
+            with self.lock:
+                if entry.exists():
+                    shutil.rmtree(entry)
+                partial.rename(entry)
+                if self.max_size is not None:
+                    self._evict(self.max_size)
+        finally:
+            shutil.rmtree(partial, ignore_errors=True)
+
+    @staticmethod
+    def _write(entry: Path, i: int, df: pd.DataFrame) -> dict:
+        # Parquet needs string column names, so keep the originals alongside. Only strings and ints come back from
+        # JSON as they went in, e.g. the tuples naming MultiIndex columns would come back as lists.
+        columns = list(df.columns)
+        try:
+            if not all(type(c) in (str, int) for c in columns):
+                raise ValueError('column names are not all strings or ints')
+            renamed = df.copy(deep=False)
+            renamed.columns = [str(c) for c in columns]
+            if len(set(renamed.columns)) != len(columns):
+                raise ValueError('column names are not unique as strings')
+            renamed.to_parquet(entry / f'{i}.parquet')
+            return {'format': 'parquet', 'columns': columns}
+        except Exception as e:
+            logging.debug(f'Pickling sheet {i} as it cannot be stored as Parquet: {e!r}')
+            (entry / f'{i}.parquet').unlink(missing_ok=True)
+            df.to_pickle(entry / f'{i}.pickle')
+            return {'format': 'pickle'}
+
+    @staticmethod
+    def _read(entry: Path, i: int, sheet: dict) -> pd.DataFrame:
+        if sheet['format'] == 'parquet':
+            df = pd.read_parquet(entry / f'{i}.parquet')
+            df.columns = sheet['columns']
+            return df
+        return pd.read_pickle(entry / f'{i}.pickle')
+
+    def invalidate(self, url: str) -> int:
+        """
+        Remove every entry for the given download URL, returning the number removed.
+        """
+        removed = 0
+        with self.lock:
+            for entry, manifest in self._entries():
+                if manifest.get('url') == url:
+                    shutil.rmtree(entry, ignore_errors=True)
+                    removed += 1
+        return removed
+
+    def clear(self):
+        with self.lock:
+            for entry, _ in self._entries():
+                shutil.rmtree(entry, ignore_errors=True)
+
+    def prune(self, max_size: Optional[int] = None, max_age: Optional[float] = None) -> int:
+        """
+        Remove entries not used for max_age seconds, then the least recently used until the cache is no bigger than
+        max_size (or the configured max_size) bytes. Returns the number of entries removed.
+        """
+        max_size = max_size if max_size is not None else self.max_size
+        removed = 0
+        with self.lock:
+            if max_age is not None:
+                for entry, _ in self._entries():
+                    if (entry / 'manifest.json').stat().st_mtime < time.time() - max_age:
+                        shutil.rmtree(entry, ignore_errors=True)
+                        removed += 1
+            if max_size is not None:
+                removed += self._evict(max_size)
+        return removed
+
+    def _entries(self):
+        for entry in self.path.iterdir():
+            if entry.is_dir() and not entry.name.endswith('.part'):
+                try:
+                    with open(entry / 'manifest.json', encoding='utf-8') as f:
+                        yield entry, json.load(f)
+                except (OSError, ValueError):
+                    continue
+
+    def _evict(self, max_size: int) -> int:
+        entries = []
+        for entry, _ in self._entries():
+            size = sum(f.stat().st_size for f in entry.iterdir())
+            entries.append(((entry / 'manifest.json').stat().st_mtime, size, entry))
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, entry in sorted(entries):
+            if total <= max_size:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+            removed += 1
+        return removed
@@ -0,0 +1,400 @@
+"""
+Read OpenDocument spreadsheets straight into messytables row sets, for xypath and databaker.
+
+The spreadsheet's content.xml is streamed with lxml's iterparse, a row at a time, rather than converting the whole
+workbook to XLS in memory first, which was slow and lost anything beyond XLS's 65,536 rows and 256 columns.
+Values come out as they would from messytables' XLS reader: floats for numbers, datetimes for dates and '' for
+empty cells. Cell properties cover what databaker uses: bold, italic, date formats and merged cells. Each sheet's
+cells are only read when the sheet is first used.
+"""
+
+import zipfile
+from contextlib import contextmanager
+from bisect import bisect_right
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from dateutil.parser import isoparse
+from lxml import etree
+from messytables.core import Cell, CoreProperties, RowSet, TableSet
+from messytables.error import ReadError
+from messytables.types import BoolType, DateType, FloatType, StringType
+
+OFFICE = 'urn:oasis:names:tc:opendocument:xmlns:office:1.0'
+STYLE = 'urn:oasis:names:tc:opendocument:xmlns:style:1.0'
+TEXT = 'urn:oasis:names:tc:opendocument:xmlns:text:1.0'
+TABLE = 'urn:oasis:names:tc:opendocument:xmlns:table:1.0'
+FO = 'urn:oasis:names:tc:opendocument:xmlns:xsl-fo-compatible:1.0'
+NUMBER = 'urn:oasis:names:tc:opendocument:xmlns:datastyle:1.0'
+
+_TABLE = f'{{{TABLE}}}table'
+_COLUMN = f'{{{TABLE}}}table-column'
+_ROW = f'{{{TABLE}}}table-row'
+_CELL = f'{{{TABLE}}}table-cell'
+_COVERED_CELL = f'{{{TABLE}}}covered-table-cell'
+_AUTOMATIC_STYLES = f'{{{OFFICE}}}automatic-styles'
+_PARAGRAPH = f'{{{TEXT}}}p'
+
+# the rows of a sheet and the bounding boxes of its merged cells
+Sheet = Tuple[List[List['ODSCell']], List[Tuple[int, int, int, int]]]
+
+_STRING, _FLOAT, _DATE, _BOOL = StringType(), FloatType(), DateType(None), BoolType()
+
+# Letters databaker looks for in a date's formatting string, for each part of an ODS date style
+_DATE_PARTS = {
+    f'{{{NUMBER}}}year': 'YYYY',
+    f'{{{NUMBER}}}quarter': 'Q',
+    f'{{{NUMBER}}}month': 'MM',
+    f'{{{NUMBER}}}day': 'DD',
+    f'{{{NUMBER}}}day-of-week': 'DDD',
+    f'{{{NUMBER}}}hours': 'HH',
+    f'{{{NUMBER}}}minutes': 'NN',
+    f'{{{NUMBER}}}seconds': 'SS'
+}
+
+
+class CellStyle(NamedTuple):
+    bold: bool = False
+    italic: bool = False
+    formatting_string: str = 'General'
+
+
+_DEFAULT_STYLE = CellStyle()
+
+
+class _Styles:
+    """
+    The cell styles of a spreadsheet, from both styles.xml and content.xml's automatic styles, resolving each
+    style's parent and number format as it's first asked for.
+    """
+
+    def __init__(self):
+        self._parents: Dict[str, Optional[str]] = {}
+        self._text: Dict[str, dict] = {}
+        self._data_styles: Dict[str, Optional[str]] = {}
+        self._formats: Dict[str, str] = {}
+        self._resolved: Dict[Optional[str], CellStyle] = {}
+
+    def add(self, styles: etree.ElementBase):
+        for element in styles.iter(f'{{{STYLE}}}style'):
+            if element.get(f'{{{STYLE}}}family') != 'table-cell':
+                continue
+            name = element.get(f'{{{STYLE}}}name')
+            self._parents[name] = element.get(f'{{{STYLE}}}parent-style-name')
+            self._data_styles[name] = element.get(f'{{{STYLE}}}data-style-name')
+            text = {}
+            properties = element.find(f'{{{STYLE}}}text-properties')
+            if properties is not None:
+                weight = properties.get(f'{{{FO}}}font-weight')
+                if weight is not None:
+                    text['bold'] = weight == 'bold' or (weight.isdigit() and int(weight) >= 600)
+                font_style = properties.get(f'{{{FO}}}font-style')
+                if font_style is not None:
+                    text['italic'] = font_style in ('italic', 'oblique')
+            self._text[name] = text
+        for element in styles.iter(f'{{{NUMBER}}}date-style', f'{{{NUMBER}}}time-style'):
+            parts = []
+            for part in element:
+                if part.tag in _DATE_PARTS:
+                    parts.append(_DATE_PARTS[part.tag])
+                elif part.tag == f'{{{NUMBER}}}text' and part.text:
+                    parts.append(part.text)
+            self._formats[element.get(f'{{{STYLE}}}name')] = ''.join(parts)
+        self._resolved.clear()
+
+    def __getitem__(self, name: Optional[str]) -> CellStyle:
+        if name not in self._resolved:
+            self._resolved[name] = self._resolve(name, set())
+        return self._resolved[name]
+
+    def _resolve(self, name: Optional[str], seen: set) -> CellStyle:
+        if name is None or name not in self._parents or name in seen:
+            return _DEFAULT_STYLE
+        seen.add(name)
+        parent = self._resolve(self._parents[name], seen)
+        data_style = self._data_styles[name]
+        return parent._replace(
+            formatting_string=self._formats.get(data_style, parent.formatting_string) if data_style is not None
+            else parent.formatting_string,
+            **self._text[name])
+
+
+class ODSProperties(CoreProperties):
+    KEYS = ['bold', 'italic', 'richtext', 'blank', 'a_date', 'formatting_string']
+
+    def __init__(self, cell: 'ODSCell'):
+        self.cell = cell
+
+    def raw_span(self, always=False) -> Optional[Tuple[int, int, int, int]]:
+        """
+        The bounding box (top row, bottom row, left column, right column, all inclusive) of the merged cells this
+        cell is part of, as messytables.excel.XLSProperties.raw_span.
+        """
+        row, col = self.cell.ods_pos
+        for box in self.cell.merged:
+            rlo, rhi, clo, chi = box
+            if rlo <= row <= rhi and clo <= col <= chi:
+                return box
+        if always:
+            return row, row, col, col
+        return None
+
+    @property
+    def topleft(self):
+        span = self.raw_span()
+        if span is None:
+            return True
+        rlo, _, clo, _ = span
+        return (rlo, clo) == self.cell.ods_pos
+
+    def get_bold(self):
+        return self.cell.style.bold
+
+    def get_italic(self):
+        return self.cell.style.italic
+
+    def get_richtext(self):
+        return False
+
+    def get_blank(self):
+        return self.cell.value == ''
+
+    def get_a_date(self):
+        return isinstance(self.cell.type, DateType)
+
+    def get_formatting_string(self):
+        return self.cell.style.formatting_string
+
+
+class ODSCell(Cell):
+
+    def __init__(self, value, cell_type, style: CellStyle, pos: Tuple[int, int], merged: list):
+        super().__init__(value, type=cell_type)
+        self.style = style
+        self.ods_pos = pos  # (row, column), as XLSCell.xlrd_pos
+        self.merged = merged
+
+    @property
+    def topleft(self):
+        return self.properties.topleft
+
+    @property
+    def properties(self):
+        return ODSProperties(self)
+
+
+class ODSRowSet(RowSet):
+    """
+    A single sheet of an OpenDocument spreadsheet. Its rows are only read from the file when they're first needed,
+    and then kept by the ODSTableSet.
+    """
+
+    def __init__(self, name: str, tableset: 'ODSTableSet', index: int, window=None):
+        self.name = name
+        self.tableset = tableset
+        self.index = index
+        self.window = window or 1000
+        super().__init__(typed=True)
+
+    @property
+    def rows(self) -> List[List[ODSCell]]:
+        return self.tableset.load([self.index])[self.index][0]
+
+    @property
+    def merged(self) -> List[Tuple[int, int, int, int]]:
+        return self.tableset.load([self.index])[self.index][1]
+
+    def raw(self, sample=False):
+        return iter(self.rows[:self.window] if sample else self.rows)
+
+
+def _paragraph_text(element: etree.ElementBase) -> str:
+    parts = [element.text or '']
+    for child in element:
+        if child.tag == f'{{{TEXT}}}s':
+            parts.append(' ' * int(child.get(f'{{{TEXT}}}c', '1')))
+        elif child.tag == f'{{{TEXT}}}tab':
+            parts.append('\t')
+        elif child.tag == f'{{{TEXT}}}line-break':
+            parts.append('\n')
+        elif child.tag != f'{{{OFFICE}}}annotation':
+            parts.append(_paragraph_text(child))
+        parts.append(child.tail or '')
+    return ''.join(parts)
+
+
+def _cell_value(cell: etree.ElementBase):
+    value_type = cell.get(f'{{{OFFICE}}}value-type')
+    if value_type in ('float', 'percentage', 'currency'):
+        return float(cell.get(f'{{{OFFICE}}}value')), _FLOAT
+    if value_type == 'date':
+        return isoparse(cell.get(f'{{{OFFICE}}}date-value')), _DATE
+    if value_type == 'boolean':
+        return cell.get(f'{{{OFFICE}}}boolean-value') == 'true', _BOOL
+    if value_type is None:
+        return '', _STRING
+    # strings, and times which are kept as displayed
+    return '\n'.join(_paragraph_text(p) for p in cell.iterchildren(_PARAGRAPH)), _STRING
+
+
+class _SheetBuilder:
+    """
+    Collects the rows of one table as they're parsed. Empty rows and cells are only added once something follows
+    them, so that the million or so empty rows and thousand or so empty columns that spreadsheet applications pad
+    a sheet out with are never expanded.
+    """
+
+    def __init__(self, styles: _Styles):
+        self.styles = styles
+        self.rows: List[List[ODSCell]] = []
+        self.merged: List[Tuple[int, int, int, int]] = []
+        # the default cell style of each run of table:table-column elements, and the column each run starts at
+        self._column_starts: List[int] = []
+        self._column_styles: List[Optional[str]] = []
+        self._columns = 0
+        self._empty_rows = 0
+
+    def add_column(self, column: etree.ElementBase):
+        self._column_starts.append(self._columns)
+        self._column_styles.append(column.get(f'{{{TABLE}}}default-cell-style-name'))
+        self._columns += int(column.get(f'{{{TABLE}}}number-columns-repeated', '1'))
+
+    def _column_style(self, col: int, row_style: Optional[str]) -> Optional[str]:
+        i = bisect_right(self._column_starts, col) - 1
+        if 0 <= i and col < self._columns and self._column_styles[i] is not None:
+            return self._column_styles[i]
+        return row_style
+
+    def add_row(self, row: etree.ElementBase):
+        repeat = int(row.get(f'{{{TABLE}}}number-rows-repeated', '1'))
+        row_style = row.get(f'{{{TABLE}}}default-cell-style-name')
+        cells = []
+        empty_cells = []
+        col = 0
+        spans = []
+        for cell in row.iterchildren(_CELL, _COVERED_CELL):
+            count = int(cell.get(f'{{{TABLE}}}number-columns-repeated', '1'))
+            style_name = cell.get(f'{{{TABLE}}}style-name') or self._column_style(col, row_style)
+            value, cell_type = _cell_value(cell)
+            rows_spanned = int(cell.get(f'{{{TABLE}}}number-rows-spanned', '1'))
+            columns_spanned = int(cell.get(f'{{{TABLE}}}number-columns-spanned', '1'))
+            if rows_spanned > 1 or columns_spanned > 1:
+                spans.append((col, rows_spanned, columns_spanned))
+            if value == '' and rows_spanned == 1 and columns_spanned == 1:
+                empty_cells.append((count, cell_type, style_name))
+            else:
+                for empty_count, empty_type, empty_style in empty_cells:
+                    cells.extend(['', empty_type, empty_style] for _ in range(empty_count))
+                empty_cells = []
+                cells.extend([value, cell_type, style_name] for _ in range(count))
+            col += count
+        if len(cells) == 0:
+            self._empty_rows += repeat
+            return
+        self.rows.extend([] for _ in range(self._empty_rows))
+        self._empty_rows = 0
+        for _ in range(repeat):
+            y = len(self.rows)
+            for x, rows_spanned, columns_spanned in spans:
+                self.merged.append((y, y + rows_spanned - 1, x, x + columns_spanned - 1))
+            self.rows.append([ODSCell(value, cell_type, self.styles[style_name], (y, x), self.merged)
+                              for x, (value, cell_type, style_name) in enumerate(cells)])
+
+    def build(self) -> Sheet:
+        # make the sheet rectangular, as xlrd does
+        width = max((len(row) for row in self.rows), default=0)
+        for y, row in enumerate(self.rows):
+            row.extend(ODSCell('', _STRING, self.styles[self._column_style(x, None)], (y, x), self.merged)
+                       for x in range(len(row), width))
+        return self.rows, self.merged
+
+
+class ODSTableSet(TableSet):
+    """
+    A messytables TableSet for OpenDocument spreadsheets, read without converting them to another format first.
+    Either a seekable fileobj or a filename is needed, as an ODS file is a zip archive.
+    """
+
+    def __init__(self, fileobj=None, filename=None, window=None, **kw):
+        if fileobj is None and filename is None:
+            raise ReadError('Need either a file object or a filename to read an ODS file.')
+        self.source = filename if filename is not None else fileobj
+        self.window = window
+        self._names: Optional[List[str]] = None
+        self._sheets: Dict[int, Sheet] = {}
+
+    def sheet_names(self) -> List[str]:
+        """
+        The names of the sheets, found without reading any of their cells.
+        """
+        if self._names is None:
+            names = []
+            with self._open('content.xml') as content:
+                for event, element in etree.iterparse(content, events=('start', 'end'), huge_tree=True,
+                                                      tag=(_TABLE, _ROW)):
+                    if event == 'start':
+                        if element.tag == _TABLE:
+                            names.append(element.get(f'{{{TABLE}}}name'))
+                    else:
+                        _free(element)
+            self._names = names
+        return self._names
+
+    def make_tables(self) -> List[ODSRowSet]:
+        return [ODSRowSet(name, self, index, self.window) for index, name in enumerate(self.sheet_names())]
+
+    def load(self, indexes: Iterable[int]) -> Dict[int, Sheet]:
+        """
+        Read the cells of the sheets at the given indexes, if they haven't been read already, in one pass through
+        the file. Returns the rows and merged cells of every sheet read so far, by index.
+        """
+        wanted = set(indexes) - set(self._sheets)
+        if len(wanted) > 0:
+            styles = _Styles()
+            with self._open('styles.xml', optional=True) as styles_xml:
+                if styles_xml is not None:
+                    styles.add(etree.parse(styles_xml).getroot())
+            with self._open('content.xml') as content:
+                self._parse_content(content, styles, wanted)
+        return self._sheets
+
+    @contextmanager
+    def _open(self, name: str, optional: bool = False):
+        try:
+            with zipfile.ZipFile(self.source) as archive:
+                if optional and name not in archive.namelist():
+                    yield None
+                else:
+                    with archive.open(name) as member:
+                        yield member
+        except (zipfile.BadZipFile, KeyError, etree.XMLSyntaxError) as e:
+            raise ReadError(f"Can't read ODS file: {e!r}")
+
+    def _parse_content(self, content, styles: _Styles, wanted: Set[int]):
+        index = 0
+        sheet = _SheetBuilder(styles)
+        for _, element in etree.iterparse(content, events=('end',), huge_tree=True,
+                                          tag=(_AUTOMATIC_STYLES, _TABLE, _COLUMN, _ROW)):
+            if element.tag == _ROW:
+                if index in wanted:
+                    sheet.add_row(element)
+            elif element.tag == _COLUMN:
+                if index in wanted:
+                    sheet.add_column(element)
+            elif element.tag == _AUTOMATIC_STYLES:
+                styles.add(element)
+            elif element.tag == _TABLE:
+                if index in wanted:
+                    self._sheets[index] = sheet.build()
+                    sheet = _SheetBuilder(styles)
+                    if wanted.issubset(self._sheets):
+                        # no need to read the rest of the file
+                        break
+                index += 1
+            _free(element)
+
+
+def _free(element: etree.ElementBase):
+    # free what's been read so far, so memory use doesn't grow with the size of the file
+    element.clear(keep_tail=True)
+    while element.getprevious() is not None:
+        del element.getparent()[0]
@@ -0,0 +1,92 @@
+import threading
+from collections.abc import Mapping, Sequence
+from typing import Callable, Dict, List, Union
+
+import pandas as pd
+import xypath
+from messytables.core import TableSet
+
+
+class LazyTabs(Sequence):
+    """
+    The tabs of a spreadsheet as xypath tables, as returned by as_databaker(). A tab is only read and turned into
+    an xypath table when it's first used, then kept, so a transform that uses a few tabs of a large workbook doesn't
+    pay for the rest. Tabs can be looked up by position, as in a list, or by name:
+
+        tabs = distribution.as_databaker()
+        tab = tabs['Table 1']
+
+    Going through all the tabs reads any that haven't been read yet together, where the tableset can do that in
+    one pass.
+    """
+
+    def __init__(self, tableset: TableSet):
+        self._tableset = tableset
+        self._rowsets = list(tableset.tables)
+        self._tabs: Dict[int, xypath.Table] = {}
+        self._lock = threading.Lock()
+        self.names: List[str] = [rowset.name for rowset in self._rowsets]
+
+    def __len__(self):
+        return len(self._rowsets)
+
+    def __getitem__(self, key: Union[int, slice, str]):
+        if isinstance(key, slice):
+            return [self[index] for index in range(*key.indices(len(self)))]
+        if isinstance(key, str):
+            names = [name.strip() for name in self.names]
+            if key.strip() not in names:
+                raise KeyError(f'No tab named {key!r}.')
+            key = names.index(key.strip())
+        if key < 0:
+            key += len(self)
+        if not 0 <= key < len(self):
+            raise IndexError('Tab index out of range.')
+        with self._lock:
+            if key not in self._tabs:
+                # as xypath.loader.get_sheets
+                tab = xypath.Table.from_messy(self._rowsets[key])
+                tab.index = key
+                self._tabs[key] = tab
+            return self._tabs[key]
+
+    def __iter__(self):
+        load = getattr(self._tableset, 'load', None)
+        if load is not None:
+            load([index for index in range(len(self)) if index not in self._tabs])
+        for index in range(len(self)):
+            yield self[index]
+
+    def __repr__(self):
+        return f'LazyTabs({self.names!r})'
+
+
+class LazySheets(Mapping):
+    """
+    The sheets of a spreadsheet as pandas DataFrames, keyed by sheet name, as returned by as_pandas() for a whole
+    workbook, or likewise the files of a zip archive. A sheet is only parsed by load(name) when it's first used,
+    then kept.
+    """
+
+    def __init__(self, names: List[str], load: Callable[[str], pd.DataFrame]):
+        self._names = list(names)
+        self._load = load
+        self._frames: Dict[str, pd.DataFrame] = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, name: str) -> pd.DataFrame:
+        if name not in self._names:
+            raise KeyError(name)
+        with self._lock:
+            if name not in self._frames:
+                self._frames[name] = self._load(name)
+            return self._frames[name]
+
+    def __iter__(self):
+        return iter(self._names)
+
+    def __len__(self):
+        return len(self._names)
+
+    def __repr__(self):
+        return f'LazySheets({self._names!r})'
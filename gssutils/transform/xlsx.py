@@ -0,0 +1,224 @@
+"""
+Stream the rows of an Excel (XLSX) workbook, so that very large sheets can be read a chunk at a time in constant
+memory, rather than pandas, xlrd or openpyxl building the whole workbook first.
+
+A sheet's XML is parsed with lxml's iterparse a row at a time. Values come out as pandas.read_excel gives them:
+whole numbers as ints, other numbers as floats, dates as datetimes, and None for empty and error cells.
+"""
+
+import posixpath
+import re
+import zipfile
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Union
+
+import pandas as pd
+from dateutil.parser import isoparse
+from lxml import etree
+from pandas.io.parsers import TextParser
+
+RELATIONSHIPS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+PACKAGE_RELATIONSHIPS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+
+# Built in number formats that are dates or times
+_DATE_FORMAT_IDS = set(range(14, 23)) | {45, 46, 47}
+# A custom number format is a date if it has any date or time parts outside of quoted text, escapes and colours
+_NOT_DATE_PARTS = re.compile(r'"[^"]*"|\\.|\[[^]]*]|_.|\*.')
+_DATE_PARTS = re.compile(r'[dmyhs]', re.IGNORECASE)
+_COLUMN = re.compile(r'[A-Z]+')
+
+
+def column_index(reference: str) -> int:
+    """
+    The zero-based column of a cell reference like 'AB12'.
+    """
+    index = 0
+    for letter in _COLUMN.match(reference).group():
+        index = index * 26 + ord(letter) - ord('A') + 1
+    return index - 1
+
+
+class XLSXReader:
+    """
+    Reads the sheets of an XLSX workbook, from a path or seekable file, one row at a time. Only the workbook's
+    shared strings and styles are kept in memory.
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self._sheets: Optional[Dict[str, str]] = None
+        self._ns: Optional[str] = None
+        self._date1904 = False
+        self._shared_strings: Optional[List[str]] = None
+        self._date_styles: Optional[List[bool]] = None
+
+    def _tag(self, name: str) -> str:
+        return f'{{{self._ns}}}{name}'
+
+    def _read_workbook(self, archive: zipfile.ZipFile):
+        if self._sheets is not None:
+            return
+        workbook = etree.fromstring(archive.read('xl/workbook.xml'))
+        self._ns = etree.QName(workbook).namespace
+        properties = workbook.find(self._tag('workbookPr'))
+        self._date1904 = properties is not None and properties.get('date1904') in ('1', 'true')
+        relationships = etree.fromstring(archive.read('xl/_rels/workbook.xml.rels'))
+        targets = {}
+        for relationship in relationships.iter(f'{{{PACKAGE_RELATIONSHIPS}}}Relationship'):
+            target = relationship.get('Target')
+            # targets are either relative to xl/ or absolute within the archive
+            targets[relationship.get('Id')] = target.lstrip('/') if target.startswith('/') \
+                else posixpath.normpath(posixpath.join('xl', target))
+        self._sheets = {sheet.get('name'): targets[sheet.get(f'{{{RELATIONSHIPS}}}id')]
+                        for sheet in workbook.iter(self._tag('sheet'))}
+        if 'xl/sharedStrings.xml' in archive.namelist():
+            with archive.open('xl/sharedStrings.xml') as shared_strings:
+                self._shared_strings = self._read_shared_strings(shared_strings)
+        else:
+            self._shared_strings = []
+        self._date_styles = self._read_date_styles(archive.read('xl/styles.xml')) \
+            if 'xl/styles.xml' in archive.namelist() else []
+
+    def _read_shared_strings(self, shared_strings) -> List[str]:
+        strings = []
+        for _, element in etree.iterparse(shared_strings, tag=self._tag('si'), huge_tree=True):
+            strings.append(self._text(element))
+            element.clear(keep_tail=True)
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+        return strings
+
+    def _text(self, element: etree.ElementBase) -> str:
+        # rich text is split into runs; phonetic hints (rPh) aren't part of the text
+        return ''.join(t.text or '' for t in element.iter(self._tag('t'))
+                       if t.getparent().tag != self._tag('rPh'))
+
+    def _read_date_styles(self, styles_xml: bytes) -> List[bool]:
+        styles = etree.fromstring(styles_xml)
+        custom = {}
+        for number_format in styles.iter(self._tag('numFmt')):
+            code = _NOT_DATE_PARTS.sub('', number_format.get('formatCode', ''))
+            custom[int(number_format.get('numFmtId'))] = _DATE_PARTS.search(code) is not None
+        cell_formats = styles.find(self._tag('cellXfs'))
+        if cell_formats is None:
+            return []
+        date_styles = []
+        for xf in cell_formats.iterchildren(self._tag('xf')):
+            format_id = int(xf.get('numFmtId', '0'))
+            date_styles.append(custom.get(format_id, format_id in _DATE_FORMAT_IDS))
+        return date_styles
+
+    def sheet_names(self) -> List[str]:
+        with zipfile.ZipFile(self.source) as archive:
+            self._read_workbook(archive)
+        return list(self._sheets)
+
+    def _from_excel(self, serial: float):
+        # to the nearest millisecond, as Excel keeps them
+        since = timedelta(milliseconds=round(serial * 24 * 60 * 60 * 1000))
+        if 0 <= serial < 1:
+            return (datetime.min + since).time()
+        if self._date1904:
+            return datetime(1904, 1, 1) + since
+        # Excel counts 1900 as a leap year, so serials before 1 March 1900 are a day out
+        return datetime(1899, 12, 31 if serial < 60 else 30) + since
+
+    def _value(self, cell: etree.ElementBase):
+        cell_type = cell.get('t', 'n')
+        if cell_type == 'inlineStr':
+            inline = cell.find(self._tag('is'))
+            return self._text(inline) if inline is not None else None
+        value = cell.findtext(self._tag('v'))
+        if value is None or value == '' or cell_type == 'e':
+            return None
+        if cell_type == 's':
+            return self._shared_strings[int(value)]
+        if cell_type == 'str':
+            return value
+        if cell_type == 'b':
+            return value == '1'
+        if cell_type == 'd':
+            return isoparse(value)
+        number = float(value)
+        style = int(cell.get('s', '0'))
+        if style < len(self._date_styles) and self._date_styles[style]:
+            return self._from_excel(number)
+        return int(number) if number.is_integer() else number
+
+    def rows(self, sheet: Union[str, int] = 0) -> Iterator[list]:
+        """
+        Yield the values of each row of the sheet, given by name or position, as a list, up to the last cell with a
+        value. Missing cells are None, and missing rows before the last row with anything in it are empty lists.
+        """
+        with zipfile.ZipFile(self.source) as archive:
+            self._read_workbook(archive)
+            path = list(self._sheets.values())[sheet] if isinstance(sheet, int) else self._sheets[sheet]
+            row_tag, cell_tag = self._tag('row'), self._tag('c')
+            with archive.open(path) as sheet_xml:
+                next_row = 0
+                empty_rows = 0
+                for _, element in etree.iterparse(sheet_xml, tag=row_tag, huge_tree=True):
+                    row_number = int(element.get('r', next_row + 1)) - 1
+                    empty_rows += row_number - next_row
+                    next_row = row_number + 1
+                    values = []
+                    for cell in element.iterchildren(cell_tag):
+                        reference = cell.get('r')
+                        if reference is not None:
+                            values.extend(None for _ in range(len(values), column_index(reference)))
+                        values.append(self._value(cell))
+                    # formatted but empty cells often pad out a row too
+                    while len(values) > 0 and values[-1] is None:
+                        values.pop()
+                    if len(values) == 0:
+                        # only yielded if something follows, as formatted but empty rows often pad out a sheet
+                        empty_rows += 1
+                    else:
+                        for _ in range(empty_rows):
+                            yield []
+                        empty_rows = 0
+                        yield values
+                    element.clear(keep_tail=True)
+                    while element.getprevious() is not None:
+                        del element.getparent()[0]
+
+    def iter_frames(self, sheet: Union[str, int] = 0, chunksize: int = 10000,
+                    header: Optional[int] = 0) -> Iterator[pd.DataFrame]:
+        """
+        Yield the sheet as DataFrames of up to chunksize rows, like pandas.read_csv(chunksize=...), reading the sheet
+        through once. The row at header (counting from 0) gives the column names, or the columns are numbered if
+        header is None. A chunk has every column seen so far, so a row wider than the header adds columns, named
+        as read_excel names them, to its chunk and the ones after. The index runs on from one chunk to the next.
+        """
+        rows = self.rows(sheet)
+        names: List = []
+        if header is not None:
+            for _ in range(header):
+                next(rows, None)
+            names = next(rows, [])
+        columns = list(range(len(names))) if header is None else \
+            [name if name is not None else f'Unnamed: {i}' for i, name in enumerate(names)]
+        start = 0
+        chunk = []
+        for row in rows:
+            if len(row) > len(columns):
+                columns = columns + [i if header is None else f'Unnamed: {i}' for i in range(len(columns), len(row))]
+            chunk.append(row)
+            if len(chunk) == chunksize:
+                yield self._frame(chunk, columns, start)
+                start += len(chunk)
+                chunk = []
+        if len(chunk) > 0 or start == 0:
+            yield self._frame(chunk, columns, start)
+
+    @staticmethod
+    def _frame(chunk: List[list], columns: list, start: int) -> pd.DataFrame:
+        index = pd.RangeIndex(start, start + len(chunk))
+        if len(columns) == 0:
+            # nothing in the sheet, and TextParser can't parse rows without columns
+            return pd.DataFrame(index=index)
+        width = len(columns)
+        # pandas.read_excel's own parser, so that missing values and types come out the same
+        frame = TextParser([row + [None] * (width - len(row)) for row in chunk], names=columns).read()
+        frame.index = index
+        return frame
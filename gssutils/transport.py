@@ -0,0 +1,91 @@
+import asyncio
+import functools
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+import requests
+
+
+class Transport:
+    """
+    The small interface scrapers use to make HTTP requests, wrapping a (usually cached) requests session.
+    get_many() lets a scraper batch up sub-requests, making up to max_concurrency of them at the same time
+    and returning the responses in the same order as the urls.
+    """
+
+    def __init__(self, session: requests.Session, max_concurrency: int = 8):
+        self.session = session
+        self.max_concurrency = max_concurrency
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.session.get(url, **kwargs)
+
+    def get_many(self, urls: List[str], **kwargs) -> List[requests.Response]:
+        if len(urls) <= 1 or self.max_concurrency <= 1:
+            return [self.get(url, **kwargs) for url in urls]
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(urls))) as executor:
+            return list(executor.map(functools.partial(self.get, **kwargs), urls))
+
+
+class AsyncTransport(Transport):
+    """
+    A transport that can also be driven from an asyncio event loop, so batches of scrapes can await their
+    requests rather than blocking on each one.
+    Requests still go through the wrapped session, so responses are cached exactly as they are for the
+    synchronous transport; at most max_concurrency requests are in flight at once.
+
+    The requests are made on a pool of threads, started when it's first needed. The pool is shut down by
+    close(), at the end of a with block, or otherwise once the transport is garbage collected:
+
+        with AsyncTransport(session) as transport:
+            scraper = Scraper(uri, session, transport=transport)
+    """
+
+    def __init__(self, session: requests.Session, max_concurrency: int = 8):
+        super().__init__(session, max_concurrency)
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency)
+                # don't leave the threads waiting for work if nobody closes the transport
+                weakref.finalize(self, self._executor.shutdown, wait=False)
+            return self._executor
+
+    def get_many(self, urls: List[str], **kwargs) -> List[requests.Response]:
+        return list(self.executor.map(functools.partial(self.get, **kwargs), urls))
+
+    async def aget(self, url: str, **kwargs) -> requests.Response:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(self.get, url, **kwargs))
+
+    async def aget_many(self, urls: List[str], **kwargs) -> List[requests.Response]:
+        return list(await asyncio.gather(*[self.aget(url, **kwargs) for url in urls]))
+
+    def close(self):
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __getstate__(self):
+        # thread pools and locks can't be pickled, e.g. when a scraper is sent to another process
+        state = dict(self.__dict__)
+        state['_executor'] = None
+        del state['_executor_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._executor_lock = threading.Lock()
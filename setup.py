@@ -44,6 +44,7 @@ setuptools.setup(
         "Operating System :: OS Independent",
     ],
     entry_points={
-        'console_scripts': ['codelist-manager=gssutils.codelistmanager.main:codelist_manager']
+        'console_scripts': ['codelist-manager=gssutils.codelistmanager.main:codelist_manager',
+                            'gssutils=gssutils.main:main']
     }
 )